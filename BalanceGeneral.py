@@ -1,17 +1,21 @@
 import sys
 import os
-import sqlite3
-from datetime import datetime
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QDateEdit, QTableWidget, QTableWidgetItem, QMessageBox, QHeaderView,
-    QLineEdit, QPushButton, QScrollArea, QFileDialog
+    QLineEdit, QPushButton, QScrollArea, QFileDialog, QTreeWidget,
+    QComboBox, QSpinBox
 )
 from PyQt6.QtCore import Qt, QDate
 from PyQt6.QtGui import QFont, QIcon, QCursor
-import pandas as pd
-from fpdf import FPDF
 from PyQt6.QtWidgets import QInputDialog
+import reportes
+import tablas
+import trabajos
+from reportes import (
+    CATEGORY_CURRENT, CATEGORY_NON_CURRENT, CATEGORY_LIAB_CURRENT,
+    CATEGORY_LIAB_NON_CURRENT, CATEGORY_EQUITY, UTILIDAD_NETA
+)
 
 
 # Ruta de recursos para PyInstaller
@@ -22,40 +26,6 @@ def resource_path(relative_path):
         base_path = os.path.abspath('.')
     return os.path.join(base_path, relative_path)
 
-# Definición de categorías
-CATEGORY_CURRENT = {
-    'Disponibilidades': ['caja', 'cajas', 'banco', 'bancos'],
-    'Inversiones CP': ['inversion', 'inversiones'],
-    'Inventarios': ['inventario', 'inventarios'],
-    'Clientes': ['clientes', 'cliente'],
-    'Documentos por cobrar': ['documentos por cobrar'],
-    'Impuestos por liquidar': ['isr por cobrar', 'igss por cobrar', 'iva por cobrar', 'iusi por cobrar'],
-    'Otras cuentas': []
-}
-CATEGORY_NON_CURRENT = {
-    'Vehiculos': ['vehiculos', 'edificios', 'maquinaria'],
-    'Otras cuentas': []
-}
-CATEGORY_LIAB_CURRENT = {
-    'Préstamos bancarios': ['prestamos bancarios', 'prestamo bancario'],
-    'Proveedores': ['proveedores', 'proveedor'],
-    'Impuestos por pagar': ['isr por pagar', 'igss por pagar', 'iva por pagar', 'iusi por pagar'],
-    'Acreedores': ['acreedores', 'acreedor'],
-    'Otras cuentas por pagar': []
-}
-CATEGORY_LIAB_NON_CURRENT = {
-    'Documentos por pagar LP': ['documentos por pagar'],
-    'Préstamos bancarios LP': ['prestamos bancarios', 'prestamo bancario'],
-    'Otras cuentas por pagar': []
-}
-CATEGORY_EQUITY = {
-    'Capital en acciones': ['capital en acciones', 'capital accionistas'],
-    'Reserva Legal': ['reserva legal'],
-    'Utilidades acumuladas': ['utilidades acumuladas', 'utilidades de años anteriores'],
-    'Patrimonio': ['patrimonio'],
-    'Otro patrimonio': []
-}
-
 class ModernButton(QPushButton):
     def __init__(self, text, color="#004AAD", parent=None):
         super().__init__(text, parent)
@@ -86,8 +56,11 @@ class CalculoActivoUI(QWidget):
         self.setWindowTitle('Balance General')
         self.setWindowIcon(QIcon(resource_path('icon.ico')))
         self.setMinimumSize(1000, 800)
-        self.conn = sqlite3.connect(resource_path('contabilidad.db'))
-        self.cursor = self.conn.cursor()
+        self.trabajo = None
+        self.trabajo_comparativo = None
+        # Suben con cada cálculo: el resultado o error de uno reemplazado se descarta
+        self.generacion = 0
+        self.generacion_comparativo = 0
         self.setup_ui()
 
     def setup_ui(self):
@@ -127,7 +100,7 @@ class CalculoActivoUI(QWidget):
         self.tbl_pnc, self.inp_pnc = self._make_table('Pasivo No Corriente', CATEGORY_LIAB_NON_CURRENT, main)
 
         main.addWidget(QLabel('Patrimonio'))
-        cats_eq = list(CATEGORY_EQUITY.keys()) + ['Utilidad (Pérdida) neta del año']
+        cats_eq = list(CATEGORY_EQUITY.keys()) + [UTILIDAD_NETA]
         self.tbl_eq = QTableWidget(len(cats_eq), 2)
         self.tbl_eq.setHorizontalHeaderLabels(['Patrimonio', 'Total Q'])
         self.tbl_eq.verticalHeader().setVisible(False)
@@ -145,6 +118,47 @@ class CalculoActivoUI(QWidget):
         h_eq.addStretch()
         main.addLayout(h_eq)
 
+        # Detalle por cuenta: grupo > sección > categoría > cuenta
+        h_det = QHBoxLayout()
+        h_det.addWidget(QLabel('Detalle por cuenta'))
+        self.combo_nivel = QComboBox()
+        for texto, nivel in (('Grupos', 0), ('Secciones', 1), ('Categorías', 2), ('Cuentas', None)):
+            self.combo_nivel.addItem(texto, nivel)
+        self.combo_nivel.setCurrentIndex(2)
+        self.combo_nivel.currentIndexChanged.connect(self.cambiar_nivel)
+        h_det.addWidget(QLabel('Mostrar hasta:'))
+        h_det.addWidget(self.combo_nivel)
+        h_det.addStretch()
+        main.addLayout(h_det)
+        self.arbol = QTreeWidget()
+        self.arbol.setHeaderLabels(['Cuenta', 'Total Q'])
+        self.arbol.header().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.arbol.setMinimumHeight(300)
+        main.addWidget(self.arbol)
+
+        # Comparativo: balance al cierre de varios periodos con la variación del último
+        h_cmp = QHBoxLayout()
+        h_cmp.addWidget(QLabel('Comparativo'))
+        self.combo_periodicidad = QComboBox()
+        self.combo_periodicidad.addItems(reportes.PERIODICIDADES)
+        self.spin_periodos = QSpinBox()
+        self.spin_periodos.setRange(2, 24)
+        self.spin_periodos.setValue(3)
+        btn_comparar = ModernButton('Comparar')
+        btn_comparar.clicked.connect(self.on_comparar)
+        h_cmp.addWidget(QLabel('Periodicidad:'))
+        h_cmp.addWidget(self.combo_periodicidad)
+        h_cmp.addWidget(QLabel('Periodos:'))
+        h_cmp.addWidget(self.spin_periodos)
+        h_cmp.addWidget(btn_comparar)
+        h_cmp.addStretch()
+        main.addLayout(h_cmp)
+        self.tbl_comparativo = QTableWidget()
+        self.tbl_comparativo.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.tbl_comparativo.verticalHeader().setVisible(False)
+        self.tbl_comparativo.setMinimumHeight(300)
+        main.addWidget(self.tbl_comparativo)
+
         exp_layout = QHBoxLayout()
         self.btn_export_excel = ModernButton("Exportar a Excel")
         self.btn_export_excel.clicked.connect(self.export_to_excel)
@@ -191,6 +205,7 @@ class CalculoActivoUI(QWidget):
         if not ok or not empresa:
             return
 
+        import pandas as pd
         writer = pd.ExcelWriter(path, engine='xlsxwriter')
         workbook = writer.book
         worksheet = workbook.add_worksheet('Balance')
@@ -231,12 +246,15 @@ class CalculoActivoUI(QWidget):
         if not ok or not empresa:
             return
 
-        self.on_calcular()  # Asegura que los datos estén actualizados
+        # Recalcula en segundo plano y guarda cuando los datos estén actualizados
+        self.on_calcular(despues=lambda: self.guardar_pdf(empresa))
 
+    def guardar_pdf(self, empresa):
         path, _ = QFileDialog.getSaveFileName(self, "Guardar como", f"{empresa}_balance_general.pdf", "PDF Files (*.pdf)")
         if not path:
             return
 
+        from fpdf import FPDF
         pdf = FPDF()
         pdf.add_page()
         pdf.set_font("Arial", 'B', 14)
@@ -265,89 +283,34 @@ class CalculoActivoUI(QWidget):
         pdf.output(path)
         QMessageBox.information(self, "Exportado", f"Balance exportado exitosamente a {path}")
 
-    def on_calcular(self):
+    def on_calcular(self, despues=None):
         fecha_str = self.date_edit.date().toString('yyyy-MM-dd')
-        focal = datetime.fromisoformat(fecha_str)
-        year = focal.year
-
-        # Cálculo de ventas, costo, gastos e ingresos en el año
-        start = f'{year}-01-01'
-        end   = f'{year}-12-31'
-        q = '''
-            SELECT c.monto, c.tipo, c.tipo2, p.fecha
-            FROM cuentas c
-            JOIN partidas p ON c.partida_id = p.id
-            WHERE p.fecha BETWEEN ? AND ?
-        '''
-        ventas = costo = gastos = ingresos = 0.0
-        self.cursor.execute(q, (start, end))
-        for amt, typ, t2, dt in self.cursor.fetchall():
-            sign = -amt if typ.lower() == 'debe' else amt if 'venta' in t2.lower() or 'gasto' in t2.lower() else amt
-            tl = t2.lower()
-            if 'ventas' in tl:
-                ventas += sign
-            elif 'costo de venta' in tl:
-                costo += sign
-            elif 'gasto' in tl:
-                gastos += (amt if typ.lower() == 'debe' else -amt)
-            elif 'ingreso' in tl:
-                ingresos += sign
-
-        raw_uti = ventas + costo - gastos + ingresos
-        utilidad_neta = raw_uti - raw_uti * 0.25 if raw_uti > 0 else raw_uti
-
-        # Totales por sección
-        totals = {
-            'AC': {c: 0.0 for c in CATEGORY_CURRENT},
-            'ANC': {c: 0.0 for c in CATEGORY_NON_CURRENT},
-            'PC': {c: 0.0 for c in CATEGORY_LIAB_CURRENT},
-            'PNC': {c: 0.0 for c in CATEGORY_LIAB_NON_CURRENT},
-            'EQ': {c: 0.0 for c in CATEGORY_EQUITY}
-        }
-
-        q2 = '''
-            SELECT c.cuenta, c.monto, c.tipo, p.fecha, c.tipo2
-            FROM cuentas c
-            JOIN partidas p ON c.partida_id = p.id
-            WHERE p.fecha <= ?
-        '''
-        self.cursor.execute(q2, (fecha_str,))
-        for name, amt, typ, dt, t2 in self.cursor.fetchall():
-            try:
-                mov_date = datetime.fromisoformat(dt)
-            except ValueError:
-                continue
-            if mov_date > focal:
-                continue
-            sign = amt if typ.lower() == 'debe' else -amt
-            tl = t2.lower()
-            dias = (focal - mov_date).days
-            nm = name.lower()
-
-            if tl == 'activo':
-                nm = name.lower()
-                if any(palabra in nm for palabra in ['vehiculos', 'vehículo', 'edificios', 'edificio', 'maquinaria']):
-                    sec, cat = 'ANC', 'Otras cuentas'
-                else:
-                    sec, cat = ('AC', self.classify(name, CATEGORY_CURRENT, 'AC')[1]) if dias <= 365 else ('ANC', 'Otras cuentas')
-            elif tl == 'pasivo':
-                sec, cat = self.classify(name, CATEGORY_LIAB_CURRENT, 'PC') if dias <= 365 else self.classify(name, CATEGORY_LIAB_NON_CURRENT, 'PNC')
-            elif tl == 'patrimonio':
-                if 'capital en acciones' in nm:
-                    cat = 'Capital en acciones'
-                elif 'reserva legal' in nm:
-                    cat = 'Reserva Legal'
-                elif 'utilidades acumuladas' in nm:
-                    cat = 'Utilidades acumuladas'
-                elif nm == 'patrimonio':
-                    cat = 'Patrimonio'
-                else:
-                    cat = 'Otro patrimonio'
-                sec = 'EQ'
-            else:
-                continue
-
-            totals[sec][cat] += sign
+        if self.trabajo is not None:
+            self.trabajo.cancelar()
+        self.generacion += 1
+        self.trabajo = trabajos.ejecutar(
+            self, lambda trabajo: (reportes.balance_general(fecha_str),
+                                   reportes.arbol_balance_general(fecha_str)),
+            al_terminar=lambda resultado, generacion=self.generacion:
+                self.mostrar_resultado(generacion, resultado, despues),
+            al_error=lambda mensaje, generacion=self.generacion: self.calculo_fallido(generacion, mensaje),
+            texto="Calculando balance general...")
+
+    def calculo_fallido(self, generacion, mensaje):
+        if generacion != self.generacion:
+            return
+        self.trabajo = None
+        QMessageBox.critical(self, "Error", mensaje)
+
+    def mostrar_resultado(self, generacion, resultado, despues=None):
+        # Un cálculo ya reemplazado (otra fecha) no pinta encima del actual
+        if generacion != self.generacion:
+            return
+        self.trabajo = None
+        resultado, arbol = resultado
+        self.mostrar_arbol(arbol)
+        totals = resultado['secciones']
+        utilidad_neta = resultado['utilidad_neta']
 
         # Poblar tablas y mostrar totales
         sections = [
@@ -367,19 +330,58 @@ class CalculoActivoUI(QWidget):
         last = self.tbl_eq.rowCount() - 1
         self.tbl_eq.setItem(last, 1, QTableWidgetItem(f"Q{utilidad_neta:,.2f}"))
         self.inp_eq.setText(f"Q{utilidad_neta:,.2f}")
+        if despues:
+            despues()
+
+    def mostrar_arbol(self, arbol):
+        # Todos los niveles llegan ya sumados; expandir no consulta la base de datos
+        tablas.llenar_arbol(self.arbol, arbol.hijos, lambda nodo: [nodo.nombre, f"Q{nodo.valores[0]:,.2f}"])
+        self.cambiar_nivel()
+
+    def cambiar_nivel(self):
+        nivel = self.combo_nivel.currentData()
+        self.arbol.collapseAll()
+        if nivel is None:
+            self.arbol.expandAll()
+        elif nivel > 0:
+            self.arbol.expandToDepth(nivel - 1)
+
+    def on_comparar(self):
+        focal = self.date_edit.date().toString('yyyy-MM-dd')
+        cantidad = self.spin_periodos.value()
+        periodicidad = self.combo_periodicidad.currentText()
+        if self.trabajo_comparativo is not None:
+            self.trabajo_comparativo.cancelar()
+        self.generacion_comparativo += 1
+        self.trabajo_comparativo = trabajos.ejecutar(
+            self, lambda trabajo: reportes.balance_general_comparativo(focal, cantidad, periodicidad),
+            al_terminar=lambda comparativo, generacion=self.generacion_comparativo:
+                self.mostrar_comparativo(generacion, comparativo),
+            al_error=lambda mensaje, generacion=self.generacion_comparativo:
+                self.comparativo_fallido(generacion, mensaje),
+            texto="Calculando comparativo...")
+
+    def comparativo_fallido(self, generacion, mensaje):
+        if generacion != self.generacion_comparativo:
+            return
+        self.trabajo_comparativo = None
+        QMessageBox.critical(self, "Error", mensaje)
+
+    def mostrar_comparativo(self, generacion, comparativo):
+        if generacion != self.generacion_comparativo:
+            return
+        self.trabajo_comparativo = None
+        columnas = ['Concepto'] + [p.etiqueta for p in comparativo.periodos] + ['Variación', '%']
+        tbl = self.tbl_comparativo
+        tbl.setColumnCount(len(columnas))
+        tbl.setHorizontalHeaderLabels(columnas)
+        filas = [[concepto] + [f"Q{v:,.2f}" for v in valores + [variacion]] + ['' if pct is None else f"{pct}%"]
+                 for concepto, valores, variacion, pct in comparativo.filas]
+        tablas.llenar_tabla(tbl, filas, alinear_derecha=range(1, len(columnas)))
 
-    def classify(self, name, cat_dict, prefix):
-        nm = name.lower()
-        for cat, keys in cat_dict.items():
-            if any(k in nm for k in keys):
-                return prefix, cat
-        return prefix, list(cat_dict.keys())[0]
-    
     def volver_menu(self):
-        from menu import MenuApp
-        self.menu = MenuApp()
-        self.menu.show()
-        self.close()
+        from menu import volver_al_menu
+        volver_al_menu(self)
     
 
 if __name__ == '__main__':
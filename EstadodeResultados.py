@@ -1,18 +1,15 @@
 import sys
 import os
-import sqlite3
-import pandas as pd
-from datetime import datetime
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QDateEdit, QScrollArea, QLineEdit, QPushButton, QFileDialog, QMessageBox, QInputDialog
+    QDateEdit, QScrollArea, QLineEdit, QPushButton, QFileDialog, QMessageBox, QInputDialog,
+    QComboBox, QSpinBox, QTableWidget
 )
 from PyQt6.QtCore import Qt, QDate
 from PyQt6.QtGui import QFont, QIcon
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+import reportes
+import tablas
+import trabajos
 
 def resource_path(relative_path):
     try:
@@ -48,14 +45,13 @@ class EstadosResultadosUI(QWidget):
         self.setWindowTitle('Estado de Resultados')
         self.setWindowIcon(QIcon(resource_path('icon.ico')))
         self.setMinimumSize(1000, 800)
-        self.init_db()
         self.setup_ui()
         self.result = {}
-
-    def init_db(self):
-        db_path = resource_path('contabilidad.db')
-        self.conn = sqlite3.connect(db_path)
-        self.cursor = self.conn.cursor()
+        self.trabajo = None
+        self.trabajo_comparativo = None
+        # Suben con cada cálculo: el resultado o error de uno reemplazado se descarta
+        self.generacion = 0
+        self.generacion_comparativo = 0
 
     def setup_ui(self):
         scroll = QScrollArea()
@@ -117,63 +113,96 @@ class EstadosResultadosUI(QWidget):
             main.addLayout(h)
             self.widgets[title] = inp
 
+        # Comparativo: varios periodos lado a lado con la variación del último
+        cmp_lbl = QLabel('Comparativo')
+        cmp_lbl.setFont(QFont('Segoe UI', 13, QFont.Weight.Bold))
+        main.addWidget(cmp_lbl)
+        cmp = QHBoxLayout()
+        self.combo_periodicidad = QComboBox()
+        self.combo_periodicidad.addItems(reportes.PERIODICIDADES)
+        self.spin_periodos = QSpinBox()
+        self.spin_periodos.setRange(2, 24)
+        self.spin_periodos.setValue(3)
+        btn_comparar = ModernButton('Comparar')
+        btn_comparar.clicked.connect(self.on_comparar)
+        cmp.addWidget(QLabel('Periodicidad:'))
+        cmp.addWidget(self.combo_periodicidad)
+        cmp.addWidget(QLabel('Periodos:'))
+        cmp.addWidget(self.spin_periodos)
+        cmp.addWidget(btn_comparar)
+        cmp.addStretch()
+        main.addLayout(cmp)
+        self.tabla_comparativo = QTableWidget()
+        self.tabla_comparativo.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.tabla_comparativo.verticalHeader().setVisible(False)
+        self.tabla_comparativo.setMinimumHeight(320)
+        main.addWidget(self.tabla_comparativo)
+
         scroll.setWidget(container)
         layout = QVBoxLayout(self)
         layout.addWidget(scroll)
         self.setLayout(layout)
 
-    def sum_accounts(self, types, start, end):
-        placeholders = ','.join('?' * len(types))
-        q = f"""
-            SELECT c.monto, c.tipo, c.tipo2, p.fecha
-            FROM cuentas c
-            JOIN partidas p ON c.partida_id = p.id
-            WHERE c.tipo2 IN ({placeholders}) AND p.fecha BETWEEN ? AND ?
-        """
-        params = types + [start, end]
-        self.cursor.execute(q, params)
-        total = 0.0
-        for amt, typ, t2, dt in self.cursor.fetchall():
-            if amt is None:
-                continue
-            sign = -amt if typ.lower() == 'debe' else amt
-            if 'ingreso' in t2.lower():
-                sign = amt if typ.lower() == 'debe' else -amt
-            total += sign
-        return total
-
     def on_calcular(self):
         hasta = self.date_edit.date().toString('yyyy-MM-dd')
-        year = int(hasta[:4])
-        start, end = f'{year}-01-01', f'{year}-12-31'
+        if self.trabajo is not None:
+            self.trabajo.cancelar()
+        self.generacion += 1
+        self.trabajo = trabajos.ejecutar(
+            self, lambda trabajo: reportes.estado_resultados(hasta),
+            al_terminar=lambda resultado, generacion=self.generacion: self.mostrar_resultado(generacion, resultado),
+            al_error=lambda mensaje, generacion=self.generacion: self.calculo_fallido(generacion, mensaje),
+            texto="Calculando estado de resultados...")
 
-        v = self.sum_accounts(['Ventas'], start, end)
-        c = self.sum_accounts(['Costo de Venta'], start, end)
-        g = self.sum_accounts(['Gasto'], start, end)
-        o = self.sum_accounts(['Ingreso'], start, end)
-
-        util_marg = v + c
-        perd_oper = util_marg + g
-        perd_antes_isr = perd_oper + o
-        impuesto = perd_antes_isr * 0.25 if perd_antes_isr > 0 else 0.0
-        neto = perd_antes_isr - impuesto
-
-        self.result = {
-            'Ventas': v,
-            'Costo de Venta': c,
-            'Gastos de Operación': g,
-            'Otros Ingresos y Gastos - Neto': o,
-            'Utilidad Marginal': util_marg,
-            'Pérdida en Operación': perd_oper,
-            'Pérdida antes del ISR': perd_antes_isr,
-            'Impuesto Sobre la Renta': impuesto,
-            'Utilidad (Pérdida) Neta': neto
-        }
+    def calculo_fallido(self, generacion, mensaje):
+        if generacion != self.generacion:
+            return
+        self.trabajo = None
+        QMessageBox.critical(self, "Error", mensaje)
 
+    def mostrar_resultado(self, generacion, resultado):
+        # Un cálculo ya reemplazado (otra fecha) no pinta encima del actual
+        if generacion != self.generacion:
+            return
+        self.trabajo = None
+        self.result = resultado
         fmt = lambda x: f"Q{x:,.2f}"
         for key, value in self.result.items():
             self.widgets[key].setText(fmt(value))
 
+    def on_comparar(self):
+        hasta = self.date_edit.date().toString('yyyy-MM-dd')
+        cantidad = self.spin_periodos.value()
+        periodicidad = self.combo_periodicidad.currentText()
+        if self.trabajo_comparativo is not None:
+            self.trabajo_comparativo.cancelar()
+        self.generacion_comparativo += 1
+        self.trabajo_comparativo = trabajos.ejecutar(
+            self, lambda trabajo: reportes.estado_resultados_comparativo(hasta, cantidad, periodicidad),
+            al_terminar=lambda comparativo, generacion=self.generacion_comparativo:
+                self.mostrar_comparativo(generacion, comparativo),
+            al_error=lambda mensaje, generacion=self.generacion_comparativo:
+                self.comparativo_fallido(generacion, mensaje),
+            texto="Calculando comparativo...")
+
+    def comparativo_fallido(self, generacion, mensaje):
+        if generacion != self.generacion_comparativo:
+            return
+        self.trabajo_comparativo = None
+        QMessageBox.critical(self, "Error", mensaje)
+
+    def mostrar_comparativo(self, generacion, comparativo):
+        if generacion != self.generacion_comparativo:
+            return
+        self.trabajo_comparativo = None
+        columnas = ['Concepto'] + [p.etiqueta for p in comparativo.periodos] + ['Variación', '%']
+        tabla = self.tabla_comparativo
+        tabla.setColumnCount(len(columnas))
+        tabla.setHorizontalHeaderLabels(columnas)
+        filas = [[concepto] + [f"Q{v:,.2f}" for v in valores + [variacion]] + ['' if pct is None else f"{pct}%"]
+                 for concepto, valores, variacion, pct in comparativo.filas]
+        tablas.llenar_tabla(tabla, filas, alinear_derecha=range(1, len(columnas)))
+
     def export_excel(self):
         if not self.result:
             QMessageBox.warning(self, 'Error', 'Primero calcule el estado de resultados.')
@@ -184,6 +213,8 @@ class EstadosResultadosUI(QWidget):
         hasta = self.date_edit.date().toString('yyyy-MM-dd')
         year = int(hasta[:4])
         periodo = f'Del 1 de enero al 31 de diciembre del año {year}'
+        # pandas y reportlab tardan en importarse: solo se cargan al exportar
+        import pandas as pd
         df = pd.DataFrame([self.result])
         path, _ = QFileDialog.getSaveFileName(self, 'Guardar Excel', '', 'Excel Files (*.xlsx)')
         if path:
@@ -224,6 +255,9 @@ class EstadosResultadosUI(QWidget):
             if not path.lower().endswith('.pdf'):
                 path += '.pdf'
             try:
+                from reportlab.lib.pagesizes import letter
+                from reportlab.lib.styles import getSampleStyleSheet
+                from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
                 doc = SimpleDocTemplate(path, pagesize=letter)
                 styles = getSampleStyleSheet()
                 story = [
@@ -250,10 +284,8 @@ class EstadosResultadosUI(QWidget):
                 QMessageBox.critical(self, 'Error', f'No se pudo exportar PDF:\n{e}')
 
     def volver_menu(self):
-        from menu import MenuApp
-        self.menu = MenuApp()
-        self.menu.show()
-        self.close()
+        from menu import volver_al_menu
+        volver_al_menu(self)
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
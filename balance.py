@@ -1,11 +1,13 @@
 import sys
-import sqlite3
 import os
 from PyQt6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, 
-                             QLabel, QTableWidget, QTableWidgetItem, QDateEdit, 
-                             QMessageBox, QHeaderView, QPushButton)
+                             QLabel, QTreeWidget, QTreeWidgetItem, QDateEdit, 
+                             QMessageBox, QHeaderView, QPushButton, QComboBox)
 from PyQt6.QtGui import QIcon, QFont
 from PyQt6.QtCore import Qt, QDate
+import saldos_incrementales
+import tablas
+import trabajos
 
 def resource_path(relative_path):
     try:
@@ -38,86 +40,77 @@ class BalanceGeneral(QWidget):
     def __init__(self, parent=None):
         super().__init__()
         self.parent = parent
-        self.init_db()
         self.setWindowTitle("Balance General")
         self.setWindowIcon(QIcon(resource_path("icon.ico")))
         self.setMinimumSize(1200, 800)
+        self.trabajo = None
+        # Sube con cada cálculo: el resultado o error de uno reemplazado se descarta
+        self.generacion = 0
+        # Filas mostradas ({ruta: (ítem, nodo)}) y la fila del total, para
+        # cambiar solo las que cambian al recalcular
+        self.indice = None
+        self.item_total = None
         self.setup_ui()
     
-    def init_db(self):
-        """Solo conexión a la base de datos existente"""
-        db_path = resource_path("contabilidad.db")
-        self.conn = sqlite3.connect(db_path)
-        self.cursor = self.conn.cursor()
-    
     def calcular_balance(self):
         fecha_seleccionada = self.date_edit.date()
         mes = fecha_seleccionada.month()
         año = fecha_seleccionada.year()
-        
-        try:
-            fecha_inicio = QDate(año, mes, 1)
-            fecha_fin = fecha_inicio.addMonths(1).addDays(-1)
-            fecha_inicio_plus_1 = fecha_inicio.addDays(1)
-            
-            # Consulta saldo inicial
-            self.cursor.execute("""
-                SELECT c.cuenta, 
-                       SUM(CASE WHEN c.tipo = 'Debe' THEN c.monto ELSE -c.monto END)
-                FROM cuentas c
-                JOIN partidas p ON c.partida_id = p.id
-                WHERE p.fecha = ?
-                GROUP BY c.cuenta
-            """, (fecha_inicio.toString(Qt.DateFormat.ISODate),))
-            
-            saldo_inicial = {row[0]: row[1] for row in self.cursor.fetchall()}
-            
-            # Consulta movimientos
-            self.cursor.execute("""
-                SELECT c.cuenta, 
-                       SUM(CASE WHEN c.tipo = 'Debe' THEN c.monto ELSE 0 END),
-                       SUM(CASE WHEN c.tipo = 'Haber' THEN c.monto ELSE 0 END)
-                FROM cuentas c
-                JOIN partidas p ON c.partida_id = p.id
-                WHERE p.fecha BETWEEN ? AND ?
-                GROUP BY c.cuenta
-            """, (
-                fecha_inicio_plus_1.toString(Qt.DateFormat.ISODate), 
-                fecha_fin.toString(Qt.DateFormat.ISODate)
-            ))
-            
-            movimientos = {row[0]: (row[1], row[2]) for row in self.cursor.fetchall()}
-            
-            self.tabla.setRowCount(0)
-            
-            # Combinar resultados
-            todas_cuentas = set(saldo_inicial.keys()).union(set(movimientos.keys()))
-            
-            if not todas_cuentas:
-                QMessageBox.information(self, "Información", "No hay movimientos en el periodo seleccionado")
+        if self.trabajo is not None:
+            self.trabajo.cancelar()
+        self.generacion += 1
+        self.trabajo = trabajos.ejecutar(
+            self, lambda trabajo: saldos_incrementales.arbol_balance_saldos(año, mes),
+            al_terminar=lambda arbol, generacion=self.generacion: self.mostrar_balance(generacion, arbol),
+            al_error=lambda e, generacion=self.generacion: self.balance_fallido(generacion, e),
+            texto="Calculando balance de saldos...")
+
+    def balance_fallido(self, generacion, mensaje):
+        if generacion != self.generacion:
+            return
+        self.trabajo = None
+        QMessageBox.critical(self, "Error", f"Error en la base de datos: {mensaje}")
+
+    def mostrar_balance(self, generacion, arbol):
+        # Un cálculo ya reemplazado (otro mes) no pinta encima del actual
+        if generacion != self.generacion:
+            return
+        self.trabajo = None
+        if not arbol.hijos:
+            self.tabla.clear()
+            self.indice = self.item_total = None
+            QMessageBox.information(self, "Información", "No hay movimientos en el periodo seleccionado")
+            return
+
+        # El árbol llega con los totales de todos los niveles: expandir o
+        # contraer no vuelve a consultar la base de datos
+        textos = lambda nodo: [nodo.nombre] + [f"Q{v:.2f}" for v in nodo.valores]
+        if self.indice is not None:
+            actualizado = tablas.actualizar_arbol(self.tabla, self.indice, arbol.hijos, textos)
+            if actualizado is not None:
+                self.indice = actualizado[0]
+                for col, texto in enumerate(textos(arbol)[1:], 1):
+                    self.item_total.setText(col, texto)
                 return
-                
-            for cuenta in todas_cuentas:
-                row = self.tabla.rowCount()
-                self.tabla.insertRow(row)
-                
-                inicial = saldo_inicial.get(cuenta, 0.0)
-                debe, haber = movimientos.get(cuenta, (0.0, 0.0))
-                saldo_actual = inicial + (debe - haber)
-                
-                self.tabla.setItem(row, 0, QTableWidgetItem(cuenta))
-                self.tabla.setItem(row, 1, QTableWidgetItem(f"Q{inicial:.2f}"))
-                self.tabla.setItem(row, 2, QTableWidgetItem(f"Q{debe:.2f}"))
-                self.tabla.setItem(row, 3, QTableWidgetItem(f"Q{haber:.2f}"))
-                self.tabla.setItem(row, 4, QTableWidgetItem(f"Q{saldo_actual:.2f}"))
-            
-            self.tabla.resizeColumnsToContents()
-            
-        except sqlite3.Error as e:
-            QMessageBox.critical(self, "Error", f"Error en la base de datos: {str(e)}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error inesperado: {str(e)}")
-    
+        superiores = tablas.llenar_arbol(self.tabla, arbol.hijos, textos)
+        self.indice = tablas.indice_arbol(superiores, arbol.hijos)
+        self.item_total = QTreeWidgetItem(self.tabla, ["Total"] + textos(arbol)[1:])
+        tablas.negrita(self.item_total)
+        self.cambiar_nivel()
+
+    def actualizar(self):
+        """Al volver a la pantalla recalcula el balance mostrado (solo aplica los cambios del diario)."""
+        if self.indice is not None:
+            self.calcular_balance()
+
+    def cambiar_nivel(self):
+        nivel = self.combo_nivel.currentData()
+        self.tabla.collapseAll()
+        if nivel is None:
+            self.tabla.expandAll()
+        elif nivel > 0:
+            self.tabla.expandToDepth(nivel - 1)
+
     def setup_ui(self):
         main_layout = QVBoxLayout()
         
@@ -138,36 +131,42 @@ class BalanceGeneral(QWidget):
         self.date_edit = QDateEdit(calendarPopup=True)
         self.date_edit.setDate(QDate.currentDate())
         self.date_edit.setDisplayFormat("MM/yyyy")
+        self.date_edit.dateChanged.connect(self.actualizar)
         self.btn_calcular = ModernButton("Generar Balance")
         self.btn_calcular.clicked.connect(self.calcular_balance)
         
         fecha_layout.addWidget(QLabel("Seleccione el mes:"))
         fecha_layout.addWidget(self.date_edit)
         fecha_layout.addWidget(self.btn_calcular)
+        self.combo_nivel = QComboBox()
+        for texto, nivel in (("Tipos", 0), ("Grupos", 1), ("Cuentas", None)):
+            self.combo_nivel.addItem(texto, nivel)
+        self.combo_nivel.setCurrentIndex(2)
+        self.combo_nivel.currentIndexChanged.connect(self.cambiar_nivel)
+        fecha_layout.addWidget(QLabel("Mostrar hasta:"))
+        fecha_layout.addWidget(self.combo_nivel)
         fecha_layout.addStretch()
         main_layout.addLayout(fecha_layout)
         
-        # Tabla de resultados
-        self.tabla = QTableWidget()
+        # Árbol de resultados: tipo > grupos del catálogo > cuenta
+        self.tabla = QTreeWidget()
         self.tabla.setColumnCount(5)
-        self.tabla.setHorizontalHeaderLabels([
+        self.tabla.setHeaderLabels([
             "Cuenta", 
-            "Saldo Inicial (1er día)", 
-            "Total Debe (resto mes)", 
-            "Total Haber (resto mes)", 
+            "Saldo Inicial (cierre mes anterior)", 
+            "Total Debe (mes)", 
+            "Total Haber (mes)", 
             "Saldo Actual"
         ])
-        self.tabla.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.tabla.header().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         main_layout.addWidget(self.tabla)
         
         self.setLayout(main_layout)
     
     def volver_menu(self):
-        # Cierra la ventana actual e importa la ventana del menú principal
-        from menu import MenuApp
-        self.menu = MenuApp()
-        self.menu.show()
-        self.close()
+        # Vuelve a la página del menú; la pantalla queda viva con su estado
+        from menu import volver_al_menu
+        volver_al_menu(self)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,1107 @@
+"""Acceso a datos compartido por todas las pantallas.
+
+Una conexión por hilo (reutilizada por todo el proceso), en modo WAL y con
+caché de sentencias preparadas. Las pantallas no escriben SQL: llaman a las
+funciones de repositorio de este módulo.
+
+Los montos se guardan en centavos enteros (ver dinero.py). Las líneas
+(LineaPartida, LineaMayor, LineaDetalle) traen el monto como Decimal; los
+totales y saldos (sección Saldos) se devuelven en centavos para que los
+reportes sumen enteros.
+"""
+import os
+import random
+import re
+import sys
+import sqlite3
+import threading
+import time
+from calendar import monthrange
+from collections import namedtuple
+from contextlib import contextmanager
+
+from dinero import a_centavos, a_decimal
+from migraciones import aplicar_migraciones
+
+
+def resource_path(relative_path):
+    """Obtiene la ruta absoluta del recurso, compatible con PyInstaller."""
+    try:
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath('.')
+    return os.path.join(base_path, relative_path)
+
+
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",        # 64 MB de páginas en caché
+    "PRAGMA mmap_size=268435456",      # 256 MB mapeados en memoria
+    "PRAGMA busy_timeout=5000",
+]
+SENTENCIAS_EN_CACHE = 256
+# Reintentos de una escritura cuando otra instancia tiene la base bloqueada
+# más allá de busy_timeout; la espera se duplica en cada intento
+REINTENTOS = 5
+ESPERA_INICIAL = 0.05
+
+_ruta = None
+_local = threading.local()
+_migradas = set()
+_lock = threading.Lock()
+
+Partida = namedtuple("Partida", "id fecha correlativo descripcion")
+LineaPartida = namedtuple("LineaPartida", "cuenta monto tipo tipo2")
+LineaMayor = namedtuple("LineaMayor", "cuenta fecha correlativo descripcion tipo monto saldo")
+LineaDetalle = namedtuple("LineaDetalle", "fecha correlativo descripcion cuenta tipo monto")
+Cuenta = namedtuple("Cuenta", "id codigo nombre tipo padre_id corriente")
+FilaDiario = namedtuple("FilaDiario", "id fecha correlativo descripcion cuentas total")
+Cambio = namedtuple("Cambio", "seq operacion tabla registro_id partida_id fecha correlativo descripcion "
+                              "cuenta tipo tipo2 monto momento")
+
+
+def ruta_db():
+    return _ruta or resource_path("contabilidad.db")
+
+
+def configurar(ruta):
+    """Cambia la base de datos del proceso (p. ej. otra empresa) y cierra la conexión actual."""
+    global _ruta
+    cerrar()
+    _ruta = ruta
+
+
+def conexion():
+    """Conexión del hilo actual; se abre, configura y migra la primera vez."""
+    conn = getattr(_local, "conn", None)
+    ruta = ruta_db()
+    if conn is not None and _local.ruta == ruta:
+        return conn
+    if conn is not None:
+        conn.close()
+    conn = sqlite3.connect(ruta, cached_statements=SENTENCIAS_EN_CACHE)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    with _lock:
+        if ruta not in _migradas:
+            aplicar_migraciones(conn)
+            _migradas.add(ruta)
+    _local.conn, _local.ruta = conn, ruta
+    return conn
+
+
+@contextmanager
+def lectura():
+    """Bloque cuyas consultas ven todas la misma foto de la base (una transacción de lectura)."""
+    conn = conexion()
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+
+
+def version_datos():
+    """Número que cambia con cada escritura de datos (de este u otro proceso)."""
+    return conexion().execute("SELECT valor FROM version_datos WHERE id = 1").fetchone()[0]
+
+
+def _nueva_version(conn):
+    # Crece siempre y sigue al reloj (microsegundos): una copia de respaldo
+    # restaurada no repite, al escribir, una versión ya usada con otros datos
+    conn.execute("""
+        UPDATE version_datos
+        SET valor = max(valor + 1, CAST((julianday('now') - 2440587.5) * 86400000000 AS INTEGER))
+        WHERE id = 1""")
+
+
+def cerrar():
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+def _bloqueada(error):
+    mensaje = str(error).lower()
+    return "locked" in mensaje or "busy" in mensaje
+
+
+def _con_reintentos(funcion):
+    """Repite una escritura si la base sigue ocupada por otro proceso.
+
+    La función debe hacer rollback al fallar (todas las escrituras de este
+    módulo lo hacen), así que cada intento empieza una transacción limpia.
+    """
+    def envoltura(*args, **kwargs):
+        espera = ESPERA_INICIAL
+        for intento in range(REINTENTOS + 1):
+            try:
+                return funcion(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if intento == REINTENTOS or not _bloqueada(e):
+                    raise
+            # Espera con algo de azar para que los procesos no reintenten a la vez
+            time.sleep(espera * (1 + random.random()))
+            espera *= 2
+    envoltura.__name__ = funcion.__name__
+    envoltura.__doc__ = funcion.__doc__
+    return envoltura
+
+
+# --- Partidas ---------------------------------------------------------------
+
+TIPOS_CUENTA = ["Activo", "Pasivo", "Patrimonio", "Ingreso", "Gasto", "Costo de Venta", "Ventas"]
+TIPOS_MOVIMIENTO = ["Debe", "Haber"]
+
+
+def validar_partida(fecha, descripcion, entradas):
+    """Reglas de una partida antes de guardarla. Devuelve el mensaje de error o None.
+
+    Los montos de 'entradas' están en quetzales; el balance se compara en
+    centavos, sin tolerancia.
+    """
+    if not fecha:
+        return "Fecha inválida."
+    cierre = fecha_cierre()
+    if cierre and fecha <= cierre:
+        return f"El periodo está cerrado hasta {cierre}."
+    if not descripcion:
+        return "Descripción vacía."
+    debe = haber = 0
+    for i, (cuenta, monto, tipo, tipo2) in enumerate(entradas, start=1):
+        if not cuenta:
+            return f"Fila {i} incompleta."
+        try:
+            centavos = a_centavos(monto)
+        except ValueError:
+            return f"Fila {i}: monto inválido."
+        if centavos <= 0:
+            return f"Fila {i}: monto debe >0."
+        if tipo not in TIPOS_MOVIMIENTO:
+            return f"Fila {i}: tipo debe ser Debe o Haber."
+        if tipo2 not in TIPOS_CUENTA:
+            return f"Fila {i}: clasificación '{tipo2}' inválida."
+        if tipo == 'Debe':
+            debe += centavos
+        else:
+            haber += centavos
+    if len(entradas) < 2:
+        return "Mínimo 2 cuentas."
+    if debe != haber:
+        return "Debe/Haber no balancean."
+    return None
+
+
+def buscar_partida(correlativo):
+    fila = conexion().execute(
+        "SELECT id, fecha, correlativo, descripcion FROM partidas WHERE correlativo=?",
+        (correlativo,)).fetchone()
+    return Partida(*fila) if fila else None
+
+
+def lineas_partida(partida_id):
+    filas = conexion().execute(
+        "SELECT cuenta, monto, tipo, tipo2 FROM cuentas WHERE partida_id=? ORDER BY id",
+        (partida_id,)).fetchall()
+    return [LineaPartida(c, a_decimal(m), t, t2) for c, m, t, t2 in filas]
+
+
+def consulta_fts(texto):
+    """Texto del usuario -> consulta FTS5: todas las palabras, cada una como prefijo.
+
+    'caja chi' -> '"caja"* "chi"*'. Devuelve '' si no hay palabras.
+    """
+    return " ".join(f'"{palabra}"*' for palabra in re.findall(r"\w+", texto))
+
+
+def pagina_diario(desde=None, hasta=None, texto="", cuenta=None, monto_min=None, monto_max=None,
+                  descendente=False, despues=None, limite=200):
+    """Una página del libro diario (una fila por partida), paginada por (fecha, correlativo).
+
+    'texto' busca con FTS5 en la descripción de la partida o en el nombre de
+    alguna de sus cuentas; 'cuenta' exige una línea de esa cuenta y los montos
+    (quetzales) una línea con monto en ese rango; 'total' es la suma del Debe.
+    'despues' es la llave de la última fila de la página anterior (None para
+    la primera). Devuelve (filas, llave de la última fila).
+    """
+    conn = conexion()
+    op, direccion = ("<", "DESC") if descendente else (">", "ASC")
+    condiciones, params = [], []
+    if desde:
+        condiciones.append("p.fecha >= ?")
+        params.append(desde)
+    if hasta:
+        condiciones.append("p.fecha <= ?")
+        params.append(hasta)
+    # Con muchas coincidencias (una palabra común, la cuenta de caja) es más
+    # barato recorrer el índice de fecha y probar cada partida, cortando al
+    # llenar la página, que ordenar todas las coincidencias; con pocas, al revés
+    total = conn.execute("SELECT COALESCE(MAX(id), 0) FROM partidas").fetchone()[0]
+
+    def columna_id(coincidencias):
+        return "+p.id" if coincidencias * 100 > total else "p.id"
+
+    consulta = consulta_fts(texto or "")
+    if consulta:
+        # Las cuentas que coinciden salen del índice del catálogo (pocas filas)
+        ids = [f[0] for f in conn.execute(
+            "SELECT rowid FROM catalogo_fts WHERE catalogo_fts MATCH ?", (consulta,))]
+        marcas = ",".join("?" * len(ids))
+        por_cuenta = f" UNION SELECT partida_id FROM cuentas WHERE cuenta_id IN ({marcas})" if ids else ""
+        coincidencias = conn.execute(
+            "SELECT count(*) FROM partidas_fts WHERE partidas_fts MATCH ?", (consulta,)).fetchone()[0]
+        if ids:
+            coincidencias += conn.execute(
+                f"SELECT count(*) FROM cuentas WHERE cuenta_id IN ({marcas})", ids).fetchone()[0]
+        condiciones.append(f"{columna_id(coincidencias)} IN "
+                           f"(SELECT rowid FROM partidas_fts WHERE partidas_fts MATCH ?{por_cuenta})")
+        params.append(consulta)
+        params.extend(ids)
+    if cuenta:
+        ids = [f[0] for f in conn.execute("SELECT id FROM catalogo WHERE nombre = ?", (cuenta,))]
+        if not ids:
+            return [], despues
+        marcas = ",".join("?" * len(ids))
+        coincidencias = conn.execute(
+            f"SELECT count(*) FROM cuentas WHERE cuenta_id IN ({marcas})", ids).fetchone()[0]
+        condiciones.append(f"{columna_id(coincidencias)} IN "
+                           f"(SELECT partida_id FROM cuentas WHERE cuenta_id IN ({marcas}))")
+        params.extend(ids)
+    if monto_min is not None or monto_max is not None:
+        condiciones.append("p.id IN (SELECT partida_id FROM cuentas WHERE monto BETWEEN ? AND ?)")
+        params.append(a_centavos(monto_min) if monto_min is not None else 0)
+        params.append(a_centavos(monto_max) if monto_max is not None else 2 ** 63 - 1)
+    if despues is not None:
+        condiciones.append(f"(p.fecha, p.correlativo) {op} (?, ?)")
+        params.extend(despues)
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    filas = conn.execute(f"""
+        SELECT p.id, p.fecha, p.correlativo, p.descripcion,
+               (SELECT group_concat(c.cuenta, ', ') FROM cuentas c WHERE c.partida_id = p.id),
+               (SELECT COALESCE(SUM(c.monto), 0) FROM cuentas c
+                WHERE c.partida_id = p.id AND c.tipo = 'Debe')
+        FROM partidas p
+        {where}
+        ORDER BY p.fecha {direccion}, p.correlativo {direccion}
+        LIMIT ?
+    """, params + [limite]).fetchall()
+    if not filas:
+        return [], despues
+    llave = (filas[-1][1], filas[-1][2])
+    return [FilaDiario(*f[:4], f[4] or "", a_decimal(f[5])) for f in filas], llave
+
+
+def guardar_partida(fecha, descripcion, entradas):
+    """Inserta la partida y sus líneas en una sola transacción. Devuelve el correlativo."""
+    return guardar_partidas_lote([(fecha, descripcion, entradas)])[0]
+
+
+def _siguientes_correlativos(conn, cantidad):
+    """Reserva 'cantidad' correlativos en secuencias; llamar dentro de BEGIN IMMEDIATE.
+
+    Arranca desde el mayor correlativo existente si es más alto (partidas
+    escritas por una versión anterior del programa sobre la misma base).
+    Devuelve el primero del bloque.
+    """
+    ultimo = conn.execute("""
+        UPDATE secuencias
+        SET valor = max(valor, COALESCE((SELECT MAX(correlativo) FROM partidas), 0)) + ?
+        WHERE nombre = 'correlativo'
+        RETURNING valor""", (cantidad,)).fetchone()[0]
+    return ultimo - cantidad + 1
+
+
+@_con_reintentos
+def reservar_correlativos(cantidad):
+    """Aparta un bloque de correlativos consecutivos para una importación masiva.
+
+    Devuelve range con los números; se usan con guardar_partidas_lote(...,
+    correlativos=...). Los que no se usen quedan como saltos en la numeración.
+    """
+    conn = conexion()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        primero = _siguientes_correlativos(conn, cantidad)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return range(primero, primero + cantidad)
+
+
+@_con_reintentos
+def guardar_partidas_lote(partidas, correlativos=None):
+    """Inserta muchas partidas [(fecha, descripcion, entradas)] en una sola transacción.
+
+    Los correlativos salen de la tabla secuencias dentro de la misma
+    transacción (BEGIN IMMEDIATE), así que dos instancias que guardan a la vez
+    nunca reciben el mismo número. 'correlativos' permite usar un bloque ya
+    apartado con reservar_correlativos. Las líneas se escriben con
+    executemany. Los montos llegan en quetzales y se guardan en centavos.
+    Devuelve la lista de correlativos asignados.
+    """
+    conn = conexion()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        _verificar_abierto(conn, [fecha for fecha, _, _ in partidas])
+        if correlativos is None:
+            primero = _siguientes_correlativos(conn, len(partidas))
+            correlativos = range(primero, primero + len(partidas))
+        correlativos = list(correlativos)[:len(partidas)]
+        if len(correlativos) < len(partidas):
+            raise ValueError("No hay suficientes correlativos reservados para el lote.")
+        conn.executemany(
+            "INSERT INTO partidas(fecha, correlativo, descripcion) VALUES(?,?,?)",
+            [(fecha, corr, desc) for corr, (fecha, desc, _) in zip(correlativos, partidas)])
+        ids = dict(conn.execute(
+            "SELECT correlativo, id FROM partidas WHERE correlativo BETWEEN ? AND ?",
+            (min(correlativos, default=0), max(correlativos, default=0))))
+        catalogo = _ids_catalogo(conn, [(c, t2) for _, _, entradas in partidas for c, _, _, t2 in entradas])
+        lineas, deltas = [], {}
+        for corr, (fecha, _, entradas) in zip(correlativos, partidas):
+            cuenta_ids = [catalogo[(c, t2)] for c, _, _, t2 in entradas]
+            centavos = [a_centavos(m) for _, m, _, _ in entradas]
+            lineas.extend((ids[corr], cid, nombre, m, t, t2)
+                          for (cid, nombre), m, (_, _, t, t2) in zip(cuenta_ids, centavos, entradas))
+            _deltas_saldos(fecha, [(cid, m, t) for (cid, _), m, (_, _, t, _)
+                                   in zip(cuenta_ids, centavos, entradas)], 1, deltas)
+        conn.executemany(
+            "INSERT INTO cuentas(partida_id, cuenta_id, cuenta, monto, tipo, tipo2) VALUES(?,?,?,?,?,?)",
+            lineas)
+        _aplicar_saldos(conn, deltas)
+        _nueva_version(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return correlativos
+
+
+@_con_reintentos
+def eliminar_partida(partida_id):
+    conn = conexion()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        fila = conn.execute("SELECT fecha FROM partidas WHERE id=?", (partida_id,)).fetchone()
+        if fila:
+            _verificar_abierto(conn, [fila[0]])
+        lineas = conn.execute(
+            "SELECT cuenta_id, monto, tipo FROM cuentas WHERE partida_id=?", (partida_id,)).fetchall()
+        conn.execute("DELETE FROM cuentas WHERE partida_id=?", (partida_id,))
+        conn.execute("DELETE FROM partidas WHERE id=?", (partida_id,))
+        if fila:
+            _actualizar_saldos(conn, fila[0], lineas, -1)
+        _nueva_version(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _diferencias_lineas(viejas, nuevas):
+    """Empareja las líneas guardadas [(id, cuenta_id, monto, tipo)] con las nuevas [(cuenta_id, monto, tipo)].
+
+    Devuelve (actualizar [(id, nueva)], insertar [nueva], eliminar [id]). Las
+    líneas idénticas no se tocan; de las demás se reutiliza primero la de la
+    misma cuenta y después cualquiera, en orden, para escribir lo mínimo.
+    """
+    pendientes = list(viejas)
+    sobrantes = []
+    for nueva in nuevas:
+        igual = next((v for v in pendientes if v[1:] == nueva), None)
+        if igual is None:
+            sobrantes.append(nueva)
+        else:
+            pendientes.remove(igual)
+    actualizar, insertar = [], []
+    for nueva in sobrantes:
+        vieja = next((v for v in pendientes if v[1] == nueva[0]), pendientes[0] if pendientes else None)
+        if vieja is None:
+            insertar.append(nueva)
+        else:
+            pendientes.remove(vieja)
+            actualizar.append((vieja[0], nueva))
+    return actualizar, insertar, [v[0] for v in pendientes]
+
+
+DiferenciasPartida = namedtuple("DiferenciasPartida", "insertadas actualizadas eliminadas encabezado")
+
+
+@_con_reintentos
+def actualizar_partida(partida_id, fecha, descripcion, entradas):
+    """Guarda los cambios de una partida existente sin cambiar su correlativo.
+
+    Compara 'entradas' (como en guardar_partida) con las líneas guardadas y
+    escribe solo los INSERT, UPDATE y DELETE necesarios, en una transacción;
+    saldos_diarios recibe solo la diferencia. La fecha vieja y la nueva deben
+    estar en periodos abiertos. Cada línea tocada queda en el registro de
+    cambios (baja y alta), así que quien lo sigue se actualiza con lo mínimo.
+    Devuelve DiferenciasPartida con lo que se escribió.
+    """
+    conn = conexion()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        fila = conn.execute("SELECT fecha, descripcion FROM partidas WHERE id=?", (partida_id,)).fetchone()
+        if fila is None:
+            raise ValueError("La partida no existe.")
+        fecha_vieja, descripcion_vieja = fila
+        _verificar_abierto(conn, [fecha_vieja, fecha])
+        viejas = conn.execute(
+            "SELECT id, cuenta_id, monto, tipo FROM cuentas WHERE partida_id=? ORDER BY id",
+            (partida_id,)).fetchall()
+        catalogo = _ids_catalogo(conn, [(c, t2) for c, _, _, t2 in entradas])
+        nuevas = [(catalogo[(c, t2)][0], a_centavos(m), t) for c, m, t, t2 in entradas]
+        nombres = {catalogo[(c, t2)][0]: (catalogo[(c, t2)][1], t2) for c, _, _, t2 in entradas}
+        actualizar, insertar, eliminar = _diferencias_lineas(viejas, nuevas)
+
+        encabezado = (fecha, descripcion) != (fecha_vieja, descripcion_vieja)
+        if encabezado:
+            conn.execute("UPDATE partidas SET fecha=?, descripcion=? WHERE id=?",
+                         (fecha, descripcion, partida_id))
+        conn.executemany(
+            "UPDATE cuentas SET cuenta_id=?, cuenta=?, monto=?, tipo=?, tipo2=? WHERE id=?",
+            [(cid, nombres[cid][0], m, t, nombres[cid][1], linea_id)
+             for linea_id, (cid, m, t) in actualizar])
+        conn.executemany(
+            "INSERT INTO cuentas(partida_id, cuenta_id, cuenta, monto, tipo, tipo2) VALUES(?,?,?,?,?,?)",
+            [(partida_id, cid, nombres[cid][0], m, t, nombres[cid][1]) for cid, m, t in insertar])
+        conn.executemany("DELETE FROM cuentas WHERE id=?", [(linea_id,) for linea_id in eliminar])
+
+        # Si cambió la fecha se mueven todas las líneas; si no, solo las que cambiaron
+        if fecha != fecha_vieja:
+            salen, entran = [v[1:] for v in viejas], nuevas
+        else:
+            tocadas = {linea_id for linea_id, _ in actualizar} | set(eliminar)
+            salen = [v[1:] for v in viejas if v[0] in tocadas]
+            entran = [nueva for _, nueva in actualizar] + insertar
+        deltas = _deltas_saldos(fecha_vieja, salen, -1)
+        _deltas_saldos(fecha, entran, 1, deltas)
+        deltas = {clave: mov for clave, mov in deltas.items() if mov != (0, 0)}
+        if deltas:
+            _aplicar_saldos(conn, deltas, limpiar=True)
+        if encabezado or actualizar or insertar or eliminar:
+            _nueva_version(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return DiferenciasPartida(len(insertar), len(actualizar), len(eliminar), encabezado)
+
+
+# --- Cuentas y libro mayor --------------------------------------------------
+
+# Primer dígito del código de cuenta según el tipo (ver migración 5)
+PREFIJOS_CATALOGO = {"Activo": "1", "Pasivo": "2", "Patrimonio": "3", "Ventas": "4",
+                     "Ingreso": "5", "Costo de Venta": "6", "Gasto": "7"}
+
+
+def catalogo_cuentas(tipo=None):
+    sql = "SELECT id, codigo, nombre, tipo, padre_id, corriente FROM catalogo"
+    params = ()
+    if tipo is not None:
+        sql += " WHERE tipo = ?"
+        params = (tipo,)
+    return [Cuenta(*f) for f in conexion().execute(sql + " ORDER BY codigo", params)]
+
+
+def _nuevo_codigo(conn, tipo):
+    prefijo = PREFIJOS_CATALOGO.get(tipo, "9")
+    ultimo = conn.execute(
+        "SELECT MAX(CAST(substr(codigo, 3) AS INTEGER)) FROM catalogo WHERE codigo LIKE ?",
+        (prefijo + ".%",)).fetchone()[0] or 0
+    return f"{prefijo}.{ultimo + 1:04d}"
+
+
+def _ids_catalogo(conn, pares):
+    """{(nombre, tipo): (id, nombre en el catálogo)}; agrega al catálogo las cuentas nuevas.
+
+    El nombre se compara sin espacios sobrantes ni mayúsculas, como en la migración.
+    """
+    resultado = {}
+    for nombre, tipo in set(pares):
+        limpio = nombre.strip()
+        fila = conn.execute(
+            "SELECT id, nombre FROM catalogo WHERE nombre = ? AND tipo = ?", (limpio, tipo)).fetchone()
+        if fila is None:
+            cur = conn.execute("INSERT INTO catalogo(codigo, nombre, tipo) VALUES(?,?,?)",
+                               (_nuevo_codigo(conn, tipo), limpio, tipo))
+            fila = (cur.lastrowid, limpio)
+        resultado[(nombre, tipo)] = tuple(fila)
+    return resultado
+
+
+@_con_reintentos
+def crear_grupo(nombre, tipo, padre_id=None):
+    """Agrega al catálogo una cuenta de agrupación (sin líneas propias). Devuelve su id."""
+    conn = conexion()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        cur = conn.execute("INSERT INTO catalogo(codigo, nombre, tipo, padre_id) VALUES(?,?,?,?)",
+                           (_nuevo_codigo(conn, tipo), nombre.strip(), tipo, padre_id))
+        _nueva_version(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return cur.lastrowid
+
+
+@_con_reintentos
+def asignar_padre(cuenta_id, padre_id):
+    """Cuelga una cuenta de otra del mismo tipo (padre_id None = directo bajo su tipo)."""
+    conn = conexion()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        if padre_id is not None:
+            tipos = dict(conn.execute("SELECT id, tipo FROM catalogo WHERE id IN (?, ?)",
+                                      (cuenta_id, padre_id)))
+            if len(tipos) < 2 or tipos[cuenta_id] != tipos[padre_id]:
+                raise ValueError("La cuenta y su grupo deben existir y ser del mismo tipo.")
+            ancestros = conn.execute("""
+                WITH RECURSIVE arriba(id) AS (
+                    SELECT ? UNION SELECT k.padre_id FROM catalogo k JOIN arriba a ON k.id = a.id
+                    WHERE k.padre_id IS NOT NULL)
+                SELECT 1 FROM arriba WHERE id = ?""", (padre_id, cuenta_id)).fetchone()
+            if ancestros:
+                raise ValueError("El grupo no puede estar dentro de la misma cuenta.")
+        conn.execute("UPDATE catalogo SET padre_id = ? WHERE id = ?", (padre_id, cuenta_id))
+        _nueva_version(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def cuentas_catalogo_desde(ultimo_id):
+    """[(id, nombre)] del catálogo con id mayor a 'ultimo_id', en orden de id."""
+    return conexion().execute(
+        "SELECT id, nombre FROM catalogo WHERE id > ? ORDER BY id", (ultimo_id,)).fetchall()
+
+
+def nombres_cuentas(filtro=""):
+    """Nombres del catálogo (tabla pequeña) en lugar de DISTINCT sobre todas las líneas."""
+    if filtro:
+        filas = conexion().execute(
+            "SELECT DISTINCT nombre FROM catalogo WHERE nombre LIKE ? ORDER BY nombre",
+            (f"%{filtro}%",)).fetchall()
+    else:
+        filas = conexion().execute("SELECT DISTINCT nombre FROM catalogo ORDER BY nombre").fetchall()
+    return [f[0] for f in filas]
+
+
+DEBE_SQL = "CASE WHEN c.tipo = 'Debe' THEN c.monto ELSE 0 END"
+HABER_SQL = "CASE WHEN c.tipo = 'Debe' THEN 0 ELSE c.monto END"
+MOVIMIENTO_SQL = "CASE WHEN c.tipo = 'Debe' THEN c.monto ELSE -c.monto END"
+
+# Columna de la vista -> llave por la que se ordena y pagina. Cada llave
+# termina en c.id (única) y tiene un índice que la recorre en orden, así que
+# cada página cuesta lo mismo sin importar cuántas van: Cuenta con
+# idx_cuentas_cuenta, Fecha con idx_partidas_fecha, Correlativo con su índice
+# único, Descripción con idx_partidas_descripcion y Debe/Haber con
+# idx_cuentas_debe/idx_cuentas_haber. Dentro de una misma cuenta, descripción
+# o monto las líneas van en orden de registro (partida_id), no por fecha.
+# El saldo no se ordena (ModeloLibroMayor.sort lo ignora).
+ORDEN_MAYOR = {
+    0: ("c.cuenta", "c.partida_id", "c.id"),
+    1: ("p.fecha", "p.correlativo", "c.id"),
+    2: ("p.correlativo", "c.id"),
+    3: ("p.descripcion", "p.id", "c.id"),
+    4: (DEBE_SQL, "c.partida_id", "c.id"),
+    5: (HABER_SQL, "c.partida_id", "c.id"),
+}
+
+
+def _despues_de(llave, op):
+    """Condición (llave) op (?, ...) escrita para que el índice de la llave la use.
+
+    Si la llave mezcla columnas de partidas con c.id, la parte de partidas
+    va sola como rango del índice y c.id desempata.
+    """
+    marcas = ", ".join("?" * len(llave))
+    if all(col.startswith("p.") for col in llave[:-1]):
+        partida = ", ".join(llave[:-1])
+        marcas_p = ", ".join("?" * (len(llave) - 1))
+        return (f"({partida}) {op}= ({marcas_p}) AND (({partida}) {op} ({marcas_p}) OR c.id {op} ?)",
+                lambda valores: list(valores[:-1]) * 2 + [valores[-1]])
+    return f"({', '.join(llave)}) {op} ({marcas})", list
+
+
+def pagina_libro_mayor(cuenta=None, orden=1, descendente=False, despues=None, limite=200):
+    """Una página del libro mayor, paginada por llave en lugar de OFFSET.
+
+    'despues' es la llave de la última fila de la página anterior (None para la
+    primera). El saldo de cada línea es el acumulado de su cuenta en orden
+    cronológico: saldo al día anterior (saldos_diarios) más las líneas del
+    mismo día hasta ella, sumadas con una ventana solo sobre los días de la
+    página. Devuelve (filas, llave de la última fila).
+    """
+    conn = conexion()
+    llave = ORDEN_MAYOR[orden]
+    op, direccion = ("<", "DESC") if descendente else (">", "ASC")
+    condiciones, params = [], []
+    if cuenta is not None:
+        # Los ids se buscan antes para que el plan use idx_cuentas_cuenta_id
+        ids = [f[0] for f in conn.execute("SELECT id FROM catalogo WHERE nombre = ?", (cuenta,))]
+        if not ids:
+            return [], despues
+        marcas = ",".join("?" * len(ids))
+        columna = "c.cuenta_id"
+        if orden == 0:
+            # Una sola cuenta: el orden es el de idx_cuentas_cuenta_id
+            llave = llave[1:]
+        elif llave[0].startswith("p."):
+            # Con una cuenta de muchas líneas es más barato recorrer el índice
+            # del orden y filtrar (se corta al llenar la página) que ordenar
+            # todas sus líneas; con pocas, al revés (como en pagina_diario).
+            # Solo en los órdenes de partidas: las líneas de una cuenta se
+            # reparten parejo en el tiempo, pero no entre los montos.
+            lineas = conn.execute(f"SELECT count(*) FROM cuentas WHERE cuenta_id IN ({marcas})", ids).fetchone()[0]
+            total = conn.execute("SELECT COALESCE(MAX(id), 0) FROM cuentas").fetchone()[0]
+            if lineas * 100 > total:
+                columna = "+c.cuenta_id"
+        condiciones.append(f"{columna} IN ({marcas})")
+        params.extend(ids)
+    if despues is not None:
+        condicion, valores = _despues_de(llave, op)
+        condiciones.append(condicion)
+        params.extend(valores(despues))
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    columnas = ", ".join(f"{col} AS k{i}" for i, col in enumerate(llave))
+    orden_pagina = ", ".join(f"{col} {direccion}" for col in llave)
+    orden_final = ", ".join(f"k{i} {direccion}" for i in range(len(llave)))
+    sql = f"""
+        WITH pagina AS (
+            SELECT c.id AS linea_id, c.cuenta_id, c.cuenta, p.fecha, p.correlativo, p.descripcion,
+                   c.tipo, c.monto, {columnas}
+            FROM partidas p JOIN cuentas c ON p.id = c.partida_id
+            {where}
+            ORDER BY {orden_pagina}
+            LIMIT ?
+        ),
+        del_dia AS (
+            SELECT c.id AS linea_id,
+                   SUM({MOVIMIENTO_SQL}) OVER (PARTITION BY c.cuenta_id, p.fecha
+                                               ORDER BY p.correlativo, c.id
+                                               ROWS UNBOUNDED PRECEDING) AS acumulado
+            -- CROSS JOIN: partir de los pocos días de la página, no de todas las líneas
+            FROM (SELECT DISTINCT cuenta_id, fecha FROM pagina) d
+            CROSS JOIN partidas p ON p.fecha = d.fecha
+            CROSS JOIN cuentas c ON c.partida_id = p.id AND c.cuenta_id = d.cuenta_id
+        )
+        SELECT pg.cuenta, pg.fecha, pg.correlativo, pg.descripcion, pg.tipo, pg.monto,
+               COALESCE((SELECT s.debe_acum - s.haber_acum FROM saldos_diarios s
+                         WHERE s.cuenta_id = pg.cuenta_id AND s.fecha < pg.fecha
+                         ORDER BY s.fecha DESC LIMIT 1), 0) + d.acumulado,
+               {", ".join(f"pg.k{i}" for i in range(len(llave)))}
+        FROM pagina pg JOIN del_dia d ON d.linea_id = pg.linea_id
+        ORDER BY {orden_final}
+    """
+    params.append(limite)
+    filas = conn.execute(sql, params).fetchall()
+    if not filas:
+        return [], despues
+    return [LineaMayor(*f[:5], a_decimal(f[5]), a_decimal(f[6])) for f in filas], tuple(filas[-1][7:])
+
+
+# --- Saldos -----------------------------------------------------------------
+# Los reportes leen saldos_diarios (una fila por cuenta y día con movimiento,
+# con el acumulado hasta ese día) en lugar de recorrer todas las líneas.
+# Todos los montos de esta sección son centavos enteros.
+
+SQL_RECONSTRUIR_SALDOS = f"""
+    INSERT INTO saldos_diarios(cuenta_id, fecha, debe, haber, debe_acum, haber_acum)
+    SELECT cuenta_id, fecha, debe, haber,
+           SUM(debe) OVER w, SUM(haber) OVER w
+    FROM (
+        SELECT c.cuenta_id, p.fecha,
+               SUM({DEBE_SQL}) AS debe,
+               SUM({HABER_SQL}) AS haber
+        FROM cuentas c
+        JOIN partidas p ON c.partida_id = p.id
+        GROUP BY c.cuenta_id, p.fecha
+    )
+    WINDOW w AS (PARTITION BY cuenta_id ORDER BY fecha ROWS UNBOUNDED PRECEDING)
+"""
+
+
+@_con_reintentos
+def reconstruir_saldos_diarios():
+    """Vuelve a calcular saldos_diarios completo a partir del diario."""
+    conn = conexion()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM saldos_diarios")
+        conn.execute(SQL_RECONSTRUIR_SALDOS)
+        _nueva_version(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _deltas_saldos(fecha, entradas, signo=1, deltas=None):
+    """Agrega líneas [(cuenta_id, monto, tipo)] de una partida en {(cuenta_id, fecha): (debe, haber)}."""
+    deltas = {} if deltas is None else deltas
+    for cuenta_id, monto, tipo in entradas:
+        clave = (cuenta_id, fecha)
+        debe, haber = deltas.get(clave, (0, 0))
+        if tipo == 'Debe':
+            debe += signo * monto
+        else:
+            haber += signo * monto
+        deltas[clave] = (debe, haber)
+    return deltas
+
+
+def _aplicar_saldos(conn, deltas, limpiar=False):
+    """Aplica movimientos {(cuenta_id, fecha): (debe, haber)} a saldos_diarios.
+
+    Debe llamarse dentro de la transacción que escribe las partidas. Cada fila
+    de saldos_diarios se actualiza una sola vez por cuenta aunque haya muchas
+    fechas (importación masiva).
+    """
+    por_cuenta = {}
+    for (cuenta_id, fecha), mov in deltas.items():
+        por_cuenta.setdefault(cuenta_id, []).append((fecha, mov))
+    for cuenta_id, movs in por_cuenta.items():
+        movs.sort()
+        # Filas de los días nuevos, arrancando del acumulado del último día anterior
+        conn.executemany("""
+            INSERT OR IGNORE INTO saldos_diarios(cuenta_id, fecha, debe, haber, debe_acum, haber_acum)
+            SELECT ?, ?, 0, 0,
+                   COALESCE((SELECT debe_acum FROM saldos_diarios
+                             WHERE cuenta_id=? AND fecha<? ORDER BY fecha DESC LIMIT 1), 0),
+                   COALESCE((SELECT haber_acum FROM saldos_diarios
+                             WHERE cuenta_id=? AND fecha<? ORDER BY fecha DESC LIMIT 1), 0)
+        """, [(cuenta_id, fecha) * 3 for fecha, _ in movs])
+        conn.executemany(
+            "UPDATE saldos_diarios SET debe=debe+?, haber=haber+? WHERE cuenta_id=? AND fecha=?",
+            [(debe, haber, cuenta_id, fecha) for fecha, (debe, haber) in movs])
+        # El acumulado cambia por tramos: entre dos fechas con movimiento se suma
+        # lo acumulado hasta la primera de ellas.
+        debe_total = haber_total = 0
+        tramos = []
+        for i, (fecha, (debe, haber)) in enumerate(movs):
+            debe_total += debe
+            haber_total += haber
+            hasta = movs[i + 1][0] if i + 1 < len(movs) else '9999-12-31'
+            tramos.append((debe_total, haber_total, cuenta_id, fecha, hasta))
+        conn.executemany(
+            "UPDATE saldos_diarios SET debe_acum=debe_acum+?, haber_acum=haber_acum+? "
+            "WHERE cuenta_id=? AND fecha>=? AND fecha<?", tramos)
+        if limpiar:
+            conn.executemany(
+                "DELETE FROM saldos_diarios WHERE cuenta_id=? AND fecha=? "
+                "AND NOT EXISTS (SELECT 1 FROM partidas p CROSS JOIN cuentas c "
+                "WHERE p.fecha=? AND c.partida_id = p.id AND c.cuenta_id=?)",
+                [(cuenta_id, fecha, fecha, cuenta_id) for fecha, _ in movs])
+
+
+def _actualizar_saldos(conn, fecha, entradas, signo):
+    """Suma (signo=1) o resta (signo=-1) las líneas [(cuenta_id, monto, tipo)] en saldos_diarios."""
+    _aplicar_saldos(conn, _deltas_saldos(fecha, entradas, signo), limpiar=signo < 0)
+
+
+def _acumulados(fecha, inclusive=True):
+    """{(cuenta, tipo2): (debe_acum, haber_acum)} al cierre de 'fecha' (o del día anterior).
+
+    Si ese día es el último de un periodo cerrado se lee la foto del cierre
+    (saldos_cierre); si no, el último acumulado de cada cuenta en saldos_diarios.
+    """
+    conn = conexion()
+    cierre = conn.execute(
+        "SELECT periodo FROM cierres WHERE hasta = " + ("?" if inclusive else "date(?, '-1 day')"),
+        (fecha,)).fetchone()
+    if cierre is not None:
+        filas = conn.execute("""
+            SELECT k.nombre, k.tipo, s.debe_acum, s.haber_acum
+            FROM saldos_cierre s JOIN catalogo k ON k.id = s.cuenta_id
+            WHERE s.periodo = ?""", cierre).fetchall()
+    else:
+        op = "<=" if inclusive else "<"
+        filas = conn.execute(f"""
+            SELECT k.nombre, k.tipo, s.debe_acum, s.haber_acum
+            FROM catalogo k
+            JOIN saldos_diarios s
+              ON s.cuenta_id = k.id
+             AND s.fecha = (SELECT MAX(fecha) FROM saldos_diarios
+                            WHERE cuenta_id = k.id AND fecha {op} ?)
+        """, (fecha,)).fetchall()
+    return {(f[0], f[1]): (f[2], f[3]) for f in filas}
+
+
+def saldos_al(fecha):
+    """{(cuenta, tipo2): (debe, haber)} acumulados hasta 'fecha' inclusive."""
+    return _acumulados(fecha)
+
+
+def movimientos_entre(desde, hasta):
+    """{(cuenta, tipo2): (debe, haber)} del periodo, como diferencia de dos acumulados."""
+    final = _acumulados(hasta)
+    previo = _acumulados(desde, inclusive=False)
+    resultado = {}
+    for clave, (debe, haber) in final.items():
+        d0, h0 = previo.get(clave, (0, 0))
+        if debe != d0 or haber != h0:
+            resultado[clave] = (debe - d0, haber - h0)
+    return resultado
+
+
+def saldo_neto_por_cuenta(fecha, inclusive=True):
+    """{cuenta: debe - haber} acumulado al cierre de 'fecha' (o del día anterior)."""
+    resultado = {}
+    for (cuenta, _), (debe, haber) in _acumulados(fecha, inclusive).items():
+        resultado[cuenta] = resultado.get(cuenta, 0) + debe - haber
+    return resultado
+
+
+def movimientos_por_cuenta(desde, hasta):
+    """{cuenta: (total debe, total haber)} entre dos fechas inclusive."""
+    resultado = {}
+    for (cuenta, _), (debe, haber) in movimientos_entre(desde, hasta).items():
+        d0, h0 = resultado.get(cuenta, (0, 0))
+        resultado[cuenta] = (d0 + debe, h0 + haber)
+    return resultado
+
+
+# Etiqueta del periodo de una fecha de saldos_diarios: '2026', '2026-T3', '2026-09'
+PERIODOS_SQL = {
+    "anual": "substr(s.fecha, 1, 4)",
+    "trimestral": "substr(s.fecha, 1, 4) || '-T' || ((CAST(substr(s.fecha, 6, 2) AS INTEGER) + 2) / 3)",
+    "mensual": "substr(s.fecha, 1, 7)",
+}
+
+# Signo de los estados financieros: Debe - Haber para Ingreso y Haber - Debe
+# para los demás tipos (k es catalogo y s es saldos_diarios)
+SIGNO_SQL = "CASE WHEN k.tipo LIKE '%ingreso%' THEN s.debe - s.haber ELSE s.haber - s.debe END"
+
+
+def totales_con_signo(desde, hasta, tipos=None, por_cuenta=False, periodicidad=None):
+    """{clave: total con signo (SIGNO_SQL)} entre dos fechas, en una sola consulta agrupada.
+
+    La clave es (tipo2,), (tipo2, cuenta), (tipo2, periodo) o (tipo2, cuenta,
+    periodo) según 'por_cuenta' y 'periodicidad'; 'periodo' es la etiqueta de
+    PERIODOS_SQL.
+    """
+    columnas = ["k.tipo"]
+    if por_cuenta:
+        columnas.append("k.nombre")
+    if periodicidad:
+        columnas.append(PERIODOS_SQL[periodicidad])
+    filtro, parametros = "", [desde, hasta]
+    if tipos:
+        filtro = f"AND k.tipo IN ({','.join('?' * len(tipos))})"
+        parametros.extend(tipos)
+    grupos = ", ".join(str(i) for i in range(1, len(columnas) + 1))
+    filas = conexion().execute(f"""
+        SELECT {', '.join(columnas)}, SUM({SIGNO_SQL})
+        FROM saldos_diarios s JOIN catalogo k ON k.id = s.cuenta_id
+        WHERE s.fecha BETWEEN ? AND ? {filtro}
+        GROUP BY {grupos}
+    """, parametros).fetchall()
+    return {tuple(f[:-1]): f[-1] for f in filas}
+
+
+# --- Registro de cambios ----------------------------------------------------
+# Los triggers de la migración 11 anotan en la tabla cambios cada alta y baja
+# de partidas y cuentas (una modificación es baja + alta). Quien mantiene un
+# resultado derivado guarda el último seq que leyó y después solo lee lo nuevo.
+
+def ultimo_cambio():
+    """seq del último cambio registrado (0 si no hay ninguno)."""
+    return conexion().execute("SELECT COALESCE(MAX(seq), 0) FROM cambios").fetchone()[0]
+
+
+def cambios_desde(seq, limite=1000):
+    """Hasta 'limite' cambios con seq mayor a 'seq', en orden.
+
+    Para leer todo, repetir con el seq del último cambio recibido hasta que
+    la lista venga vacía. Las líneas (tabla 'cuentas') traen cuenta, tipo,
+    tipo2 y monto (Decimal); las partidas traen correlativo y descripción.
+    """
+    filas = conexion().execute("""
+        SELECT seq, operacion, tabla, registro_id, partida_id, fecha, correlativo, descripcion,
+               cuenta, tipo, tipo2, monto, momento
+        FROM cambios WHERE seq > ? ORDER BY seq LIMIT ?""", (seq, limite)).fetchall()
+    return [Cambio(*f[:11], None if f[11] is None else a_decimal(f[11]), f[12]) for f in filas]
+
+
+def cambios_diario(despues_seq, hasta):
+    """Movimiento de las líneas agregadas o eliminadas después de 'despues_seq' con fecha <= 'hasta'.
+
+    Devuelve [(fecha, (cuenta, tipo2), debe, haber)] en centavos; las bajas
+    vienen con signo negativo.
+    """
+    filas = conexion().execute("""
+        SELECT e.fecha, k.nombre, k.tipo, e.monto, e.tipo, e.operacion
+        FROM cambios e JOIN catalogo k ON k.id = e.cuenta_id
+        WHERE e.seq > ? AND e.tabla = 'cuentas' AND e.fecha <= ?
+    """, (despues_seq, hasta)).fetchall()
+    resultado = []
+    for fecha, cuenta, tipo2, monto, tipo, operacion in filas:
+        if operacion == 'baja':
+            monto = -monto
+        debe, haber = (monto, 0) if tipo == 'Debe' else (0, monto)
+        resultado.append((fecha, (cuenta, tipo2), debe, haber))
+    return resultado
+
+
+# --- Cierres contables ------------------------------------------------------
+# Un cierre bloquea las partidas hasta el último día del periodo y guarda el
+# acumulado de cada cuenta a esa fecha; los reportes a esa fecha (o que
+# arrancan el día siguiente) leen esa foto.
+
+Cierre = namedtuple("Cierre", "periodo hasta cerrado_en")
+
+
+def fecha_cierre(conn=None):
+    """Último día cerrado (AAAA-MM-DD) o None si no hay cierres."""
+    conn = conn or conexion()
+    return conn.execute("SELECT MAX(hasta) FROM cierres").fetchone()[0]
+
+
+def _verificar_abierto(conn, fechas):
+    """ValueError si alguna fecha cae en un periodo cerrado; llamar dentro de la transacción."""
+    cierre = fecha_cierre(conn)
+    if cierre and fechas and min(fechas) <= cierre:
+        raise ValueError(f"El periodo está cerrado hasta {cierre}; "
+                         f"no se pueden modificar partidas del {min(fechas)}.")
+
+
+def cierres():
+    return [Cierre(*f) for f in conexion().execute(
+        "SELECT periodo, hasta, cerrado_en FROM cierres ORDER BY hasta")]
+
+
+@_con_reintentos
+def cerrar_periodo(anio, mes):
+    """Cierra hasta el último día del mes: guarda los acumulados y bloquea esas partidas."""
+    periodo = f"{anio:04d}-{mes:02d}"
+    hasta = f"{periodo}-{monthrange(anio, mes)[1]:02d}"
+    conn = conexion()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        anterior = conn.execute(
+            "SELECT periodo, hasta FROM cierres ORDER BY hasta DESC LIMIT 1").fetchone()
+        if anterior and anterior[1] >= hasta:
+            raise ValueError(f"Ya hay un cierre hasta {anterior[1]}.")
+        conn.execute("INSERT INTO cierres(periodo, hasta, cerrado_en) VALUES(?, ?, datetime('now'))",
+                     (periodo, hasta))
+        conn.execute("""
+            INSERT INTO saldos_cierre(periodo, cuenta_id, debe_acum, haber_acum)
+            SELECT ?, s.cuenta_id, s.debe_acum, s.haber_acum
+            FROM catalogo k
+            JOIN saldos_diarios s
+              ON s.cuenta_id = k.id
+             AND s.fecha = (SELECT MAX(fecha) FROM saldos_diarios
+                            WHERE cuenta_id = k.id AND fecha <= ?)""", (periodo, hasta))
+        cierre = Cierre(*conn.execute(
+            "SELECT periodo, hasta, cerrado_en FROM cierres WHERE periodo = ?", (periodo,)).fetchone())
+        _nueva_version(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return cierre
+
+
+@_con_reintentos
+def reabrir_ultimo_periodo():
+    """Deshace el último cierre para poder corregir sus partidas. Devuelve el periodo o None."""
+    conn = conexion()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        ultimo = conn.execute("SELECT periodo FROM cierres ORDER BY hasta DESC LIMIT 1").fetchone()
+        if ultimo:
+            conn.execute("DELETE FROM saldos_cierre WHERE periodo = ?", ultimo)
+            conn.execute("DELETE FROM cierres WHERE periodo = ?", ultimo)
+            _nueva_version(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return ultimo[0] if ultimo else None
+
+
+# --- Clasificación de cuentas -----------------------------------------------
+
+def clasificaciones_guardadas(huella):
+    """{(cuenta, tipo2): (seccion, categoria, seccion_antigua, categoria_antigua)} vigentes."""
+    filas = conexion().execute(
+        "SELECT cuenta, tipo2, seccion, categoria, seccion_antigua, categoria_antigua "
+        "FROM clasificacion_cuentas WHERE huella = ?", (huella,))
+    return {(f[0], f[1]): f[2:] for f in filas}
+
+
+@_con_reintentos
+def guardar_clasificaciones(huella, filas):
+    """Guarda [(cuenta, tipo2, seccion, categoria, seccion_antigua, categoria_antigua)]."""
+    conn = conexion()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "INSERT OR REPLACE INTO clasificacion_cuentas(cuenta, tipo2, huella, seccion, categoria, "
+            "seccion_antigua, categoria_antigua) VALUES(?,?,?,?,?,?,?)",
+            [(f[0], f[1], huella) + tuple(f[2:]) for f in filas])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+# --- Exportación ------------------------------------------------------------
+
+COLUMNAS_DETALLE = list(LineaDetalle._fields)
+
+
+def hay_partidas(desde, hasta):
+    return conexion().execute(
+        "SELECT EXISTS(SELECT 1 FROM partidas WHERE fecha BETWEEN ? AND ?)",
+        (desde, hasta)).fetchone()[0] == 1
+
+
+def contar_detalle_partidas(desde, hasta):
+    return conexion().execute(
+        "SELECT COUNT(*) FROM partidas p JOIN cuentas c ON p.id = c.partida_id "
+        "WHERE p.fecha BETWEEN ? AND ?", (desde, hasta)).fetchone()[0]
+
+
+def iterar_detalle_partidas(desde, hasta, tam_bloque=5000):
+    """Genera bloques de LineaDetalle del rango sin traer todo el resultado a memoria."""
+    cur = conexion().cursor()
+    cur.arraysize = tam_bloque
+    cur.execute(
+        "SELECT p.fecha, p.correlativo, p.descripcion, c.cuenta, c.tipo, c.monto "
+        "FROM partidas p JOIN cuentas c ON p.id = c.partida_id "
+        "WHERE p.fecha BETWEEN ? AND ? "
+        "ORDER BY p.fecha, p.correlativo, c.id", (desde, hasta))
+    try:
+        while True:
+            filas = cur.fetchmany()
+            if not filas:
+                break
+            yield [LineaDetalle(*f[:5], a_decimal(f[5])) for f in filas]
+    finally:
+        cur.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mantenimiento de la base de datos contable")
+    parser.add_argument("comando", choices=["reconstruir-saldos"])
+    parser.add_argument("--db", help="ruta de la base de datos (por defecto contabilidad.db)")
+    args = parser.parse_args()
+    if args.db:
+        configurar(args.db)
+    if args.comando == "reconstruir-saldos":
+        reconstruir_saldos_diarios()
+        n = conexion().execute("SELECT COUNT(*) FROM saldos_diarios").fetchone()[0]
+        print(f"saldos_diarios reconstruida: {n} filas")
@@ -0,0 +1,1030 @@
+"""Mediciones de rendimiento sobre una base de datos sintética.
+
+Uso: python benchmarks.py <nombre> [--partidas N]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from migraciones import aplicar_migraciones
+
+CUENTAS_DEMO = [
+    ("Caja", "Activo"), ("Bancos", "Activo"), ("Clientes", "Activo"),
+    ("Inventario", "Activo"), ("IVA por cobrar", "Activo"), ("Vehiculos", "Activo"),
+    ("Proveedores", "Pasivo"), ("Prestamos bancarios", "Pasivo"), ("IVA por pagar", "Pasivo"),
+    ("Acreedores", "Pasivo"), ("Documentos por pagar", "Pasivo"),
+    ("Capital en acciones", "Patrimonio"), ("Reserva Legal", "Patrimonio"),
+    ("Ventas", "Ventas"), ("Costo de venta", "Costo de Venta"),
+    ("Gastos de operacion", "Gasto"), ("Intereses ganados", "Ingreso"),
+]
+
+
+def crear_base(ruta, partidas, version=1, semilla=7):
+    """Crea una base con el esquema de 'version' y la llena con partidas balanceadas."""
+    conn = sqlite3.connect(ruta)
+    aplicar_migraciones(conn, hasta=version)
+    rnd = random.Random(semilla)
+    inicio = date(2020, 1, 1)
+    filas_p, filas_c = [], []
+    for i in range(1, partidas + 1):
+        fecha = (inicio + timedelta(days=rnd.randrange(2190))).isoformat()
+        filas_p.append((i, fecha, i, f"Partida {i}"))
+        debe, haber = rnd.sample(CUENTAS_DEMO, 2)
+        monto = round(rnd.uniform(1, 50000), 2)
+        filas_c.append((i, debe[0], monto, "Debe", debe[1]))
+        filas_c.append((i, haber[0], monto, "Haber", haber[1]))
+    conn.executemany("INSERT INTO partidas(id, fecha, correlativo, descripcion) VALUES(?,?,?,?)", filas_p)
+    conn.executemany("INSERT INTO cuentas(partida_id, cuenta, monto, tipo, tipo2) VALUES(?,?,?,?,?)", filas_c)
+    conn.commit()
+    return conn
+
+
+def _base_temporal():
+    fd, ruta = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    return ruta
+
+
+def _cronometrar(fn, repeticiones=3):
+    mejor = None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        mejor = dt if mejor is None else min(mejor, dt)
+    return mejor
+
+
+# Consultas representativas de cada pantalla (esquema v2)
+CONSULTAS_REPORTES = {
+    "libro mayor (cuenta)": (
+        "SELECT c.cuenta, p.fecha, p.correlativo, p.descripcion, c.tipo, c.monto "
+        "FROM partidas p JOIN cuentas c ON p.id = c.partida_id "
+        "WHERE c.cuenta = ? ORDER BY p.fecha, p.correlativo", ("Caja",)),
+    "lista de cuentas": ("SELECT DISTINCT cuenta FROM cuentas ORDER BY cuenta", ()),
+    "balance de saldos (mes)": (
+        "SELECT c.cuenta, SUM(CASE WHEN c.tipo = 'Debe' THEN c.monto ELSE 0 END) "
+        "FROM cuentas c JOIN partidas p ON c.partida_id = p.id "
+        "WHERE p.fecha BETWEEN ? AND ? GROUP BY c.cuenta", ("2024-03-02", "2024-03-31")),
+    "estado de resultados": (
+        "SELECT c.monto, c.tipo, c.tipo2, p.fecha FROM cuentas c "
+        "JOIN partidas p ON c.partida_id = p.id "
+        "WHERE c.tipo2 IN (?) AND p.fecha BETWEEN ? AND ?", ("Ventas", "2024-01-01", "2024-12-31")),
+    "exportacion (rango)": (
+        "SELECT p.fecha, p.correlativo, p.descripcion, c.cuenta, c.tipo, c.monto "
+        "FROM partidas p JOIN cuentas c ON p.id = c.partida_id "
+        "WHERE p.fecha BETWEEN ? AND ? ORDER BY p.fecha, p.correlativo", ("2024-03-01", "2024-03-31")),
+}
+
+
+def _plan(conn, sql, params):
+    filas = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return [f[-1] for f in filas]
+
+
+def bench_indices(args):
+    """Planes de consulta y tiempos antes y después de la migración de índices."""
+    ruta = _base_temporal()
+    try:
+        conn = crear_base(ruta, args.partidas, version=1)
+        resultados = {}
+        for version in (1, 2):
+            aplicar_migraciones(conn, hasta=version)
+            for nombre, (sql, params) in CONSULTAS_REPORTES.items():
+                plan = _plan(conn, sql, params)
+                t = _cronometrar(lambda: conn.execute(sql, params).fetchall())
+                resultados.setdefault(nombre, {})[version] = (plan, t)
+        conn.close()
+    finally:
+        os.remove(ruta)
+
+    ok = True
+    for nombre, por_version in resultados.items():
+        print(f"\n== {nombre}")
+        for version, (plan, t) in por_version.items():
+            print(f"  v{version}  {t * 1000:8.2f} ms")
+            for paso in plan:
+                print(f"      {paso}")
+        plan_nuevo = por_version[2][0]
+        if any(p.startswith("SCAN") and "USING" not in p and "INDEX" not in p for p in plan_nuevo):
+            ok = False
+            print("  !! sigue habiendo SCAN completo de tabla")
+    return 0 if ok else 1
+
+
+def bench_saldos(args):
+    """Saldo por cuenta a una fecha: recorrido de todas las líneas vs. saldos_diarios."""
+    import basedatos
+    ruta = _base_temporal()
+    try:
+        crear_base(ruta, args.partidas).close()
+        basedatos.configurar(ruta)
+        conn = basedatos.conexion()
+        fecha = "2024-12-31"
+
+        def por_lineas():
+            totales = {}
+            for cuenta, monto, tipo in conn.execute(
+                    "SELECT c.cuenta, c.monto, c.tipo FROM cuentas c "
+                    "JOIN partidas p ON c.partida_id = p.id WHERE p.fecha <= ?", (fecha,)):
+                totales[cuenta] = totales.get(cuenta, 0.0) + (monto if tipo == "Debe" else -monto)
+            return totales
+
+        t_lineas = _cronometrar(por_lineas)
+        t_saldos = _cronometrar(lambda: basedatos.saldos_al(fecha))
+        filas = conn.execute("SELECT COUNT(*) FROM saldos_diarios").fetchone()[0]
+        basedatos.cerrar()
+    finally:
+        basedatos.configurar(None)
+        os.remove(ruta)
+    print(f"líneas del diario:   {args.partidas * 2}")
+    print(f"filas saldos_diarios: {filas}")
+    print(f"recorrido de líneas: {t_lineas * 1000:8.2f} ms")
+    print(f"saldos_diarios:      {t_saldos * 1000:8.2f} ms")
+    return 0
+
+
+def bench_importacion(args):
+    """Partidas por segundo de la importación masiva desde CSV."""
+    import csv
+    import basedatos
+    import importacion
+    rnd = random.Random(3)
+    ruta = _base_temporal()
+    fd, ruta_csv = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        with open(ruta_csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(importacion.COLUMNAS)
+            for i in range(1, args.partidas + 1):
+                fecha = (date(2020, 1, 1) + timedelta(days=rnd.randrange(2190))).isoformat()
+                debe, haber = rnd.sample(CUENTAS_DEMO, 2)
+                monto = f"{rnd.uniform(1, 50000):.2f}"
+                w.writerow([i, fecha, f"Partida {i}", debe[0], "Debe", monto, debe[1]])
+                w.writerow([i, fecha, f"Partida {i}", haber[0], "Haber", monto, haber[1]])
+            # Una partida descuadrada para comprobar que no detiene el lote
+            w.writerow(["X", "2024-01-01", "Descuadrada", "Caja", "Debe", "10", "Activo"])
+            w.writerow(["X", "2024-01-01", "Descuadrada", "Ventas", "Haber", "9", "Ventas"])
+        basedatos.configurar(ruta)
+        resultado = importacion.importar(ruta_csv)
+        total = basedatos.conexion().execute("SELECT COUNT(*) FROM partidas").fetchone()[0]
+        basedatos.cerrar()
+    finally:
+        basedatos.configurar(None)
+        os.remove(ruta)
+        os.remove(ruta_csv)
+    print(f"partidas importadas: {resultado.partidas} (en la base: {total})")
+    print(f"errores:             {len(resultado.errores)}")
+    print(f"tiempo:              {resultado.segundos:.2f} s")
+    print(f"velocidad:           {resultado.partidas / resultado.segundos:,.0f} partidas/s")
+    return 0 if total == args.partidas and len(resultado.errores) == 1 else 1
+
+
+def bench_exportacion(args):
+    """Tiempo y memoria máxima (tracemalloc) de la exportación por bloques en cada formato."""
+    import tracemalloc
+    import basedatos
+    import exportacion
+    ruta = _base_temporal()
+    salida = tempfile.mkdtemp()
+    resultados = []
+    try:
+        crear_base(ruta, args.partidas).close()
+        basedatos.configurar(ruta)
+        for formato, (_, _, ext, funcion) in exportacion.EXPORTADORES.items():
+            destino = os.path.join(salida, "detalle" + ext)
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            try:
+                funcion(basedatos.iterar_detalle_partidas("2000-01-01", "2099-12-31"), destino)
+            except RuntimeError as e:
+                tracemalloc.stop()
+                resultados.append((formato, None, None, str(e)))
+                continue
+            dt = time.perf_counter() - t0
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            resultados.append((formato, dt, pico, f"{os.path.getsize(destino) / 2**20:.1f} MB"))
+            os.remove(destino)
+        basedatos.cerrar()
+    finally:
+        basedatos.configurar(None)
+        os.remove(ruta)
+        os.rmdir(salida)
+    print(f"líneas exportadas: {args.partidas * 2}")
+    for formato, dt, pico, nota in resultados:
+        if dt is None:
+            print(f"  {formato:8} omitido: {nota}")
+        else:
+            print(f"  {formato:8} {dt:7.2f} s  pico {pico / 2**20:7.1f} MB  archivo {nota}")
+    return 0
+
+
+def _clasificar_por_subcadenas(nombre, tipo2):
+    """Clasificación anterior: any(k in nombre) categoría por categoría, en cada línea."""
+    from reportes import (CATEGORY_CURRENT, CATEGORY_LIAB_CURRENT,
+                          CATEGORY_LIAB_NON_CURRENT, Clasificacion)
+
+    def clasificar(nm, categorias, prefijo):
+        for cat, claves in categorias.items():
+            if any(k in nm for k in claves):
+                return prefijo, cat
+        return prefijo, list(categorias.keys())[0]
+
+    tl, nm = tipo2.lower(), nombre.lower()
+    if tl == 'activo':
+        if any(p in nm for p in ['vehiculos', 'vehículo', 'edificios', 'edificio', 'maquinaria']):
+            return Clasificacion('ANC', 'Otras cuentas', 'ANC', 'Otras cuentas')
+        return Clasificacion('AC', clasificar(nm, CATEGORY_CURRENT, 'AC')[1], 'ANC', 'Otras cuentas')
+    if tl == 'pasivo':
+        return Clasificacion(*clasificar(nm, CATEGORY_LIAB_CURRENT, 'PC'),
+                             *clasificar(nm, CATEGORY_LIAB_NON_CURRENT, 'PNC'))
+    if tl == 'patrimonio':
+        if 'capital en acciones' in nm:
+            cat = 'Capital en acciones'
+        elif 'reserva legal' in nm:
+            cat = 'Reserva Legal'
+        elif 'utilidades acumuladas' in nm:
+            cat = 'Utilidades acumuladas'
+        elif nm == 'patrimonio':
+            cat = 'Patrimonio'
+        else:
+            cat = 'Otro patrimonio'
+        return Clasificacion('EQ', cat, 'EQ', cat)
+    return None
+
+
+def bench_clasificacion(args):
+    """Clasificación por línea con subcadenas vs. autómata compilado y memoizado por cuenta."""
+    import reportes
+    from clasificacion import Clasificador
+    rnd = random.Random(11)
+    sufijos = ["", " central", " sucursal 2", " en quetzales", " (USD)", " zona 10"]
+    cuentas = [(nombre + suf, tipo2) for nombre, tipo2 in CUENTAS_DEMO for suf in sufijos]
+    cuentas += [("Patrimonio", "Patrimonio"), ("Edificio administrativo", "Activo"),
+                ("Prestamo bancario BI", "Pasivo"), ("Utilidades acumuladas 2020", "Patrimonio")]
+    lineas = [rnd.choice(cuentas) for _ in range(args.partidas * 2)]
+
+    distintas = [c for c in cuentas if _clasificar_por_subcadenas(*c) != reportes.clasificar_cuenta(*c)]
+    for cuenta in distintas:
+        print("  !! distinta:", cuenta)
+
+    t_sub = _cronometrar(lambda: [_clasificar_por_subcadenas(n, t) for n, t in lineas], 1)
+    t_aut = _cronometrar(lambda: [reportes.clasificar_cuenta(n, t) for n, t in lineas], 1)
+
+    def memoizada():
+        memo = {}
+        for linea in lineas:
+            if linea not in memo:
+                memo[linea] = reportes.clasificar_cuenta(*linea)
+        return memo
+
+    t_memo = _cronometrar(memoizada, 1)
+    t_compilar = _cronometrar(lambda: Clasificador(reportes.CATEGORY_CURRENT), 5)
+    print(f"líneas: {len(lineas)}   cuentas distintas: {len(cuentas)}")
+    print(f"subcadenas por línea:   {t_sub * 1000:9.2f} ms")
+    print(f"autómata por línea:     {t_aut * 1000:9.2f} ms")
+    print(f"autómata + memo:        {t_memo * 1000:9.2f} ms")
+    print(f"compilar un diccionario: {t_compilar * 1000:8.3f} ms")
+    return 0 if not distintas else 1
+
+
+def bench_busqueda(args):
+    """Latencia de la búsqueda de cuentas sobre un catálogo sintético de 50k nombres."""
+    import statistics
+    from busqueda import IndiceCuentas
+    rnd = random.Random(5)
+    calificativos = ["central", "sucursal", "en dólares", "por cobrar", "por pagar",
+                     "acumulada", "de oficina", "zona", "proyecto", "depósito"]
+    nombres = ["Vehículos", "Caja", "Préstamos bancarios"]
+    while len(nombres) < 50000:
+        base = rnd.choice(CUENTAS_DEMO)[0]
+        nombres.append(f"{base} {rnd.choice(calificativos)} {rnd.randint(1, 9999)}")
+
+    inicio = time.perf_counter()
+    indice = IndiceCuentas(nombres)
+    t_indice = time.perf_counter() - inicio
+
+    consultas = ["veh", "vehiculo", "caja", "prestamo banc", "por cob", "cobrar",
+                 "sucursal 12", "deposito", "vehculos", "prestamso", "zz", "ofi"]
+    tiempos = []
+    for _ in range(20):
+        for consulta in consultas:
+            inicio = time.perf_counter()
+            indice.buscar(consulta)
+            tiempos.append(time.perf_counter() - inicio)
+    tiempos.sort()
+    p50 = statistics.median(tiempos) * 1000
+    p95 = tiempos[int(len(tiempos) * 0.95)] * 1000
+    maximo = tiempos[-1] * 1000
+    encontrada = indice.buscar("vehiculo")[:1] == ["Vehículos"]
+    print(f"nombres: {len(indice)}   índice: {t_indice * 1000:.0f} ms")
+    print(f"consulta p50: {p50:.3f} ms   p95: {p95:.3f} ms   máx: {maximo:.3f} ms")
+    print(f"'vehiculo' -> 'Vehículos' primero: {'sí' if encontrada else 'no'}")
+    return 0 if encontrada and p95 < 5 else 1
+
+
+def bench_centavos(args):
+    """Sumas con montos REAL (float) vs. centavos enteros, en SQL y en Python."""
+    ruta = _base_temporal()
+    try:
+        conn = crear_base(ruta, args.partidas, version=1)
+        aplicar_migraciones(conn, hasta=6)
+        sql_suma = ("SELECT tipo2, SUM(CASE WHEN tipo = 'Debe' THEN monto ELSE -monto END) "
+                    "FROM cuentas GROUP BY tipo2")
+        sql_lineas = "SELECT tipo2, monto, tipo FROM cuentas"
+
+        def por_lineas():
+            totales = {}
+            for tipo2, monto, tipo in conn.execute(sql_lineas):
+                totales[tipo2] = totales.get(tipo2, 0) + (monto if tipo == "Debe" else -monto)
+            return totales
+
+        t_sql_real = _cronometrar(lambda: conn.execute(sql_suma).fetchall())
+        t_py_real = _cronometrar(por_lineas)
+        reales = por_lineas()
+        inicio = time.perf_counter()
+        aplicar_migraciones(conn)
+        t_migracion = time.perf_counter() - inicio
+        t_sql_cent = _cronometrar(lambda: conn.execute(sql_suma).fetchall())
+        t_py_cent = _cronometrar(por_lineas)
+        exactos = por_lineas()
+        conn.close()
+    finally:
+        os.remove(ruta)
+
+    # Debe = Haber en cada partida: el total exacto de todo el diario es 0
+    desvio = max(abs(round(reales[t] * 100) - exactos[t]) for t in exactos)
+    residuo = sum(reales.values())
+    print(f"líneas: {args.partidas * 2}   migración a centavos: {t_migracion * 1000:.0f} ms")
+    print(f"SUM en SQL     REAL {t_sql_real * 1000:8.2f} ms   centavos {t_sql_cent * 1000:8.2f} ms")
+    print(f"bucle Python   REAL {t_py_real * 1000:8.2f} ms   centavos {t_py_cent * 1000:8.2f} ms")
+    print(f"Debe - Haber del diario: float {residuo!r}   centavos {sum(exactos.values())}")
+    print(f"mayor diferencia por tipo al redondear el float: {desvio} centavos")
+    # Tolerancia por ruido de medición
+    ok = sum(exactos.values()) == 0 and t_py_cent <= t_py_real * 1.15 and t_sql_cent <= t_sql_real * 1.15
+    return 0 if ok else 1
+
+
+def _escritor_partidas(ruta, numero, partidas, lote):
+    """Proceso del benchmark de correlativos: guarda partidas una a una o por lotes reservados."""
+    import basedatos
+    basedatos.configurar(ruta)
+    rnd = random.Random(numero)
+    errores = 0
+    inicio = time.perf_counter()
+    hechas = 0
+    while hechas < partidas:
+        cantidad = min(lote, partidas - hechas)
+        lineas = []
+        for _ in range(cantidad):
+            debe, haber = rnd.sample(CUENTAS_DEMO, 2)
+            monto = f"{rnd.uniform(1, 5000):.2f}"
+            lineas.append(("2025-01-15", f"Proceso {numero}",
+                           [(debe[0], monto, "Debe", debe[1]), (haber[0], monto, "Haber", haber[1])]))
+        try:
+            if lote == 1:
+                basedatos.guardar_partida(*lineas[0])
+            else:
+                basedatos.guardar_partidas_lote(lineas, basedatos.reservar_correlativos(cantidad))
+        except sqlite3.Error:
+            errores += 1
+        hechas += cantidad
+    return numero, hechas, errores, time.perf_counter() - inicio
+
+
+def bench_correlativos(args):
+    """Varios procesos guardando partidas a la vez: correlativos sin choques ni saltos."""
+    import multiprocessing
+    ruta = _base_temporal()
+    procesos = 6
+    por_proceso = max(1, min(args.partidas, 400))
+    try:
+        conn = sqlite3.connect(ruta)
+        aplicar_migraciones(conn)
+        conn.close()
+        # Los dos últimos procesos simulan importaciones con bloques reservados
+        tareas = [(ruta, i, por_proceso, 1 if i < procesos - 2 else 25) for i in range(procesos)]
+        inicio = time.perf_counter()
+        with multiprocessing.get_context("spawn").Pool(procesos) as pool:
+            resultados = pool.starmap(_escritor_partidas, tareas)
+        total_t = time.perf_counter() - inicio
+        conn = sqlite3.connect(ruta)
+        correlativos = [f[0] for f in conn.execute("SELECT correlativo FROM partidas ORDER BY correlativo")]
+        secuencia = conn.execute("SELECT valor FROM secuencias WHERE nombre = 'correlativo'").fetchone()[0]
+        conn.close()
+    finally:
+        for sufijo in ("", "-wal", "-shm"):
+            if os.path.exists(ruta + sufijo):
+                os.remove(ruta + sufijo)
+
+    esperadas = procesos * por_proceso
+    errores = sum(r[2] for r in resultados)
+    repetidos = len(correlativos) - len(set(correlativos))
+    saltos = esperadas - len(correlativos) if correlativos == list(range(1, len(correlativos) + 1)) else -1
+    for numero, hechas, errs, segundos in resultados:
+        modo = "una a una" if numero < procesos - 2 else "bloques de 25"
+        print(f"proceso {numero} ({modo}): {hechas / segundos:8.1f} partidas/s   errores {errs}")
+    print(f"total: {len(correlativos)}/{esperadas} partidas en {total_t:.2f} s "
+          f"({len(correlativos) / total_t:.1f} partidas/s)")
+    print(f"correlativos repetidos: {repetidos}   numeración 1..N sin saltos: {saltos == 0}   "
+          f"secuencia: {secuencia}")
+    return 0 if errores == 0 and repetidos == 0 and saltos == 0 and secuencia == esperadas else 1
+
+
+def bench_cache(args):
+    """Reportes repetidos sin escrituras: cálculo completo vs. caché en memoria y en disco."""
+    import shutil
+    import basedatos
+    import cache_reportes
+    import reportes
+    ruta = _base_temporal()
+    carpeta = tempfile.mkdtemp()
+    try:
+        conn = crear_base(ruta, args.partidas)
+        aplicar_migraciones(conn)
+        conn.close()
+        basedatos.configurar(ruta)
+        pedidos = [
+            ("balance general", lambda: reportes.balance_general("2025-06-30")),
+            ("árbol del balance", lambda: reportes.arbol_balance_general("2025-06-30")),
+            ("estado de resultados", lambda: reportes.estado_resultados("2025-06-30")),
+            ("resultados trimestrales x8",
+             lambda: reportes.estado_resultados_comparativo("2025-06-30", 8, "trimestral")),
+            ("balance de saldos", lambda: reportes.arbol_balance_saldos(2025, 6)),
+        ]
+        iguales = True
+        for nombre, pedido in pedidos:
+            cache_reportes.configurar(carpeta).limpiar()
+            t0 = time.perf_counter()
+            calculado = pedido()
+            t_calculo = time.perf_counter() - t0
+            t_memoria = _cronometrar(pedido, 5)
+            cache_reportes.configurar(carpeta)
+            t0 = time.perf_counter()
+            desde_disco = pedido()
+            t_disco = time.perf_counter() - t0
+            iguales = iguales and repr(desde_disco) == repr(calculado)
+            print(f"{nombre:28s} cálculo {t_calculo * 1000:8.2f} ms   memoria {t_memoria * 1000:6.3f} ms   "
+                  f"disco {t_disco * 1000:6.3f} ms")
+        # Una escritura sube la versión de los datos: el siguiente pedido se recalcula
+        antes = reportes.estado_resultados("2025-06-30")
+        basedatos.guardar_partida("2025-06-30", "Venta de prueba", [
+            ("Caja", "1000", "Debe", "Activo"), ("Ventas", "1000", "Haber", "Ventas")])
+        despues = reportes.estado_resultados("2025-06-30")
+        invalidada = despues["Ventas"] - antes["Ventas"] == 1000
+        basedatos.cerrar()
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+        for sufijo in ("", "-wal", "-shm"):
+            if os.path.exists(ruta + sufijo):
+                os.remove(ruta + sufijo)
+    print(f"disco == cálculo: {iguales}   invalidada al escribir: {invalidada}")
+    return 0 if iguales and invalidada else 1
+
+
+def bench_tablas(args):
+    """Llenado de un QTableWidget (offscreen): fila por fila con un botón por fila vs. tablas.llenar_tabla."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication, QPushButton, QTableWidget, QTableWidgetItem
+    import tablas
+    app = QApplication.instance() or QApplication([])
+    rnd = random.Random(3)
+    estilo = ("QPushButton { background-color: #D32F2F; color: white; border: none; "
+              "border-radius: 4px; padding: 2px 4px; font-size: 10px; }")
+
+    def nueva_tabla():
+        tabla = QTableWidget(0, 5)
+        tabla.setHorizontalHeaderLabels(["Cuenta", "Monto", "Tipo", "Clasificación", "Acciones"])
+        tabla.setSortingEnabled(True)
+        tabla.resize(1000, 600)
+        tabla.show()
+        app.processEvents()
+        return tabla
+
+    def anterior(tabla, filas, botones):
+        for fila in filas:
+            r = tabla.rowCount()
+            tabla.insertRow(r)
+            for c, texto in enumerate(fila):
+                tabla.setItem(r, c, QTableWidgetItem(texto))
+            if botones:
+                boton = QPushButton("X")
+                boton.setStyleSheet(estilo)
+                tabla.setCellWidget(r, 4, boton)
+        tabla.resizeColumnsToContents()
+
+    def nuevo(tabla, filas, botones):
+        tabla.setItemDelegateForColumn(4, tablas.DelegadoEliminar(tabla))
+        tablas.llenar_tabla(tabla, filas)
+
+    resultados = {}
+    for cantidad in (10000, 100000):
+        filas = [(rnd.choice(CUENTAS_DEMO)[0], f"Q{rnd.uniform(1, 50000):,.2f}", rnd.choice(("Debe", "Haber")),
+                  rnd.choice(CUENTAS_DEMO)[1], None) for _ in range(cantidad)]
+        for nombre, llenar, botones in (("fila por fila + botones", anterior, True),
+                                        ("fila por fila", anterior, False),
+                                        ("llenar_tabla + delegado", nuevo, True)):
+            if llenar is anterior and cantidad > 10000:
+                # Con el ordenamiento activo cada insertRow reordena: 100k filas tardan
+                # más de un minuto (106 s medidos), así que solo se compara con 10k
+                continue
+            tabla = nueva_tabla()
+            inicio = time.perf_counter()
+            llenar(tabla, filas, botones)
+            app.processEvents()
+            segundos = time.perf_counter() - inicio
+            resultados[(nombre, cantidad)] = segundos
+            print(f"{cantidad:>7} filas  {nombre:26s} {segundos * 1000:10.1f} ms   filas: {tabla.rowCount()}")
+            tabla.deleteLater()
+            app.processEvents()
+    nuevo_10k = resultados[("llenar_tabla + delegado", 10000)]
+    return 0 if nuevo_10k < resultados[("fila por fila", 10000)] else 1
+
+
+# Presupuesto de "import login" (lo que tarda en aparecer la ventana de ingreso)
+PRESUPUESTO_ARRANQUE_MS = 250
+# Módulos que no deben cargarse antes de abrir la pantalla que los usa
+MODULOS_PESADOS = ("pandas", "numpy", "fpdf", "reportlab", "xlsxwriter", "openpyxl", "pyarrow")
+
+
+def _tiempos_importacion(modulos):
+    """Importa 'modulos' en orden en un proceso nuevo con -X importtime.
+
+    Devuelve [(módulo, ms acumulados, módulos que cargó)] solo de los de primer nivel.
+    """
+    import subprocess
+    codigo = "; ".join(f"import {m}" for m in modulos)
+    entorno = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    salida = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), env=entorno,
+                            capture_output=True, text=True, check=True).stderr
+    resultado, cargados = [], []
+    for linea in salida.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, nombre = linea.split("|")
+        cargados.append(nombre.strip())
+        if not nombre.startswith("  ") and nombre.strip() in modulos:
+            resultado.append((nombre.strip(), int(acumulado) / 1000, cargados))
+            cargados = []
+    return resultado
+
+
+def bench_arranque(args):
+    """Importación de login.py (-X importtime) contra un presupuesto y sin librerías pesadas."""
+    import menu
+    pantallas = [modulo for modulo, _ in menu.PANTALLAS.values()]
+    medidas = [_tiempos_importacion(["login"] + pantallas) for _ in range(3)]
+    login_ms = min(m[0][1] for m in medidas)
+    pesados = sorted({c.split(".")[0] for c in medidas[0][0][2]} & set(MODULOS_PESADOS))
+    print(f"import login: {login_ms:.1f} ms (presupuesto {PRESUPUESTO_ARRANQUE_MS} ms)")
+    print(f"librerías pesadas al arrancar: {', '.join(pesados) or 'ninguna'}")
+    for i, modulo in enumerate(pantallas, start=1):
+        print(f"  al abrir {modulo:20s} {min(m[i][1] for m in medidas):8.1f} ms")
+    return 0 if login_ms <= PRESUPUESTO_ARRANQUE_MS and not pesados else 1
+
+
+def _etiqueta_periodo(fecha, periodicidad):
+    if periodicidad == "anual":
+        return fecha[:4]
+    if periodicidad == "trimestral":
+        return f"{fecha[:4]}-T{(int(fecha[5:7]) + 2) // 3}"
+    return fecha[:7]
+
+
+def _totales_por_lineas(conn, desde, hasta):
+    """Referencia: recorre las líneas del diario y aplica el signo en Python, como antes."""
+    totales = {}
+
+    def sumar(clave, valor):
+        totales[clave] = totales.get(clave, 0) + valor
+
+    filas = conn.execute("""
+        SELECT p.fecha, c.cuenta, c.tipo2, c.monto, c.tipo
+        FROM cuentas c JOIN partidas p ON p.id = c.partida_id
+        WHERE p.fecha BETWEEN ? AND ?""", (desde, hasta))
+    for fecha, cuenta, tipo2, monto, tipo in filas:
+        debe, haber = (monto, 0) if tipo == "Debe" else (0, monto)
+        valor = debe - haber if "ingreso" in tipo2.lower() else haber - debe
+        sumar(("tipo", tipo2), valor)
+        sumar(("cuenta", tipo2, cuenta), valor)
+        for periodicidad in ("anual", "trimestral", "mensual"):
+            sumar((periodicidad, tipo2, _etiqueta_periodo(fecha, periodicidad)), valor)
+        sumar(("cuenta mensual", tipo2, cuenta, _etiqueta_periodo(fecha, "mensual")), valor)
+    return totales
+
+
+def _utilidad_neta_por_lineas(totales, anio):
+    """Utilidad neta como la calculaba reportes antes de llevar el signo a SQL."""
+    from dinero import porcentaje
+    from reportes import TASA_ISR
+    ventas = costo = gastos = ingresos = 0
+    for clave, valor in totales.items():
+        if clave[0] != "anual" or clave[2] != str(anio):
+            continue
+        tl = clave[1].lower()
+        if 'ventas' in tl:
+            ventas += valor
+        elif 'costo de venta' in tl:
+            costo += valor
+        elif 'gasto' in tl:
+            gastos -= valor
+        elif 'ingreso' in tl:
+            ingresos -= valor
+    raw_uti = ventas + costo - gastos + ingresos
+    return raw_uti - porcentaje(raw_uti, TASA_ISR) if raw_uti > 0 else raw_uti
+
+
+def bench_agregados(args):
+    """Totales con signo por tipo, cuenta y periodo: GROUP BY en SQL vs. bucle por líneas en Python."""
+    import basedatos
+    import reportes
+    ruta = _base_temporal()
+    desde, hasta = "2020-01-01", "2025-12-31"
+    try:
+        conn = crear_base(ruta, args.partidas)
+        aplicar_migraciones(conn)
+        basedatos.configurar(ruta)
+
+        def por_sql():
+            totales = {}
+            for (tipo2,), valor in basedatos.totales_con_signo(desde, hasta).items():
+                totales[("tipo", tipo2)] = valor
+            for (tipo2, cuenta), valor in basedatos.totales_con_signo(desde, hasta, por_cuenta=True).items():
+                totales[("cuenta", tipo2, cuenta)] = valor
+            for periodicidad in ("anual", "trimestral", "mensual"):
+                for clave, valor in basedatos.totales_con_signo(desde, hasta, periodicidad=periodicidad).items():
+                    totales[(periodicidad,) + clave] = valor
+            for clave, valor in basedatos.totales_con_signo(desde, hasta, por_cuenta=True,
+                                                           periodicidad="mensual").items():
+                totales[("cuenta mensual",) + clave] = valor
+            return totales
+
+        t_python = _cronometrar(lambda: _totales_por_lineas(conn, desde, hasta))
+        t_sql = _cronometrar(por_sql)
+        referencia = _totales_por_lineas(conn, desde, hasta)
+        agregados = por_sql()
+        diferencias = [k for k in referencia.keys() | agregados.keys()
+                       if referencia.get(k, 0) != agregados.get(k, 0)]
+        # Los reportes que usan los agregados dan lo mismo que la referencia
+        for anio in range(2020, 2026):
+            if reportes._utilidad_neta_anio(anio) != _utilidad_neta_por_lineas(referencia, anio):
+                diferencias.append(("utilidad neta", anio))
+            lista = reportes.periodos(date(anio, 12, 31), 4, "trimestral")
+            for periodo, conceptos in zip(lista, reportes.resultados_por_periodo(lista, "trimestral")):
+                esperados = reportes._conceptos_resultados(
+                    *(referencia.get(("trimestral", tipo, periodo.etiqueta), 0)
+                      for tipo in reportes.TIPOS_RESULTADOS))
+                if conceptos != esperados:
+                    diferencias.append(("estado de resultados", periodo.etiqueta))
+        conn.close()
+        basedatos.cerrar()
+    finally:
+        for sufijo in ("", "-wal", "-shm"):
+            if os.path.exists(ruta + sufijo):
+                os.remove(ruta + sufijo)
+    print(f"líneas: {args.partidas * 2}   totales comparados: {len(referencia)}")
+    print(f"bucle Python por líneas {t_python * 1000:9.2f} ms")
+    print(f"GROUP BY en SQL         {t_sql * 1000:9.2f} ms   ({t_python / t_sql:.1f}x)")
+    print(f"diferencias: {len(diferencias)}" + (f"  p. ej. {sorted(map(repr, diferencias))[:5]}"
+                                                if diferencias else ""))
+    return 0 if not diferencias else 1
+
+
+def bench_balance_incremental(args):
+    """Balance de saldos por mes: cálculo completo vs. aplicar solo los cambios del diario."""
+    import basedatos
+    import cache_reportes
+    import jerarquia
+    import reportes
+    from saldos_incrementales import BalanceSaldosIncremental
+    ruta = _base_temporal()
+    rnd = random.Random(11)
+    meses = [(2025, m) for m in range(1, 13)]
+
+    def plano(arbol):
+        return [(nivel, n.clave, n.valores) for nivel, n in jerarquia.recorrer(arbol, incluir_raiz=True)]
+
+    def completo(anio, mes):
+        # Caché vacía: el camino anterior recalculaba todo cada vez
+        cache_reportes.configurar()
+        return reportes.arbol_balance_saldos(anio, mes)
+
+    try:
+        conn = crear_base(ruta, args.partidas)
+        aplicar_migraciones(conn)
+        conn.close()
+        basedatos.configurar(ruta)
+        incremental = BalanceSaldosIncremental()
+        t_primero = _cronometrar(lambda: [incremental.arbol(a, m) for a, m in meses], 1) / len(meses)
+        t_completo = _cronometrar(lambda: [completo(a, m) for a, m in meses], 1) / len(meses)
+        t_sin_cambios = _cronometrar(lambda: [incremental.arbol(a, m) for a, m in meses], 1) / len(meses)
+        diferencias = 0
+        t_cambios = 0
+        for ronda in range(5):
+            # Unas partidas nuevas y otras eliminadas, antes y dentro del año
+            for _ in range(3):
+                debe, haber = rnd.sample(CUENTAS_DEMO, 2)
+                fecha = date(rnd.choice([2024, 2025]), rnd.randint(1, 12), rnd.randint(1, 28)).isoformat()
+                monto = f"{rnd.uniform(1, 5000):.2f}"
+                basedatos.guardar_partida(fecha, f"Ronda {ronda}", [
+                    (debe[0], monto, "Debe", debe[1]), (haber[0], monto, "Haber", haber[1])])
+            for _ in range(3):
+                partida = basedatos.buscar_partida(rnd.randint(1, args.partidas))
+                if partida is not None:
+                    basedatos.eliminar_partida(partida.id)
+            for anio, mes in meses:
+                t0 = time.perf_counter()
+                arbol = incremental.arbol(anio, mes)
+                t_cambios += time.perf_counter() - t0
+                if plano(arbol) != plano(completo(anio, mes)):
+                    diferencias += 1
+        t_cambios /= 5 * len(meses)
+        basedatos.cerrar()
+    finally:
+        for sufijo in ("", "-wal", "-shm"):
+            if os.path.exists(ruta + sufijo):
+                os.remove(ruta + sufijo)
+    print(f"líneas: {args.partidas * 2}   meses: {len(meses)}   "
+          f"cálculos completos: {incremental.completos}   incrementales: {incremental.incrementales}")
+    print(f"cálculo completo          {t_completo * 1000:8.2f} ms por mes")
+    print(f"incremental, primera vez  {t_primero * 1000:8.2f} ms por mes")
+    print(f"incremental, sin cambios  {t_sin_cambios * 1000:8.2f} ms por mes")
+    print(f"incremental, tras escribir {t_cambios * 1000:7.2f} ms por mes")
+    print(f"meses distintos del cálculo completo: {diferencias}")
+    return 0 if diferencias == 0 and t_cambios < t_completo else 1
+
+
+def _ediciones(rnd, lineas, fecha):
+    """Una corrección al azar de una partida: monto, cuenta, línea de más o fecha."""
+    lineas = [list(l) for l in lineas]
+    cambio = rnd.choice(["monto", "cuenta", "linea", "fecha"])
+    if cambio == "monto":
+        extra = f"{rnd.uniform(1, 100):.2f}"
+        for linea in lineas:
+            linea[1] = str(linea[1] + type(linea[1])(extra))
+    elif cambio == "cuenta":
+        cuenta, tipo2 = rnd.choice(CUENTAS_DEMO)
+        lineas[0][0], lineas[0][3] = cuenta, tipo2
+    elif cambio == "linea":
+        monto = lineas[0][1]
+        lineas[0][1] = round(monto / 2, 2)
+        cuenta, tipo2 = rnd.choice(CUENTAS_DEMO)
+        lineas.append([cuenta, monto - lineas[0][1], lineas[0][2], tipo2])
+    else:
+        fecha = (date.fromisoformat(fecha) + timedelta(days=rnd.randint(1, 40))).isoformat()
+    return fecha, [tuple(map(str, l[:2])) + tuple(l[2:]) for l in lineas]
+
+
+def bench_edicion(args):
+    """Corregir partidas: actualizar solo lo que cambió vs. eliminar y volver a guardar."""
+    import basedatos
+    from saldos_incrementales import BalanceSaldosIncremental
+    ruta = _base_temporal()
+    rnd = random.Random(5)
+    ediciones = 300
+    try:
+        conn = crear_base(ruta, args.partidas)
+        aplicar_migraciones(conn)
+        conn.close()
+        basedatos.configurar(ruta)
+        incremental = BalanceSaldosIncremental()
+        for mes in range(1, 13):
+            incremental.saldos(2025, mes)
+        resultados = {}
+        for modo in ("actualizar", "eliminar y guardar"):
+            elegidas = random.Random(3).sample(range(1, args.partidas + 1), ediciones)
+            primer_cambio = basedatos.ultimo_cambio()
+            t0 = time.perf_counter()
+            for correlativo in elegidas:
+                partida = basedatos.buscar_partida(correlativo)
+                if partida is None:
+                    continue
+                fecha, entradas = _ediciones(rnd, basedatos.lineas_partida(partida.id), partida.fecha)
+                if modo == "actualizar":
+                    basedatos.actualizar_partida(partida.id, fecha, partida.descripcion, entradas)
+                else:
+                    basedatos.eliminar_partida(partida.id)
+                    basedatos.guardar_partida(fecha, partida.descripcion, entradas)
+            resultados[modo] = (time.perf_counter() - t0, basedatos.ultimo_cambio() - primer_cambio)
+        # saldos_diarios mantenido con diferencias == reconstruido desde el diario
+        conn = basedatos.conexion()
+        consulta = "SELECT * FROM saldos_diarios ORDER BY cuenta_id, fecha"
+        mantenido = conn.execute(consulta).fetchall()
+        basedatos.reconstruir_saldos_diarios()
+        reconstruido = conn.execute(consulta).fetchall()
+        # El balance incremental, que solo lee el registro de cambios, también coincide
+        distintos = 0
+        for mes in range(1, 13):
+            completo = BalanceSaldosIncremental().saldos(2025, mes)
+            distintos += incremental.saldos(2025, mes) != completo
+        basedatos.cerrar()
+    finally:
+        for sufijo in ("", "-wal", "-shm"):
+            if os.path.exists(ruta + sufijo):
+                os.remove(ruta + sufijo)
+    for modo, (segundos, cambios) in resultados.items():
+        print(f"{modo:20s} {segundos * 1000 / ediciones:7.2f} ms por partida   "
+              f"{cambios / ediciones:5.1f} filas en el registro de cambios por partida")
+    print(f"saldos_diarios == reconstruido: {mantenido == reconstruido}   "
+          f"meses del balance incremental distintos: {distintos}")
+    return 0 if mantenido == reconstruido and distintos == 0 else 1
+
+
+PALABRAS_DESCRIPCION = ["Pago", "de", "factura", "compra", "venta", "planilla", "alquiler", "oficina",
+                        "energía", "eléctrica", "depósito", "cheque", "proveedor", "cliente", "servicios",
+                        "mantenimiento", "vehículo", "combustible", "anticipo", "intereses"]
+
+
+def _coincide(consulta, texto):
+    """Referencia de la búsqueda FTS: cada palabra de la consulta es prefijo de alguna del texto."""
+    import re
+    from busqueda import normalizar
+    palabras = re.findall(r"\w+", normalizar(texto))
+    return all(any(p.startswith(q) for p in palabras) for q in re.findall(r"\w+", normalizar(consulta)))
+
+
+def bench_diario(args):
+    """Libro diario con filtros: páginas por llave (fecha, correlativo) vs. filtrar todo en Python."""
+    import basedatos
+    ruta = _base_temporal()
+    rnd = random.Random(3)
+    try:
+        conn = crear_base(ruta, args.partidas)
+        # Descripciones variadas; una palabra rara en pocas partidas
+        conn.executemany("UPDATE partidas SET descripcion = ? WHERE id = ?", [
+            (" ".join(rnd.sample(PALABRAS_DESCRIPCION, 4)) + (" Zanahoria" if i % 50000 == 0 else ""), i)
+            for i in range(1, args.partidas + 1)])
+        conn.commit()
+        t0 = time.perf_counter()
+        aplicar_migraciones(conn)
+        t_migracion = time.perf_counter() - t0
+        conn.close()
+        basedatos.configurar(ruta)
+        consultas = [
+            ("todas", {}),
+            ("un mes", {"desde": "2023-05-01", "hasta": "2023-05-31"}),
+            ("texto común 'pago'", {"texto": "pago"}),
+            ("texto raro 'zanahoria'", {"texto": "zanahoria"}),
+            ("texto de cuenta 'prestamos'", {"texto": "prestamos"}),
+            ("prefijos 'energ elec'", {"texto": "energ elec"}),
+            ("cuenta Caja", {"cuenta": "Caja"}),
+            ("monto 1000-1010", {"monto_min": "1000", "monto_max": "1010"}),
+            ("texto + cuenta + año", {"texto": "factura", "cuenta": "Bancos",
+                                      "desde": "2024-01-01", "hasta": "2024-12-31"}),
+            ("recientes primero", {"descendente": True}),
+        ]
+        # Referencia: todas las partidas en memoria, filtradas en Python
+        t0 = time.perf_counter()
+        todas = {}
+        for pid, fecha, corr, desc, cuenta, monto, tipo in basedatos.conexion().execute("""
+                SELECT p.id, p.fecha, p.correlativo, p.descripcion, c.cuenta, c.monto, c.tipo
+                FROM partidas p JOIN cuentas c ON c.partida_id = p.id"""):
+            fila = todas.setdefault(pid, [fecha, corr, desc, [], []])
+            fila[3].append(cuenta)
+            fila[4].append(monto)
+        t_carga = time.perf_counter() - t0
+
+        def referencia(f):
+            res = []
+            for pid, (fecha, corr, desc, cuentas, montos) in todas.items():
+                if f.get("desde") and fecha < f["desde"] or f.get("hasta") and fecha > f["hasta"]:
+                    continue
+                if f.get("cuenta") and f["cuenta"] not in cuentas:
+                    continue
+                if "monto_min" in f and not any(int(f["monto_min"]) * 100 <= m <= int(f["monto_max"]) * 100
+                                                for m in montos):
+                    continue
+                if f.get("texto") and not (_coincide(f["texto"], desc) or
+                                           any(_coincide(f["texto"], c) for c in cuentas)):
+                    continue
+                res.append((fecha, corr))
+            res.sort(reverse=f.get("descendente", False))
+            return res
+
+        distintas = 0
+        print(f"líneas: {args.partidas * 2}   índices FTS en la migración: {t_migracion * 1000:.0f} ms   "
+              f"cargar todo para filtrar en Python: {t_carga * 1000:.0f} ms")
+        for nombre, filtros in consultas:
+            llaves = []
+
+            def paginas():
+                llave = None
+                for _ in range(5):
+                    filas, llave = basedatos.pagina_diario(despues=llave, limite=100, **filtros)
+                    llaves.append([(f.fecha, f.correlativo) for f in filas])
+                    if len(filas) < 100:
+                        break
+            t_primera = _cronometrar(lambda: basedatos.pagina_diario(limite=100, **filtros))
+            llaves.clear()
+            t_paginas = _cronometrar(lambda: (llaves.clear(), paginas()))
+            t_python = _cronometrar(lambda: referencia(filtros), 1)
+            obtenidas = [k for pagina in llaves for k in pagina]
+            esperadas = referencia(filtros)[:len(obtenidas) if len(obtenidas) >= 500 else None]
+            if obtenidas != esperadas:
+                distintas += 1
+            print(f"{nombre:28s} 1a página {t_primera * 1000:7.2f} ms   5 páginas {t_paginas * 1000:7.2f} ms   "
+                  f"Python {t_python * 1000:7.0f} ms   filas {len(obtenidas)}"
+                  + ("" if obtenidas == esperadas else "   DISTINTAS"))
+        basedatos.cerrar()
+    finally:
+        for sufijo in ("", "-wal", "-shm"):
+            if os.path.exists(ruta + sufijo):
+                os.remove(ruta + sufijo)
+    return 0 if distintas == 0 else 1
+
+
+def bench_mayor(args):
+    """Libro mayor por cada columna: primera página vs. página 30 y comparación con Python."""
+    import basedatos
+    from dinero import a_decimal
+    ruta = _base_temporal()
+    try:
+        crear_base(ruta, args.partidas).close()
+        basedatos.configurar(ruta)
+        lineas = basedatos.conexion().execute("""
+            SELECT c.id, c.cuenta_id, c.cuenta, p.fecha, p.correlativo, p.descripcion, c.tipo, c.monto,
+                   c.partida_id, p.id
+            FROM cuentas c JOIN partidas p ON p.id = c.partida_id""").fetchall()
+        # Referencia: saldo corrido de cada línea en orden cronológico de su cuenta
+        saldos, acumulado = {}, {}
+        for f in sorted(lineas, key=lambda f: (f[1], f[3], f[4], f[0])):
+            acumulado[f[1]] = acumulado.get(f[1], 0) + (f[7] if f[6] == 'Debe' else -f[7])
+            saldos[f[0]] = acumulado[f[1]]
+        llaves = {
+            0: lambda f: (f[2], f[8], f[0]),
+            1: lambda f: (f[3], f[4], f[0]),
+            2: lambda f: (f[4], f[0]),
+            3: lambda f: (f[5], f[9], f[0]),
+            4: lambda f: (f[7] if f[6] == 'Debe' else 0, f[8], f[0]),
+            5: lambda f: (0 if f[6] == 'Debe' else f[7], f[8], f[0]),
+        }
+        columnas = ["Cuenta", "Fecha", "Correlativo", "Descripción", "Debe", "Haber"]
+        distintas = 0
+        print(f"líneas: {len(lineas)}")
+        for cuenta in (None, "Caja"):
+            for orden, llave_ref in llaves.items():
+                for descendente in (False, True):
+                    obtenidas, tiempos, llave = [], [], None
+                    for _ in range(30):
+                        t0 = time.perf_counter()
+                        filas, llave = basedatos.pagina_libro_mayor(cuenta, orden, descendente, llave)
+                        tiempos.append(time.perf_counter() - t0)
+                        obtenidas.extend(filas)
+                        if len(filas) < 200:
+                            break
+                    esperadas = sorted((f for f in lineas if cuenta is None or f[2] == cuenta),
+                                       key=llave_ref, reverse=descendente)[:len(obtenidas)]
+                    esperadas = [basedatos.LineaMayor(f[2], f[3], f[4], f[5], f[6], a_decimal(f[7]),
+                                                      a_decimal(saldos[f[0]])) for f in esperadas]
+                    iguales = obtenidas == esperadas
+                    distintas += not iguales
+                    print(f"{cuenta or 'Todas':6s} {columnas[orden]:12s} "
+                          f"{'desc' if descendente else 'asc ':4s}  1a página {tiempos[0] * 1000:7.2f} ms   "
+                          f"página {len(tiempos)} {tiempos[-1] * 1000:7.2f} ms"
+                          + ("" if iguales else "   DISTINTAS"))
+        basedatos.cerrar()
+    finally:
+        for sufijo in ("", "-wal", "-shm"):
+            if os.path.exists(ruta + sufijo):
+                os.remove(ruta + sufijo)
+    return 0 if distintas == 0 else 1
+
+
+BENCHMARKS = {
+    "indices": bench_indices,
+    "saldos": bench_saldos,
+    "importacion": bench_importacion,
+    "exportacion": bench_exportacion,
+    "clasificacion": bench_clasificacion,
+    "busqueda": bench_busqueda,
+    "centavos": bench_centavos,
+    "correlativos": bench_correlativos,
+    "cache": bench_cache,
+    "arranque": bench_arranque,
+    "tablas": bench_tablas,
+    "agregados": bench_agregados,
+    "balance_incremental": bench_balance_incremental,
+    "edicion": bench_edicion,
+    "diario": bench_diario,
+    "mayor": bench_mayor,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del sistema contable")
+    parser.add_argument("nombre", choices=sorted(BENCHMARKS))
+    parser.add_argument("--partidas", type=int, default=100000)
+    args = parser.parse_args(argv)
+    return BENCHMARKS[args.nombre](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""Búsqueda de nombres de cuenta en memoria.
+
+Los nombres del catálogo se cargan una vez y se indexan normalizados (sin
+tildes ni mayúsculas) por prefijo (lista ordenada, bisect) y por trigramas.
+Los resultados se ordenan por tipo de coincidencia: exacta, prefijo del
+nombre, prefijo de una palabra (o de varias, en cualquier orden), subcadena
+y, al final, la misma búsqueda con las palabras desconocidas
+corregidas (coeficiente de Dice sobre trigramas del vocabulario, tolera
+errores de tipeo). Dentro de cada tipo, en orden alfabético.
+"""
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+
+import basedatos
+
+LIMITE = 50
+# Proporción mínima de trigramas en común para una coincidencia aproximada
+SIMILITUD_MINIMA = 0.45
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes y con espacios simples: 'Vehículos ' -> 'vehiculos'."""
+    sin_tildes = unicodedata.normalize("NFKD", texto)
+    sin_tildes = "".join(c for c in sin_tildes if not unicodedata.combining(c))
+    return " ".join(sin_tildes.lower().split())
+
+
+def trigramas(texto):
+    relleno = f"  {texto} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+class IndiceCuentas:
+    def __init__(self, nombres=()):
+        self.nombres = []           # nombre original por posición
+        self._normales = []         # nombre normalizado por posición
+        self._posicion = {}         # nombre original -> posición
+        self._completos = []        # (nombre normalizado, posición), ordenada
+        self._palabras = []         # (palabra, nombre normalizado, posición), ordenada
+        self._trigramas = {}        # trigrama -> set de posiciones
+        self._vocabulario = []      # palabras distintas, ordenada
+        self._trigramas_vocabulario = {}    # trigrama -> set de palabras
+        self.agregar(nombres)
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def agregar(self, nombres):
+        completos, palabras, vocabulario = [], [], set()
+        for nombre in nombres:
+            if nombre in self._posicion:
+                continue
+            pos = len(self.nombres)
+            normal = normalizar(nombre)
+            self._posicion[nombre] = pos
+            self.nombres.append(nombre)
+            self._normales.append(normal)
+            completos.append((normal, pos))
+            for palabra in set(normal.split()):
+                palabras.append((palabra, normal, pos))
+                vocabulario.add(palabra)
+            for tri in trigramas(normal):
+                self._trigramas.setdefault(tri, set()).add(pos)
+        vocabulario = [p for p in vocabulario if not self._existe(p)]
+        for palabra in vocabulario:
+            for tri in trigramas(palabra):
+                self._trigramas_vocabulario.setdefault(tri, set()).add(palabra)
+        for lista, nuevas in ((self._completos, completos), (self._palabras, palabras),
+                              (self._vocabulario, vocabulario)):
+            if len(nuevas) < 8:
+                for entrada in nuevas:
+                    insort(lista, entrada)
+            else:
+                # Timsort aprovecha que la parte ya indexada está ordenada
+                lista.extend(nuevas)
+                lista.sort()
+
+    def _existe(self, palabra):
+        i = bisect_left(self._vocabulario, palabra)
+        return i < len(self._vocabulario) and self._vocabulario[i] == palabra
+
+    def _es_prefijo(self, palabra):
+        i = bisect_left(self._vocabulario, palabra)
+        return i < len(self._vocabulario) and self._vocabulario[i].startswith(palabra)
+
+    def _cuantas(self, palabra):
+        """Cuántas entradas de self._palabras empiezan con 'palabra'."""
+        return (bisect_left(self._palabras, (palabra + "\uffff",))
+                - bisect_left(self._palabras, (palabra,)))
+
+    @staticmethod
+    def _rango_prefijo(lista, consulta):
+        """Entradas de la lista ordenada cuyo primer campo empieza con 'consulta'."""
+        i = bisect_left(lista, (consulta,))
+        while i < len(lista) and lista[i][0].startswith(consulta):
+            yield lista[i]
+            i += 1
+
+    def _corregir(self, palabra):
+        """Palabra del vocabulario más parecida (coeficiente de Dice sobre trigramas)."""
+        tris = trigramas(palabra)
+        conteo = Counter()
+        for tri in tris:
+            conteo.update(self._trigramas_vocabulario.get(tri, ()))
+        mejor = None
+        for candidata, comunes in conteo.items():
+            dice = 2 * comunes / (len(tris) + len(candidata) + 1)
+            if dice >= SIMILITUD_MINIMA and (mejor is None or (-dice, candidata) < mejor):
+                mejor = (-dice, candidata)
+        return mejor and mejor[1]
+
+    def _coincidencias(self, consulta, aproximada=True):
+        """Posiciones que coinciden con 'consulta', de la mejor coincidencia a la peor.
+
+        Es un generador: cada tipo de coincidencia sale de su índice ya en orden
+        alfabético, así que quien lo consume puede detenerse al tener suficientes.
+        """
+        normales = self._normales
+        palabras = consulta.split()
+        # Exacta y prefijo del nombre completo (la exacta es la primera del rango)
+        for _, pos in self._rango_prefijo(self._completos, consulta):
+            yield pos
+        # Prefijo de cualquier palabra del nombre
+        if len(palabras) == 1:
+            for _, _, pos in self._rango_prefijo(self._palabras, consulta):
+                yield pos
+        if len(palabras) > 1:
+            # Todas las palabras como prefijos, en cualquier orden; se recorre la menos frecuente
+            guia = min(range(len(palabras)), key=lambda i: self._cuantas(palabras[i]))
+            otras = palabras[:guia] + palabras[guia + 1:]
+            for _, normal, pos in self._rango_prefijo(self._palabras, palabras[guia]):
+                propias = normal.split()
+                if all(any(w.startswith(p) for w in propias) for p in otras):
+                    yield pos
+        if len(consulta) >= 3:
+            # Subcadena: solo pueden serlo los nombres que tienen todos sus trigramas
+            internos = [self._trigramas.get(consulta[i:i + 3], set()) for i in range(len(consulta) - 2)]
+            candidatos = set.intersection(*sorted(internos, key=len))
+            yield from sorted((pos for pos in candidatos if consulta in normales[pos]),
+                              key=normales.__getitem__)
+        if aproximada:
+            # Errores de tipeo: cada palabra desconocida se cambia por la más parecida
+            corregidas = [p if self._es_prefijo(p) else self._corregir(p) for p in palabras]
+            if None not in corregidas and corregidas != palabras:
+                yield from self._coincidencias(" ".join(corregidas), aproximada=False)
+
+    def buscar(self, texto, limite=LIMITE):
+        """Nombres que coinciden con 'texto', los mejores primero."""
+        consulta = normalizar(texto)
+        if not consulta:
+            return []
+        elegidas, vistas = [], set()
+        for pos in self._coincidencias(consulta):
+            if pos not in vistas:
+                vistas.add(pos)
+                elegidas.append(pos)
+                if len(elegidas) >= limite:
+                    break
+        return [self.nombres[pos] for pos in elegidas]
+
+
+# Índice por base de datos; se completa con las cuentas nuevas del catálogo
+_indices = {}
+_lock = threading.Lock()
+
+
+def indice_cuentas():
+    """Índice de la base de datos actual, al día con el catálogo."""
+    ruta = basedatos.ruta_db()
+    with _lock:
+        indice, ultimo_id = _indices.get(ruta, (None, 0))
+        nuevas = basedatos.cuentas_catalogo_desde(ultimo_id)
+        if indice is None:
+            indice = IndiceCuentas()
+        if nuevas:
+            indice.agregar(nombre for _, nombre in nuevas)
+            ultimo_id = nuevas[-1][0]
+        _indices[ruta] = (indice, ultimo_id)
+        return indice
+
+
+def indice_listo():
+    """Índice de la base actual si ya está construido, o None sin esperar.
+
+    Si otro hilo lo está armando también devuelve None; las cuentas nuevas
+    del catálogo sí se agregan aquí (son pocas).
+    """
+    if not _lock.acquire(blocking=False):
+        return None
+    try:
+        listo = basedatos.ruta_db() in _indices
+    finally:
+        _lock.release()
+    return indice_cuentas() if listo else None
+
+
+def calentar(trabajo=None):
+    """Construye o pone al día el índice; para trabajos.ejecutar al abrir una pantalla."""
+    indice_cuentas()
+
+
+def buscar_cuentas(texto, limite=LIMITE, esperar=True):
+    """Nombres que coinciden con 'texto'.
+
+    Con esperar=False no arma el índice (en el hilo de la interfaz tarda
+    segundos con catálogos grandes): mientras no esté listo busca con LIKE
+    en el catálogo, sin tolerancia a errores de tipeo.
+    """
+    indice = indice_cuentas() if esperar else indice_listo()
+    if indice is None:
+        return basedatos.nombres_cuentas(texto.strip())[:limite]
+    return indice.buscar(texto, limite)
+
+
+if __name__ == "__main__":
+    import sys
+    for consulta in sys.argv[1:] or ["veh", "vehiculo", "prestamo", "iva"]:
+        print(consulta, "->", buscar_cuentas(consulta))
@@ -0,0 +1,173 @@
+"""Caché de resultados de reportes.
+
+La clave es (base de datos, reporte, parámetros) y cada resultado se guarda
+junto con basedatos.version_datos(). Toda escritura sube esa versión, así que
+un resultado de otra versión simplemente deja de encontrarse: no hay que
+invalidar a mano. Hay un nivel en memoria (LRU) y otro opcional en disco
+(pickle, un archivo por clave) que sobrevive entre ejecuciones.
+
+Los resultados se comparten entre pantallas: quien los reciba no debe
+modificarlos.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+import basedatos
+
+CAPACIDAD = 64
+ARCHIVOS_EN_DISCO = 256
+# Sube si cambia la forma de los resultados, para no leer archivos viejos
+FORMATO = 1
+CARPETA_USUARIO = os.path.join(os.path.expanduser("~"), ".contabilidad", "cache")
+
+_FALTA = object()
+
+
+class CacheReportes:
+    def __init__(self, capacidad=CAPACIDAD, carpeta=None, max_archivos=ARCHIVOS_EN_DISCO):
+        self.capacidad = capacidad
+        self.carpeta = carpeta
+        self.max_archivos = max_archivos
+        self.aciertos = 0
+        self.fallos = 0
+        self._memoria = OrderedDict()      # (clave, versión) -> resultado
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, version, construir):
+        """Resultado de 'clave' en 'version'; si no está guardado se llama a construir()."""
+        completa = (clave, version)
+        with self._lock:
+            if completa in self._memoria:
+                self._memoria.move_to_end(completa)
+                self.aciertos += 1
+                return self._memoria[completa]
+        valor = self._leer(clave, version)
+        if valor is _FALTA:
+            valor = construir()
+            self._escribir(clave, version, valor)
+            with self._lock:
+                self.fallos += 1
+        else:
+            with self._lock:
+                self.aciertos += 1
+        with self._lock:
+            self._memoria[completa] = valor
+            while len(self._memoria) > self.capacidad:
+                self._memoria.popitem(last=False)
+        return valor
+
+    def limpiar(self):
+        """Vacía la memoria y borra los archivos del disco."""
+        with self._lock:
+            self._memoria.clear()
+        for ruta in self._archivos():
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+
+    # --- Nivel en disco: un archivo por clave con (clave, versión, resultado) ---
+
+    def _archivo(self, clave):
+        resumen = hashlib.sha1(repr((FORMATO, clave)).encode("utf-8")).hexdigest()
+        return os.path.join(self.carpeta, resumen + ".pkl")
+
+    def _archivos(self):
+        if not self.carpeta or not os.path.isdir(self.carpeta):
+            return []
+        return [os.path.join(self.carpeta, n) for n in os.listdir(self.carpeta) if n.endswith(".pkl")]
+
+    def _leer(self, clave, version):
+        if not self.carpeta:
+            return _FALTA
+        try:
+            with open(self._archivo(clave), "rb") as f:
+                guardada, guardada_version, valor = pickle.load(f)
+        except Exception:
+            # No existe, está a medio escribir o es de otra versión del programa
+            return _FALTA
+        if guardada != clave or guardada_version != version:
+            return _FALTA
+        return valor
+
+    def _escribir(self, clave, version, valor):
+        if not self.carpeta:
+            return
+        try:
+            os.makedirs(self.carpeta, exist_ok=True)
+            fd, temporal = tempfile.mkstemp(dir=self.carpeta, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((clave, version, valor), f, pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, self._archivo(clave))
+        except Exception:
+            # El disco es solo una ayuda: si falla, el resultado queda en memoria
+            return
+        self._recortar()
+
+    def _recortar(self):
+        """Borra los archivos usados hace más tiempo si hay más de max_archivos."""
+        archivos = self._archivos()
+        if len(archivos) <= self.max_archivos:
+            return
+        fechas = []
+        for ruta in archivos:
+            try:
+                fechas.append((os.path.getmtime(ruta), ruta))
+            except OSError:
+                pass
+        fechas.sort()
+        for _, ruta in fechas[:len(fechas) - self.max_archivos]:
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+
+
+_cache = CacheReportes()
+
+
+def configurar(carpeta=None, capacidad=CAPACIDAD):
+    """Reemplaza la caché del proceso; con 'carpeta' se activa el nivel en disco."""
+    global _cache
+    _cache = CacheReportes(capacidad, carpeta)
+    return _cache
+
+
+def cache():
+    return _cache
+
+
+def en_cache(reporte, parametros, construir):
+    """Resultado de 'reporte' con 'parametros' (tupla) para la base de datos y versión actuales.
+
+    La versión y todas las consultas de construir() salen de la misma foto de
+    la base (basedatos.lectura): una escritura confirmada a mitad de camino no
+    deja guardado bajo la versión vieja un resultado con datos de dos
+    versiones. Por eso construir() no debe escribir.
+    """
+    clave = (os.path.abspath(basedatos.ruta_db()), reporte) + tuple(parametros)
+    with basedatos.lectura():
+        return _cache.obtener(clave, basedatos.version_datos(), construir)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    # reportes importa este módulo por su nombre, no como __main__
+    import cache_reportes
+    import reportes
+    if len(sys.argv) > 1:
+        basedatos.configurar(sys.argv[1])
+    carpeta = tempfile.mkdtemp()
+    for intento in ("sin caché", "memoria", "disco"):
+        if intento == "disco":
+            cache_reportes.configurar(carpeta)
+        elif intento == "sin caché":
+            cache_reportes.configurar(carpeta).limpiar()
+        inicio = time.perf_counter()
+        reportes.balance_general("2025-12-31")
+        print(f"{intento}: {(time.perf_counter() - inicio) * 1000:.2f} ms")
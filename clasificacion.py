@@ -0,0 +1,88 @@
+"""Clasificación de nombres de cuenta por palabras clave.
+
+Un diccionario {categoría: [palabras clave]} se compila una sola vez en un
+autómata de Aho-Corasick, que encuentra todas las palabras clave de un
+nombre en una sola pasada. Gana la primera categoría (en el orden del
+diccionario) con alguna coincidencia, igual que la búsqueda con
+any(k in nombre for k in claves) categoría por categoría.
+"""
+import hashlib
+from collections import deque
+
+
+class Automata:
+    """Autómata de Aho-Corasick: palabras clave -> valor."""
+
+    def __init__(self, claves):
+        self._siguiente = [{}]
+        self._falla = [0]
+        self._salida = [()]
+        for palabra, valor in claves:
+            self._agregar(palabra, valor)
+        self._enlazar()
+
+    def _agregar(self, palabra, valor):
+        estado = 0
+        for letra in palabra:
+            destino = self._siguiente[estado].get(letra)
+            if destino is None:
+                destino = len(self._siguiente)
+                self._siguiente[estado][letra] = destino
+                self._siguiente.append({})
+                self._falla.append(0)
+                self._salida.append(())
+            estado = destino
+        self._salida[estado] += (valor,)
+
+    def _enlazar(self):
+        # Recorrido por niveles: el enlace de falla de un estado es el sufijo
+        # propio más largo que también es prefijo de alguna palabra clave
+        cola = deque(self._siguiente[0].values())
+        while cola:
+            estado = cola.popleft()
+            for letra, destino in self._siguiente[estado].items():
+                cola.append(destino)
+                falla = self._falla[estado]
+                while falla and letra not in self._siguiente[falla]:
+                    falla = self._falla[falla]
+                enlace = self._siguiente[falla].get(letra, 0)
+                self._falla[destino] = enlace if enlace != destino else 0
+                self._salida[destino] += self._salida[self._falla[destino]]
+
+    def buscar(self, texto):
+        """Genera el valor de cada palabra clave que aparece en el texto."""
+        siguiente, falla, salida = self._siguiente, self._falla, self._salida
+        estado = 0
+        for letra in texto:
+            while estado and letra not in siguiente[estado]:
+                estado = falla[estado]
+            estado = siguiente[estado].get(letra, 0)
+            if salida[estado]:
+                yield from salida[estado]
+
+
+class Clasificador:
+    """Diccionario de categorías compilado; sin coincidencias devuelve 'defecto'."""
+
+    def __init__(self, categorias, defecto=None):
+        self.categorias = list(categorias)
+        self.defecto = self.categorias[0] if defecto is None else defecto
+        self._automata = Automata(
+            (clave.lower(), i) for i, claves in enumerate(categorias.values()) for clave in claves)
+
+    def clasificar(self, nombre):
+        indice = min(self._automata.buscar(nombre.lower()), default=None)
+        return self.defecto if indice is None else self.categorias[indice]
+
+
+def huella(*reglas):
+    """Resumen de un conjunto de reglas, para invalidar clasificaciones guardadas."""
+    return hashlib.sha1(repr(reglas).encode("utf-8")).hexdigest()[:16]
+
+
+if __name__ == "__main__":
+    import sys
+    from reportes import clasificar_cuenta
+
+    for nombre in sys.argv[1:] or ["Caja chica", "Prestamo bancario BI", "Reserva legal"]:
+        print(nombre, "->", clasificar_cuenta(nombre, "Activo"), clasificar_cuenta(nombre, "Pasivo"))
@@ -0,0 +1,208 @@
+"""Línea de comandos del sistema contable (sin interfaz gráfica).
+
+    python -m contabilidad report balance --fecha 2026-09-30 --format json
+    python -m contabilidad report resultados --fecha 2026-12-31 --format xlsx \\
+        --db empresa1.db --db empresa2.db --dir cierres/
+    python -m contabilidad report resultados_comparativo --periodos 4 --periodicidad trimestral
+    python -m contabilidad importar historico.csv --db empresa1.db
+    python -m contabilidad catalogo --grupo "Efectivo" --tipo Activo
+    python -m contabilidad catalogo --mover 1.0001 --padre 1.0020
+    python -m contabilidad cierre --periodo 2026-09
+    python -m contabilidad cambios --desde 1200 > cambios.jsonl
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+import basedatos
+import reportes
+
+
+def _nombre_archivo(db, args):
+    empresa = os.path.splitext(os.path.basename(db))[0]
+    return os.path.join(args.dir or "", f"{empresa}_{args.reporte}_{args.fecha}.{args.format}")
+
+
+def comando_report(args):
+    bases = args.db or [basedatos.ruta_db()]
+    if args.salida and len(bases) > 1:
+        print("--salida solo se permite con una base de datos; use --dir", file=sys.stderr)
+        return 2
+    if args.cache:
+        import cache_reportes
+        cache_reportes.configurar(args.cache)
+    errores = 0
+    for db in bases:
+        if not os.path.exists(db):
+            print(f"{db}: no existe", file=sys.stderr)
+            errores += 1
+            continue
+        basedatos.configurar(db)
+        try:
+            reporte = reportes.generar(args.reporte, args.fecha, args.periodos, args.periodicidad)
+            a_consola = (len(bases) == 1 and not args.salida and not args.dir
+                         and args.format in ('json', 'csv'))
+            if a_consola:
+                sys.stdout.write(reportes.a_json(reporte) + "\n" if args.format == 'json'
+                                 else reportes.a_csv(reporte))
+                continue
+            destino = args.salida or _nombre_archivo(db, args)
+            reportes.exportar(reporte, args.format, destino)
+            print(f"{db}: {destino}", file=sys.stderr)
+        except Exception as e:
+            print(f"{db}: error: {e}", file=sys.stderr)
+            errores += 1
+        finally:
+            basedatos.cerrar()
+    return 1 if errores else 0
+
+
+def comando_importar(args):
+    import importacion
+    if args.db:
+        basedatos.configurar(args.db)
+
+    def progreso(partidas, errores):
+        print(f"  {partidas} partidas importadas, {errores} con error", file=sys.stderr)
+
+    resultado = importacion.importar(args.archivo, args.lote, args.validar, progreso)
+    for error in resultado.errores[:args.max_errores]:
+        print(f"fila {error.fila} (partida {error.partida}): {error.mensaje}", file=sys.stderr)
+    if len(resultado.errores) > args.max_errores:
+        print(f"... y {len(resultado.errores) - args.max_errores} errores más", file=sys.stderr)
+    velocidad = resultado.partidas / resultado.segundos if resultado.segundos else 0
+    accion = "validadas" if args.validar else "importadas"
+    print(f"{resultado.partidas} partidas ({resultado.lineas} líneas) {accion} en "
+          f"{resultado.segundos:.2f} s ({velocidad:,.0f} partidas/s); {len(resultado.errores)} con error")
+    return 1 if resultado.errores else 0
+
+
+def comando_catalogo(args):
+    import jerarquia
+    if args.db:
+        basedatos.configurar(args.db)
+    por_codigo = {c.codigo: c for c in basedatos.catalogo_cuentas()}
+    try:
+        padre = None if args.padre in (None, "raiz") else por_codigo[args.padre].id
+        if args.grupo:
+            if not args.tipo:
+                print("--grupo requiere --tipo", file=sys.stderr)
+                return 2
+            basedatos.crear_grupo(args.grupo, args.tipo, padre)
+        elif args.mover:
+            basedatos.asignar_padre(por_codigo[args.mover].id, padre)
+    except KeyError as e:
+        print(f"no existe la cuenta con código {e}", file=sys.stderr)
+        return 1
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    cuentas = {c.id: c for c in basedatos.catalogo_cuentas()}
+    arbol = jerarquia.construir(
+        [(jerarquia.ruta_catalogo(c.id, cuentas), ()) for c in cuentas.values()], "Catálogo", ancho=0)
+    for nivel, nodo in jerarquia.recorrer(arbol):
+        cuenta = cuentas.get(nodo.clave[1]) if nodo.clave[0] == "cuenta" else None
+        print("  " * (nivel - 1) + (f"{cuenta.codigo}  {cuenta.nombre}" if cuenta else nodo.nombre))
+    return 0
+
+
+def comando_cierre(args):
+    if args.db:
+        basedatos.configurar(args.db)
+    try:
+        if args.periodo:
+            cierre = basedatos.cerrar_periodo(args.periodo.year, args.periodo.month)
+            print(f"periodo {cierre.periodo} cerrado hasta {cierre.hasta}", file=sys.stderr)
+        elif args.reabrir:
+            periodo = basedatos.reabrir_ultimo_periodo()
+            print(f"periodo {periodo} reabierto" if periodo else "no hay periodos cerrados",
+                  file=sys.stderr)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    for cierre in basedatos.cierres():
+        print(f"{cierre.periodo}  hasta {cierre.hasta}  (cerrado {cierre.cerrado_en})")
+    return 0
+
+
+def comando_cambios(args):
+    import json
+    if args.db:
+        basedatos.configurar(args.db)
+    seq = args.desde
+    while True:
+        lote = basedatos.cambios_desde(seq, args.lote)
+        if not lote:
+            break
+        for cambio in lote:
+            fila = cambio._asdict()
+            if fila["monto"] is not None:
+                fila["monto"] = str(fila["monto"])
+            print(json.dumps(fila, ensure_ascii=False))
+        seq = lote[-1].seq
+    # El siguiente --desde para seguir leyendo donde quedó esta ejecución
+    print(f"último seq: {seq}", file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="contabilidad", description="Sistema contable")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    rep = sub.add_parser("report", help="genera un reporte")
+    rep.add_argument("reporte", choices=reportes.REPORTES)
+    rep.add_argument("--fecha", default=date.today().isoformat(),
+                     type=lambda s: date.fromisoformat(s).isoformat(),
+                     help="fecha focal AAAA-MM-DD (por defecto hoy)")
+    rep.add_argument("--format", choices=reportes.FORMATOS, default="json")
+    rep.add_argument("--periodos", type=int, default=3,
+                     help="periodos lado a lado en los comparativos (por defecto 3)")
+    rep.add_argument("--periodicidad", choices=reportes.PERIODICIDADES, default="anual",
+                     help="periodos de los comparativos (por defecto anual)")
+    rep.add_argument("--db", action="append",
+                     help="base de datos de la empresa; se puede repetir")
+    rep.add_argument("--salida", help="archivo de salida (una sola base de datos)")
+    rep.add_argument("--dir", help="carpeta de salida, un archivo por base de datos")
+    rep.add_argument("--cache", help="carpeta para guardar los reportes calculados entre ejecuciones")
+    rep.set_defaults(func=comando_report)
+
+    imp = sub.add_parser("importar", help="importa partidas desde CSV o XLSX")
+    imp.add_argument("archivo")
+    imp.add_argument("--db", help="base de datos destino (por defecto contabilidad.db)")
+    imp.add_argument("--lote", type=int, default=5000, help="partidas por transacción")
+    imp.add_argument("--validar", action="store_true", help="solo validar, no escribir")
+    imp.add_argument("--max-errores", type=int, default=50, help="errores a mostrar")
+    imp.set_defaults(func=comando_importar)
+
+    cat = sub.add_parser("catalogo", help="muestra el catálogo de cuentas y arma sus grupos")
+    cat.add_argument("--db", help="base de datos (por defecto contabilidad.db)")
+    cat.add_argument("--grupo", help="nombre de un grupo nuevo")
+    cat.add_argument("--tipo", choices=basedatos.TIPOS_CUENTA, help="tipo del grupo nuevo")
+    cat.add_argument("--mover", metavar="CODIGO", help="cuenta a colgar de --padre")
+    cat.add_argument("--padre", metavar="CODIGO", help="código del grupo padre ('raiz' = ninguno)")
+    cat.set_defaults(func=comando_catalogo)
+
+    cie = sub.add_parser("cierre", help="cierra periodos contables y lista los cerrados")
+    cie.add_argument("--db", help="base de datos (por defecto contabilidad.db)")
+    accion = cie.add_mutually_exclusive_group()
+    accion.add_argument("--periodo", metavar="AAAA-MM", type=lambda s: date.fromisoformat(s + "-01"),
+                        help="cierra hasta el último día de ese mes")
+    accion.add_argument("--reabrir", action="store_true", help="deshace el último cierre")
+    cie.set_defaults(func=comando_cierre)
+
+    cam = sub.add_parser("cambios", help="lista el registro de cambios del diario (una línea JSON por cambio)")
+    cam.add_argument("--db", help="base de datos (por defecto contabilidad.db)")
+    cam.add_argument("--desde", type=int, default=0, help="último seq ya leído (por defecto 0, todo)")
+    cam.add_argument("--lote", type=int, default=1000, help="cambios por consulta")
+    cam.set_defaults(func=comando_cambios)
+
+    args = parser.parse_args(argv)
+    if getattr(args, "dir", None):
+        os.makedirs(args.dir, exist_ok=True)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
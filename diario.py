@@ -0,0 +1,329 @@
+import sys
+import os
+from PyQt6.QtWidgets import (
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
+    QLabel, QPushButton, QTableView, QCheckBox, QDateEdit,
+    QMessageBox, QHeaderView, QLineEdit, QCompleter
+)
+from PyQt6.QtGui import QIcon, QFont
+from PyQt6.QtCore import Qt, QAbstractTableModel, QDate, QModelIndex, QStringListModel, QTimer, pyqtSignal
+import basedatos
+import busqueda
+import trabajos
+from dinero import a_centavos
+
+def resource_path(relative_path):
+    """Obtiene la ruta absoluta del recurso, compatible con PyInstaller."""
+    try:
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath('.')
+    return os.path.join(base_path, relative_path)
+
+
+class ModernButton(QPushButton):
+    def __init__(self, text, color="#004AAD", parent=None):
+        super().__init__(text, parent)
+        self.setStyleSheet(f"""
+            QPushButton {{
+                background-color: {color};
+                color: white;
+                border: none;
+                border-radius: 8px;
+                padding: 12px 25px;
+                font-size: 14px;
+                font-weight: bold;
+            }}
+            QPushButton:hover {{
+                background-color: {color};
+            }}
+        """)
+        self.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.setFixedSize(180, 45)
+
+
+class ModernInput(QLineEdit):
+    def __init__(self, placeholder=""):
+        super().__init__()
+        self.setStyleSheet("""
+            QLineEdit {
+                border: 2px solid #E0E0E0;
+                border-radius: 8px;
+                padding: 10px;
+                font-size: 14px;
+                color: #000000;
+                background-color: #FFFFFF;
+            }
+            QLineEdit:focus {
+                border: 2px solid #004AAD;
+            }
+        """)
+        self.setPlaceholderText(placeholder)
+
+
+def _leer_pagina(trabajo, generacion, filtros, descendente, llave, limite):
+    filas, llave = basedatos.pagina_diario(descendente=descendente, despues=llave, limite=limite, **filtros)
+    return generacion, filas, llave
+
+
+class ModeloDiario(QAbstractTableModel):
+    """Modelo perezoso del libro diario (una fila por partida): trae páginas
+    por llave (fecha, correlativo) a medida que la vista se desplaza. Los
+    filtros y la búsqueda de texto se resuelven en SQL (ver basedatos.pagina_diario)."""
+
+    ENCABEZADOS = ["Fecha", "Correlativo", "Descripción", "Cuentas", "Total"]
+    COL_TOTAL = 4
+    TAM_PAGINA = 200
+
+    # Emitida al llegar la primera página de una carga, con el número de filas
+    cargado = pyqtSignal(int)
+    error = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._filas = []
+        self._filtros = {}
+        self._llave = None
+        self._fin = True
+        self._desc = True
+        self._generacion = 0
+        self._trabajo = None
+
+    def cargar(self, filtros):
+        """Reinicia el modelo con filtros (argumentos de pagina_diario) y pide la primera página."""
+        self.beginResetModel()
+        self._filtros = dict(filtros)
+        self._filas = []
+        self._llave = None
+        self._fin = False
+        self.endResetModel()
+        self._generacion += 1
+        if self._trabajo is not None:
+            self._trabajo.cancelar()
+        self._pedir_pagina()
+
+    def partida(self, fila):
+        return self._filas[fila]
+
+    def _pedir_pagina(self):
+        self._trabajo = trabajos.ejecutar(
+            None, _leer_pagina, self._generacion, self._filtros, self._desc, self._llave, self.TAM_PAGINA,
+            al_terminar=self._pagina_recibida,
+            al_error=lambda mensaje, generacion=self._generacion: self._pagina_fallida(generacion, mensaje))
+
+    def _pagina_recibida(self, resultado):
+        generacion, nuevas, llave = resultado
+        if generacion != self._generacion:
+            return
+        self._trabajo = None
+        self._llave = llave
+        if len(nuevas) < self.TAM_PAGINA:
+            self._fin = True
+        primera = not self._filas
+        if nuevas:
+            inicio = len(self._filas)
+            self.beginInsertRows(QModelIndex(), inicio, inicio + len(nuevas) - 1)
+            self._filas.extend(nuevas)
+            self.endInsertRows()
+        if primera:
+            self.cargado.emit(len(self._filas))
+
+    def _pagina_fallida(self, generacion, mensaje):
+        # El error de una carga ya reemplazada no debe cortar la actual
+        if generacion != self._generacion:
+            return
+        self._trabajo = None
+        self._fin = True
+        self.error.emit(mensaje)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._filas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.ENCABEZADOS)
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self._fin and self._trabajo is None
+
+    def fetchMore(self, parent):
+        if self.canFetchMore(parent):
+            self._pedir_pagina()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        col = index.column()
+        if role == Qt.ItemDataRole.TextAlignmentRole and col == self.COL_TOTAL:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        if role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return None
+        fila = self._filas[index.row()]
+        if col == 0:
+            return fila.fecha
+        if col == 1:
+            return str(fila.correlativo)
+        if col == 2:
+            return fila.descripcion
+        if col == 3:
+            return fila.cuentas
+        return f"Q{fila.total:,.2f}"
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.ENCABEZADOS[section]
+        return super().headerData(section, orientation, role)
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        # La paginación va por (fecha, correlativo): solo cambia la dirección
+        desc = order == Qt.SortOrder.DescendingOrder
+        if desc != self._desc:
+            self._desc = desc
+            if self._filas or not self._fin:
+                self.cargar(self._filtros)
+
+
+class LibroDiario(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Libro Diario")
+        self.setWindowIcon(QIcon(resource_path("icon.ico")))
+        self.setMinimumSize(1100, 750)
+        self.setup_ui()
+        self.preparar_busqueda()
+
+    def setup_ui(self):
+        main_layout = QVBoxLayout()
+
+        header = QHBoxLayout()
+        self.btn_close = ModernButton("Volver al Menú")
+        self.btn_close.clicked.connect(self.volver_menu)
+        title = QLabel("Libro Diario")
+        title.setFont(QFont("Segoe UI", 20, QFont.Weight.Bold))
+        title.setStyleSheet("color: #004AAD;")
+        header.addWidget(self.btn_close)
+        header.addWidget(title)
+        header.addStretch()
+        main_layout.addLayout(header)
+
+        # Filtros
+        grid = QGridLayout()
+        self.texto = ModernInput("Buscar en descripción o cuentas")
+        self.cuenta = ModernInput("Cuenta")
+        # Sugerencias de cuenta del índice en memoria, como en el libro mayor
+        self.completer_model = QStringListModel(self)
+        self.completer = QCompleter(self.completer_model, self)
+        self.completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.cuenta.setCompleter(self.completer)
+        self.cuenta.textEdited.connect(self.sugerir_cuentas)
+        self.chk_desde = QCheckBox("Desde")
+        self.desde = QDateEdit(calendarPopup=True)
+        self.desde.setDate(QDate(QDate.currentDate().year(), 1, 1))
+        self.chk_hasta = QCheckBox("Hasta")
+        self.hasta = QDateEdit(calendarPopup=True)
+        self.hasta.setDate(QDate.currentDate())
+        self.monto_min = ModernInput("Monto mínimo")
+        self.monto_max = ModernInput("Monto máximo")
+        self.btn_buscar = ModernButton("Buscar")
+        self.btn_buscar.clicked.connect(self.buscar)
+        for campo in (self.texto, self.cuenta, self.monto_min, self.monto_max):
+            campo.returnPressed.connect(self.buscar)
+        # La búsqueda de texto corre cuando el usuario deja de escribir
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(300)
+        self.timer.timeout.connect(self.buscar)
+        self.texto.textChanged.connect(self.timer.start)
+
+        grid.addWidget(self.texto, 0, 0, 1, 2)
+        grid.addWidget(self.cuenta, 0, 2, 1, 2)
+        grid.addWidget(self.btn_buscar, 0, 4)
+        grid.addWidget(self.chk_desde, 1, 0)
+        grid.addWidget(self.desde, 1, 1)
+        grid.addWidget(self.chk_hasta, 1, 2)
+        grid.addWidget(self.hasta, 1, 3)
+        grid.addWidget(self.monto_min, 2, 0, 1, 2)
+        grid.addWidget(self.monto_max, 2, 2, 1, 2)
+        main_layout.addLayout(grid)
+
+        # Tabla de partidas (solo se materializan las filas visibles)
+        self.model = ModeloDiario(self)
+        self.model.cargado.connect(self.diario_cargado)
+        self.model.error.connect(lambda e: QMessageBox.critical(self, "Error", e))
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        encabezado = self.table.horizontalHeader()
+        encabezado.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        encabezado.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        encabezado.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
+        encabezado.setSortIndicator(0, Qt.SortOrder.DescendingOrder)
+        self.table.setSortingEnabled(True)
+        self.table.verticalHeader().setDefaultSectionSize(24)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.doubleClicked.connect(self.abrir_partida)
+        main_layout.addWidget(self.table)
+
+        self.estado = QLabel("Doble clic en una partida para abrirla en Partidas Contables.")
+        main_layout.addWidget(self.estado)
+        self.setLayout(main_layout)
+        self.buscar()
+
+    def filtros(self):
+        """Argumentos de basedatos.pagina_diario según el formulario; ValueError si un monto no es válido."""
+        filtros = {"texto": self.texto.text().strip(), "cuenta": self.cuenta.text().strip() or None}
+        if self.chk_desde.isChecked():
+            filtros["desde"] = self.desde.date().toString(Qt.DateFormat.ISODate)
+        if self.chk_hasta.isChecked():
+            filtros["hasta"] = self.hasta.date().toString(Qt.DateFormat.ISODate)
+        for clave, campo in (("monto_min", self.monto_min), ("monto_max", self.monto_max)):
+            if campo.text().strip():
+                a_centavos(campo.text())
+                filtros[clave] = campo.text().strip()
+        return filtros
+
+    def buscar(self):
+        self.timer.stop()
+        try:
+            filtros = self.filtros()
+        except ValueError:
+            QMessageBox.warning(self, "Error", "Monto inválido.")
+            return
+        self.model.cargar(filtros)
+
+    def preparar_busqueda(self):
+        # El índice de cuentas se arma en segundo plano; mientras tanto, o si
+        # falla, las sugerencias salen del LIKE del catálogo
+        trabajos.ejecutar(self, busqueda.calentar, al_error=lambda mensaje: None)
+
+    def sugerir_cuentas(self, texto):
+        self.completer_model.setStringList(
+            busqueda.buscar_cuentas(texto, esperar=False) if texto.strip() else [])
+
+    def actualizar(self):
+        # Al volver del menú se relee la búsqueda actual (pudo haber partidas nuevas)
+        self.preparar_busqueda()
+        self.buscar()
+
+    def diario_cargado(self, filas):
+        # Sin ventana emergente: la búsqueda corre mientras se escribe
+        self.estado.setText("No hay partidas con esos filtros." if filas == 0 else
+                            "Doble clic en una partida para abrirla en Partidas Contables.")
+
+    def abrir_partida(self, index):
+        partida = self.model.partida(index.row())
+        from menu import navegador
+        nav = navegador()
+        ventana = nav.abrir("partidas")
+        nav.show()
+        ventana.buscar_correlativo.setText(str(partida.correlativo))
+        ventana.buscar_partida()
+
+    def volver_menu(self):
+        from menu import volver_al_menu
+        volver_al_menu(self)
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    window = LibroDiario()
+    window.show()
+    sys.exit(app.exec())
@@ -0,0 +1,52 @@
+"""Montos de dinero en centavos enteros.
+
+La base de datos guarda cada monto como un entero de centavos y los reportes
+suman enteros, así que los totales son exactos sin importar cuántas líneas
+se acumulen (con float, 0.1 + 0.2 != 0.3). Hacia afuera los montos se
+entregan como Decimal con dos decimales: se formatean igual que un float
+(f"{monto:,.2f}") y operan entre sí sin perder exactitud.
+"""
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+CENTAVO = Decimal("0.01")
+
+
+def a_centavos(valor):
+    """Monto en quetzales (Decimal, str, int o float) -> entero de centavos.
+
+    Se redondea al centavo (mitad hacia arriba). Los float se leen por su
+    representación decimal más corta: 0.29 es 29 centavos, no 28.
+    """
+    if isinstance(valor, str):
+        valor = valor.strip().lstrip("Q").replace(",", "").strip()
+    elif isinstance(valor, float):
+        valor = repr(valor)
+    try:
+        monto = Decimal(valor)
+    except (InvalidOperation, TypeError):
+        raise ValueError(f"Monto inválido: {valor!r}")
+    if not monto.is_finite():
+        raise ValueError(f"Monto inválido: {valor!r}")
+    return int(monto.quantize(CENTAVO, rounding=ROUND_HALF_UP).scaleb(2))
+
+
+def a_decimal(centavos):
+    """Entero de centavos -> Decimal en quetzales con dos decimales."""
+    return Decimal(centavos).scaleb(-2)
+
+
+def porcentaje(centavos, tasa):
+    """centavos * tasa redondeado al centavo; 'tasa' es un Decimal (p. ej. Decimal('0.25'))."""
+    return int((Decimal(centavos) * tasa).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def formato(centavos, simbolo="Q"):
+    """'Q1,234.56' a partir de centavos."""
+    return f"{simbolo}{a_decimal(centavos):,.2f}"
+
+
+if __name__ == "__main__":
+    import sys
+    for texto in sys.argv[1:] or ["0.1", "Q1,234.565", "0.29"]:
+        centavos = a_centavos(texto)
+        print(texto, "->", centavos, "centavos ->", formato(centavos))
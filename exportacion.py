@@ -1,16 +1,20 @@
 import sys
 import os
-import sqlite3
-import pandas as pd
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
-from reportlab.lib import colors
+import csv
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QDateEdit, QPushButton, QFileDialog, QMessageBox
 )
 from PyQt6.QtGui import QIcon, QFont
 from PyQt6.QtCore import Qt, QDate
+import basedatos
+import trabajos
+
+# Filas leídas por bloque del cursor y filas por tabla del PDF (una página carta)
+TAM_BLOQUE = 5000
+FILAS_POR_TABLA = 34
+# Límite de filas de una hoja de Excel (sin contar el encabezado)
+FILAS_POR_HOJA = 1048575
 
 
 def resource_path(relative_path):
@@ -22,6 +26,142 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+def exportar_xlsx(bloques, destino):
+    """Escribe con xlsxwriter en modo constant_memory: cada fila se vuelca a disco al escribirse."""
+    import xlsxwriter
+    libro = xlsxwriter.Workbook(destino, {'constant_memory': True})
+    hoja, fila = None, FILAS_POR_HOJA
+    try:
+        for bloque in bloques:
+            for linea in bloque:
+                if fila >= FILAS_POR_HOJA:
+                    hoja = libro.add_worksheet()
+                    hoja.write_row(0, 0, basedatos.COLUMNAS_DETALLE)
+                    fila = 0
+                fila += 1
+                hoja.write_row(fila, 0, linea)
+        if hoja is None:
+            libro.add_worksheet().write_row(0, 0, basedatos.COLUMNAS_DETALLE)
+    finally:
+        libro.close()
+
+
+def exportar_csv(bloques, destino):
+    with open(destino, 'w', newline='', encoding='utf-8-sig') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(basedatos.COLUMNAS_DETALLE)
+        for bloque in bloques:
+            escritor.writerows(bloque)
+
+
+def exportar_parquet(bloques, destino):
+    """Escribe un row group de Parquet por bloque (requiere pyarrow)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("La exportación a Parquet requiere instalar pyarrow (pip install pyarrow).")
+    esquema = pa.schema([
+        ('fecha', pa.string()), ('correlativo', pa.int64()), ('descripcion', pa.string()),
+        ('cuenta', pa.string()), ('tipo', pa.string()), ('monto', pa.decimal128(18, 2)),
+    ])
+    with pq.ParquetWriter(destino, esquema) as escritor:
+        for bloque in bloques:
+            columnas = list(zip(*bloque))
+            escritor.write_batch(pa.record_batch(
+                [pa.array(c, type=t) for c, t in zip(columnas, esquema.types)], schema=esquema))
+
+
+class _FlowablesPerezosos(list):
+    """Lista de flowables que se rellena desde un generador a medida que doc.build la consume.
+
+    SimpleDocTemplate.build solo mira el inicio de la lista (len, [0], del [0]), así que
+    basta con mantener un par de tablas cargadas en lugar del documento completo.
+    """
+
+    def __init__(self, generador):
+        super().__init__()
+        self._generador = generador
+
+    def _rellenar(self, minimo):
+        while self._generador is not None and list.__len__(self) < minimo:
+            try:
+                self.append(next(self._generador))
+            except StopIteration:
+                self._generador = None
+
+    def __len__(self):
+        self._rellenar(2)
+        return list.__len__(self)
+
+    def __getitem__(self, i):
+        if isinstance(i, int) and i >= 0:
+            self._rellenar(i + 2)
+        return list.__getitem__(self, i)
+
+
+def _tablas_pdf(bloques):
+    from reportlab.lib import colors
+    from reportlab.platypus import Table, TableStyle
+    estilo = TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#004AAD')),
+        ('TEXTCOLOR',(0,0),(-1,0),colors.white),
+        ('ALIGN',(0,0),(-1,-1),'CENTER'),
+        ('FONTSIZE', (0,0), (-1,-1), 8),
+        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+    ])
+    # Anchos fijos para que las columnas coincidan entre tablas (468 pt útiles en carta)
+    anchos = [60, 50, 150, 105, 40, 63]
+    for bloque in bloques:
+        for i in range(0, len(bloque), FILAS_POR_TABLA):
+            filas = [[f.fecha, f.correlativo, f.descripcion, f.cuenta, f.tipo, f"{f.monto:,.2f}"]
+                     for f in bloque[i:i + FILAS_POR_TABLA]]
+            tabla = Table([basedatos.COLUMNAS_DETALLE] + filas, colWidths=anchos, repeatRows=1)
+            tabla.setStyle(estilo)
+            yield tabla
+
+
+def exportar_pdf(bloques, destino):
+    """Genera el PDF con tablas pequeñas construidas por bloque, nunca una tabla gigante."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate
+    doc = SimpleDocTemplate(destino, pagesize=letter, pageCompression=1)
+    doc.build(_FlowablesPerezosos(_tablas_pdf(bloques)))
+
+
+def exportar_con_avance(trabajo, funcion, desde, hasta, destino):
+    """Corre en un hilo de trabajos: exporta informando las líneas escritas.
+
+    Si se cancela o falla se borra el archivo a medio escribir.
+    """
+    total = basedatos.contar_detalle_partidas(desde, hasta)
+
+    def bloques():
+        hecho = 0
+        for bloque in basedatos.iterar_detalle_partidas(desde, hasta, TAM_BLOQUE):
+            trabajo.avanzar(hecho, total)
+            yield bloque
+            hecho += len(bloque)
+        trabajo.avanzar(hecho, total)
+
+    try:
+        funcion(bloques(), destino)
+    except BaseException:
+        if os.path.exists(destino):
+            os.remove(destino)
+        raise
+    return destino
+
+
+# formato: (título del diálogo, filtro, extensión, función)
+EXPORTADORES = {
+    'xlsx': ("Guardar Excel", "Excel Files (*.xlsx)", '.xlsx', exportar_xlsx),
+    'pdf': ("Guardar PDF", "PDF Files (*.pdf)", '.pdf', exportar_pdf),
+    'csv': ("Guardar CSV", "CSV Files (*.csv)", '.csv', exportar_csv),
+    'parquet': ("Guardar Parquet", "Parquet Files (*.parquet)", '.parquet', exportar_parquet),
+}
+
+
 class ModernButton(QPushButton):
     def __init__(self, text, color="#004AAD", parent=None):
         super().__init__(text, parent)
@@ -44,16 +184,12 @@ class ModernButton(QPushButton):
 class Exportacion(QWidget):
     def __init__(self):
         super().__init__()
-        self.init_db()
         self.setWindowTitle("Exportación de Datos")
         self.setWindowIcon(QIcon(resource_path("icon.ico")))
         self.setMinimumSize(600, 300)
+        self.trabajo = None
         self.setup_ui()
 
-    def init_db(self):
-        db_path = resource_path("contabilidad.db")
-        self.conn = sqlite3.connect(db_path)
-
     def setup_ui(self):
         layout = QVBoxLayout()
         self.btn_volver = ModernButton("Volver al Menú")
@@ -84,10 +220,16 @@ class Exportacion(QWidget):
         self.btn_export_excel.clicked.connect(self.export_excel)
         self.btn_export_pdf = ModernButton("Exportar a PDF", color="#00796B")
         self.btn_export_pdf.clicked.connect(self.export_pdf)
+        self.btn_export_csv = ModernButton("Exportar a CSV", color="#5D4037")
+        self.btn_export_csv.clicked.connect(self.export_csv)
+        self.btn_export_parquet = ModernButton("Exportar a Parquet", color="#455A64")
+        self.btn_export_parquet.clicked.connect(self.export_parquet)
 
         btn_layout.addStretch()
         btn_layout.addWidget(self.btn_export_excel)
         btn_layout.addWidget(self.btn_export_pdf)
+        btn_layout.addWidget(self.btn_export_csv)
+        btn_layout.addWidget(self.btn_export_parquet)
         btn_layout.addWidget(self.btn_volver )
         btn_layout.addStretch()
         layout.addSpacing(20)
@@ -95,67 +237,45 @@ class Exportacion(QWidget):
 
         self.setLayout(layout)
 
-    def fetch_data(self):
+    def rango(self):
         start = self.date_from.date().toString(Qt.DateFormat.ISODate)
         end = self.date_to.date().toString(Qt.DateFormat.ISODate)
-        query = (
-            "SELECT p.fecha, p.correlativo, p.descripcion, c.cuenta, c.tipo, c.monto "
-            "FROM partidas p JOIN cuentas c ON p.id = c.partida_id "
-            "WHERE p.fecha BETWEEN ? AND ? "
-            "ORDER BY p.fecha, p.correlativo"
-        )
-        df = pd.read_sql_query(query, self.conn, params=(start, end))
-        return df
+        return start, end
 
-    def export_excel(self):
-        df = self.fetch_data()
-        if df.empty:
+    def exportar(self, formato):
+        titulo, filtro, ext, funcion = EXPORTADORES[formato]
+        start, end = self.rango()
+        if not basedatos.hay_partidas(start, end):
             QMessageBox.information(self, "Sin Datos", "No hay registros en el rango seleccionado.")
             return
-        fname, _ = QFileDialog.getSaveFileName(
-            self, "Guardar Excel", "", "Excel Files (*.xlsx)"
-        )
+        fname, _ = QFileDialog.getSaveFileName(self, titulo, "", filtro)
         if fname:
-            if not fname.lower().endswith('.xlsx'):
-                fname += '.xlsx'
-            try:
-                df.to_excel(fname, index=False)
-                QMessageBox.information(self, "Éxito", f"Exportado a Excel:\n{fname}")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"No se pudo exportar Excel:\n{e}")
+            if not fname.lower().endswith(ext):
+                fname += ext
+            self.trabajo = trabajos.ejecutar(
+                self, exportar_con_avance, funcion, start, end, fname,
+                al_terminar=lambda destino: QMessageBox.information(
+                    self, "Éxito", f"Exportado a {formato.upper()}:\n{destino}"),
+                al_error=lambda e: QMessageBox.critical(
+                    self, "Error", f"No se pudo exportar {formato.upper()}:\n{e}"),
+                texto=f"Exportando a {formato.upper()}...")
+
+    def export_excel(self):
+        self.exportar('xlsx')
 
     def export_pdf(self):
-        df = self.fetch_data()
-        if df.empty:
-            QMessageBox.information(self, "Sin Datos", "No hay registros en el rango seleccionado.")
-            return
-        fname, _ = QFileDialog.getSaveFileName(
-            self, "Guardar PDF", "", "PDF Files (*.pdf)"
-        )
-        if fname:
-            if not fname.lower().endswith('.pdf'):
-                fname += '.pdf'
-            try:
-                doc = SimpleDocTemplate(fname, pagesize=letter)
-                data = [df.columns.tolist()] + df.values.tolist()
-                table = Table(data, repeatRows=1)
-                style = TableStyle([
-                    ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#004AAD')),
-                    ('TEXTCOLOR',(0,0),(-1,0),colors.white),
-                    ('ALIGN',(0,0),(-1,-1),'CENTER'),
-                    ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-                ])
-                table.setStyle(style)
-                doc.build([table])
-                QMessageBox.information(self, "Éxito", f"Exportado a PDF:\n{fname}")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"No se pudo exportar PDF:\n{e}")
+        self.exportar('pdf')
+
+    def export_csv(self):
+        self.exportar('csv')
+
+    def export_parquet(self):
+        self.exportar('parquet')
+
     def volver_menu(self):
-        # Cierra la ventana actual e importa la ventana del menú principal
-        from menu import MenuApp
-        self.menu = MenuApp()
-        self.menu.show()
-        self.close()
+        # Vuelve a la página del menú; la pantalla queda viva con su estado
+        from menu import volver_al_menu
+        volver_al_menu(self)
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
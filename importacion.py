@@ -0,0 +1,156 @@
+"""Importación masiva de partidas desde CSV o XLSX.
+
+El archivo trae una fila por línea de partida con las columnas
+partida (o correlativo), fecha, descripcion, cuenta, tipo, monto, tipo2.
+Las filas de una misma partida deben venir seguidas. El archivo se lee por
+partes, cada partida se valida con las mismas reglas que el formulario
+(basedatos.validar_partida) y las válidas se escriben por lotes con
+executemany dentro de una transacción por lote. Las partidas con error se
+reportan y se saltan sin detener la importación.
+"""
+import csv
+import os
+import time
+from collections import namedtuple
+from datetime import date, datetime
+
+import basedatos
+from dinero import a_centavos, a_decimal
+
+COLUMNAS = ["partida", "fecha", "descripcion", "cuenta", "tipo", "monto", "tipo2"]
+ALIAS = {"correlativo": "partida", "descripción": "descripcion", "clasificacion": "tipo2"}
+TAM_LOTE = 5000
+
+ErrorImportacion = namedtuple("ErrorImportacion", "fila partida mensaje")
+ResultadoImportacion = namedtuple("ResultadoImportacion", "partidas lineas errores segundos")
+
+_TIPOS = {t.lower(): t for t in basedatos.TIPOS_MOVIMIENTO}
+_TIPOS_CUENTA = {t.lower(): t for t in basedatos.TIPOS_CUENTA}
+
+
+def _filas_csv(ruta):
+    with open(ruta, newline="", encoding="utf-8-sig") as f:
+        lector = csv.reader(f)
+        yield from lector
+
+
+def _filas_xlsx(ruta):
+    from openpyxl import load_workbook
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        for fila in libro.active.iter_rows(values_only=True):
+            yield list(fila)
+    finally:
+        libro.close()
+
+
+def leer_filas(ruta):
+    """Genera (número de fila, dict) sin cargar el archivo completo en memoria."""
+    ext = os.path.splitext(ruta)[1].lower()
+    filas = _filas_xlsx(ruta) if ext in (".xlsx", ".xlsm") else _filas_csv(ruta)
+    encabezado = None
+    for numero, fila in enumerate(filas, start=1):
+        if encabezado is None:
+            encabezado = [ALIAS.get(str(c).strip().lower(), str(c).strip().lower()) if c is not None else ""
+                          for c in fila]
+            faltan = [c for c in COLUMNAS if c not in encabezado]
+            if faltan:
+                raise ValueError(f"Faltan columnas: {', '.join(faltan)}")
+            continue
+        if not any(v not in (None, "") for v in fila):
+            continue
+        yield numero, dict(zip(encabezado, fila))
+
+
+def _texto(valor):
+    return "" if valor is None else str(valor).strip()
+
+
+def _fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return date.fromisoformat(_texto(valor)[:10]).isoformat()
+
+
+def _monto(valor):
+    """Monto en quetzales como Decimal exacto al centavo."""
+    return a_decimal(a_centavos(valor if isinstance(valor, (int, float)) else _texto(valor)))
+
+
+def agrupar_partidas(filas):
+    """Agrupa filas consecutivas con la misma clave de partida.
+
+    Genera (primera fila, clave, fecha, descripcion, entradas, error).
+    """
+    actual = None
+    for numero, fila in filas:
+        clave = _texto(fila.get("partida"))
+        if actual is None or clave != actual[1]:
+            if actual is not None:
+                yield actual
+            actual = [numero, clave, None, _texto(fila.get("descripcion")), [], None]
+            try:
+                actual[2] = _fecha(fila.get("fecha"))
+            except ValueError:
+                actual[5] = "Fecha inválida."
+        if actual[5]:
+            continue
+        try:
+            monto = _monto(fila.get("monto"))
+        except ValueError:
+            actual[5] = f"Fila {numero}: monto inválido."
+            continue
+        tipo = _TIPOS.get(_texto(fila.get("tipo")).lower(), _texto(fila.get("tipo")))
+        tipo2 = _TIPOS_CUENTA.get(_texto(fila.get("tipo2")).lower(), _texto(fila.get("tipo2")))
+        actual[4].append((_texto(fila.get("cuenta")), monto, tipo, tipo2))
+    if actual is not None:
+        yield actual
+
+
+def _escribir_lote(lote):
+    """Escribe un lote de partidas válidas. Devuelve las líneas escritas."""
+    basedatos.guardar_partidas_lote([(fecha, desc, entradas) for _, _, fecha, desc, entradas in lote])
+    return sum(len(p[4]) for p in lote)
+
+
+def importar(ruta, tam_lote=TAM_LOTE, solo_validar=False, progreso=None):
+    """Importa el archivo en la base de datos configurada en basedatos."""
+    inicio = time.perf_counter()
+    errores, lote = [], []
+    partidas = lineas = 0
+
+    def vaciar():
+        nonlocal partidas, lineas
+        if not lote:
+            return
+        if solo_validar:
+            partidas += len(lote)
+            lineas += sum(len(p[4]) for p in lote)
+        else:
+            try:
+                lineas += _escribir_lote(lote)
+                partidas += len(lote)
+            except Exception:
+                # Se reintenta de una en una para aislar la partida que falla
+                for p in lote:
+                    try:
+                        lineas += _escribir_lote([p])
+                        partidas += 1
+                    except Exception as e:
+                        errores.append(ErrorImportacion(p[0], p[1], str(e)))
+        lote.clear()
+        if progreso:
+            progreso(partidas, len(errores))
+
+    for numero, clave, fecha, desc, entradas, error in agrupar_partidas(leer_filas(ruta)):
+        error = error or basedatos.validar_partida(fecha, desc, entradas)
+        if error:
+            errores.append(ErrorImportacion(numero, clave, error))
+            continue
+        lote.append((numero, clave, fecha, desc, entradas))
+        if len(lote) >= tam_lote:
+            vaciar()
+    vaciar()
+    return ResultadoImportacion(partidas, lineas, errores, time.perf_counter() - inicio)
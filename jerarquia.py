@@ -0,0 +1,85 @@
+"""Árboles de cuentas con totales por nivel.
+
+Cada hoja llega con la ruta de nodos desde la raíz ([(clave, nombre), ...])
+y sus valores propios. Los totales de todos los niveles se calculan en un
+solo recorrido en post-orden, así que la pantalla puede expandir o contraer
+niveles sin volver a consultar la base de datos.
+"""
+
+
+class Nodo:
+    __slots__ = ("clave", "nombre", "propios", "valores", "hijos", "_indice")
+
+    def __init__(self, clave, nombre, ancho):
+        self.clave = clave
+        self.nombre = nombre
+        self.propios = [0] * ancho
+        self.valores = tuple(self.propios)
+        self.hijos = []
+        self._indice = {}
+
+    def hijo(self, clave, nombre):
+        nodo = self._indice.get(clave)
+        if nodo is None:
+            nodo = self._indice[clave] = Nodo(clave, nombre, len(self.propios))
+            self.hijos.append(nodo)
+        return nodo
+
+    def __repr__(self):
+        return f"Nodo({self.nombre!r}, {self.valores}, {len(self.hijos)} hijos)"
+
+
+def construir(filas, nombre_raiz="Total", ancho=1):
+    """Arma el árbol con filas [(ruta, valores)] y acumula los totales."""
+    raiz = Nodo(None, nombre_raiz, ancho)
+    for ruta, valores in filas:
+        nodo = raiz
+        for clave, nombre in ruta:
+            nodo = nodo.hijo(clave, nombre)
+        for i, valor in enumerate(valores):
+            nodo.propios[i] += valor
+    acumular(raiz)
+    return raiz
+
+
+def acumular(raiz):
+    """Post-orden iterativo: cada nodo suma sus valores propios y los de sus hijos."""
+    pila = [(raiz, False)]
+    while pila:
+        nodo, hijos_listos = pila.pop()
+        if not hijos_listos:
+            pila.append((nodo, True))
+            pila.extend((hijo, False) for hijo in nodo.hijos)
+            continue
+        total = list(nodo.propios)
+        for hijo in nodo.hijos:
+            for i, valor in enumerate(hijo.valores):
+                total[i] += valor
+        nodo.valores = tuple(total)
+    return raiz
+
+
+def recorrer(raiz, profundidad=None, incluir_raiz=False):
+    """Genera (nivel, nodo) en pre-orden hasta 'profundidad' niveles bajo la raíz."""
+    pila = [(0, raiz)] if incluir_raiz else [(1, h) for h in reversed(raiz.hijos)]
+    while pila:
+        nivel, nodo = pila.pop()
+        yield nivel, nodo
+        if profundidad is None or nivel < profundidad:
+            pila.extend((nivel + 1, h) for h in reversed(nodo.hijos))
+
+
+def ruta_catalogo(cuenta_id, cuentas):
+    """Ruta [(clave, nombre)] de una cuenta del catálogo: tipo, grupos padre y la cuenta.
+
+    'cuentas' es {id: basedatos.Cuenta}.
+    """
+    ruta, vistos = [], set()
+    cuenta = cuentas[cuenta_id]
+    while cuenta is not None and cuenta.id not in vistos:
+        vistos.add(cuenta.id)
+        ruta.append((("cuenta", cuenta.id), cuenta.nombre))
+        cuenta = cuentas.get(cuenta.padre_id)
+    ruta.append((("tipo", cuentas[cuenta_id].tipo), cuentas[cuenta_id].tipo))
+    ruta.reverse()
+    return ruta
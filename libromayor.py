@@ -1,13 +1,15 @@
 import sys
 import os
-import sqlite3
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QPushButton, QTableWidget, QTableWidgetItem,
-    QMessageBox, QHeaderView, QComboBox, QLineEdit
+    QLabel, QPushButton, QTableView,
+    QMessageBox, QHeaderView, QComboBox, QLineEdit, QCompleter
 )
 from PyQt6.QtGui import QIcon, QFont
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QStringListModel, QTimer, pyqtSignal
+import basedatos
+import busqueda
+import trabajos
 
 def resource_path(relative_path):
     """Obtiene la ruta absoluta del recurso, compatible con PyInstaller."""
@@ -59,19 +61,142 @@ class ModernInput(QLineEdit):
         self.setMinimumSize(200, 40)
 
 
+def _leer_pagina(trabajo, generacion, cuenta, orden, descendente, llave, limite):
+    filas, llave = basedatos.pagina_libro_mayor(cuenta, orden, descendente, llave, limite)
+    return generacion, filas, llave
+
+
+class ModeloLibroMayor(QAbstractTableModel):
+    """Modelo perezoso del libro mayor: trae páginas de la base de datos a
+    medida que la vista se desplaza (canFetchMore/fetchMore) y ordena en SQL.
+    Las páginas se leen en segundo plano y se agregan al llegar."""
+
+    ENCABEZADOS = ["Cuenta", "Fecha", "Correlativo", "Descripción", "Debe", "Haber", "Saldo"]
+    COL_SALDO = 6
+    TAM_PAGINA = 200
+
+    # Emitida al llegar la primera página de una carga, con el número de filas
+    cargado = pyqtSignal(int)
+    error = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._filas = []
+        self._cuenta = None
+        self._llave = None
+        self._fin = True
+        self._orden = 1
+        self._desc = False
+        self._generacion = 0
+        self._trabajo = None
+
+    def cargar(self, cuenta):
+        """Reinicia el modelo para una cuenta (None = todas) y pide la primera página."""
+        self.beginResetModel()
+        self._cuenta = cuenta
+        self._filas = []
+        self._llave = None
+        self._fin = False
+        self.endResetModel()
+        self._generacion += 1
+        if self._trabajo is not None:
+            self._trabajo.cancelar()
+        self._pedir_pagina()
+
+    def cargando(self):
+        return self._trabajo is not None
+
+    def _pedir_pagina(self):
+        self._trabajo = trabajos.ejecutar(
+            None, _leer_pagina, self._generacion, self._cuenta, self._orden, self._desc,
+            self._llave, self.TAM_PAGINA,
+            al_terminar=self._pagina_recibida,
+            al_error=lambda mensaje, generacion=self._generacion: self._pagina_fallida(generacion, mensaje))
+
+    def _pagina_recibida(self, resultado):
+        generacion, nuevas, llave = resultado
+        if generacion != self._generacion:
+            return
+        self._trabajo = None
+        self._llave = llave
+        if len(nuevas) < self.TAM_PAGINA:
+            self._fin = True
+        primera = not self._filas
+        if nuevas:
+            inicio = len(self._filas)
+            self.beginInsertRows(QModelIndex(), inicio, inicio + len(nuevas) - 1)
+            self._filas.extend(nuevas)
+            self.endInsertRows()
+        if primera:
+            self.cargado.emit(len(self._filas))
+
+    def _pagina_fallida(self, generacion, mensaje):
+        # El error de una carga ya reemplazada no debe cortar la actual
+        if generacion != self._generacion:
+            return
+        self._trabajo = None
+        self._fin = True
+        self.error.emit(mensaje)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._filas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.ENCABEZADOS)
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self._fin and self._trabajo is None
+
+    def fetchMore(self, parent):
+        if self.canFetchMore(parent):
+            self._pedir_pagina()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        col = index.column()
+        if role == Qt.ItemDataRole.TextAlignmentRole and col >= 4:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        fila = self._filas[index.row()]
+        if col == 0:
+            return fila.cuenta
+        if col == 1:
+            return fila.fecha
+        if col == 2:
+            return str(fila.correlativo)
+        if col == 3:
+            return fila.descripcion
+        if col == 4:
+            return f"Q{fila.monto:.2f}" if fila.tipo == 'Debe' else ""
+        if col == 5:
+            return "" if fila.tipo == 'Debe' else f"Q{fila.monto:.2f}"
+        return f"Q{fila.saldo:,.2f}"
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.ENCABEZADOS[section]
+        return super().headerData(section, orientation, role)
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        # El saldo corrido no se puede ordenar en SQL sin recorrer todo el libro
+        if column == self.COL_SALDO:
+            return
+        self._orden = column
+        self._desc = order == Qt.SortOrder.DescendingOrder
+        if self._filas or not self._fin:
+            self.cargar(self._cuenta)
+
+
 class LibroMayor(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.init_db()
         self.setWindowTitle("Libro Mayor")
         self.setWindowIcon(QIcon(resource_path("icon.ico")))
         self.setMinimumSize(1000, 700)
         self.setup_ui()
-
-    def init_db(self):
-        db_path = resource_path("contabilidad.db")
-        self.conn = sqlite3.connect(db_path)
-        self.cursor = self.conn.cursor()
+        self.preparar_busqueda()
 
     def setup_ui(self):
         main_layout = QVBoxLayout()
@@ -91,7 +216,18 @@ class LibroMayor(QWidget):
         # Filtro de cuentas
         filter_layout = QHBoxLayout()
         self.search_input = ModernInput("Buscar cuenta")
-        self.search_input.textChanged.connect(self.filter_accounts)
+        # La búsqueda corre cuando el usuario deja de escribir, no en cada tecla
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(lambda: self.filter_accounts(self.search_input.text()))
+        self.search_input.textChanged.connect(self.search_timer.start)
+        # Sugerencias: el índice ya las filtra y ordena, el completer solo las muestra
+        self.completer_model = QStringListModel(self)
+        self.completer = QCompleter(self.completer_model, self)
+        self.completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.completer.activated.connect(self.select_account)
+        self.search_input.setCompleter(self.completer)
         self.combo_accounts = QComboBox()
         self.combo_accounts.setMinimumWidth(200)
         self.combo_accounts.setEditable(False)
@@ -104,78 +240,76 @@ class LibroMayor(QWidget):
         filter_layout.addStretch()
         main_layout.addLayout(filter_layout)
 
-        # Tabla del libro mayor
-        self.table = QTableWidget(0, 6)
-        self.table.setHorizontalHeaderLabels([
-            "Cuenta", "Fecha", "Correlativo", "Descripción", "Debe", "Haber"
-        ])
+        # Tabla del libro mayor (solo se materializan las filas visibles)
+        self.model = ModeloLibroMayor(self)
+        self.model.cargado.connect(self.ledger_loaded)
+        self.model.error.connect(lambda e: QMessageBox.critical(self, "Error", e))
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.horizontalHeader().setSortIndicator(1, Qt.SortOrder.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        self.table.verticalHeader().setDefaultSectionSize(24)
         main_layout.addWidget(self.table)
 
         self.setLayout(main_layout)
         self.load_accounts()
 
     def volver_menu(self):
-        from menu import MenuApp
-        self.menu = MenuApp()
-        self.menu.show()
-        self.close()
+        from menu import volver_al_menu
+        volver_al_menu(self)
 
     def load_accounts(self):
-        self.cursor.execute("SELECT DISTINCT cuenta FROM cuentas ORDER BY cuenta")
-        accounts = [r[0] for r in self.cursor.fetchall()]
+        accounts = basedatos.nombres_cuentas()
         self.combo_accounts.clear()
         self.combo_accounts.addItem("Todas")
         self.combo_accounts.addItems(accounts)
 
+    def preparar_busqueda(self):
+        # El índice de cuentas se arma en segundo plano; hasta que esté listo,
+        # o si falla, filter_accounts busca con LIKE (buscar_cuentas con esperar=False)
+        trabajos.ejecutar(self, busqueda.calentar,
+                          al_terminar=lambda _: self.busqueda_lista(),
+                          al_error=lambda mensaje: None)
+
+    def busqueda_lista(self):
+        # Lo escrito antes de que el índice estuviera listo se vuelve a buscar con él
+        if self.search_input.text().strip() and not self.search_timer.isActive():
+            self.filter_accounts(self.search_input.text())
+
+    def actualizar(self):
+        # La pantalla se reutiliza al volver del menú: recarga las cuentas sin perder la elegida
+        self.preparar_busqueda()
+        actual = self.combo_accounts.currentText()
+        self.load_accounts()
+        indice = self.combo_accounts.findText(actual)
+        if indice >= 0:
+            self.combo_accounts.setCurrentIndex(indice)
+
     def filter_accounts(self, text):
         text = text.strip()
         if text:
-            self.cursor.execute(
-                "SELECT DISTINCT cuenta FROM cuentas WHERE cuenta LIKE ? ORDER BY cuenta",
-                (f"%{text}%",)
-            )
-            accounts = [r[0] for r in self.cursor.fetchall()]
+            accounts = busqueda.buscar_cuentas(text, esperar=False)
             self.combo_accounts.clear()
             self.combo_accounts.addItem("Todas")
             self.combo_accounts.addItems(accounts)
+            self.completer_model.setStringList(accounts)
         else:
+            self.completer_model.setStringList([])
             self.load_accounts()
 
+    def select_account(self, name):
+        index = self.combo_accounts.findText(name)
+        if index >= 0:
+            self.combo_accounts.setCurrentIndex(index)
+
     def load_ledger(self):
         selected = self.combo_accounts.currentText()
-        self.table.setRowCount(0)
-        if selected == "Todas":
-            query = (
-                "SELECT c.cuenta, p.fecha, p.correlativo, p.descripcion, c.tipo, c.monto "
-                "FROM partidas p JOIN cuentas c ON p.id = c.partida_id "
-                "ORDER BY p.fecha, p.correlativo"
-            )
-            self.cursor.execute(query)
-        else:
-            query = (
-                "SELECT c.cuenta, p.fecha, p.correlativo, p.descripcion, c.tipo, c.monto "
-                "FROM partidas p JOIN cuentas c ON p.id = c.partida_id "
-                "WHERE c.cuenta = ? ORDER BY p.fecha, p.correlativo"
-            )
-            self.cursor.execute(query, (selected,))
-        rows = self.cursor.fetchall()
-        if not rows:
+        self.model.cargar(None if selected == "Todas" else selected)
+
+    def ledger_loaded(self, filas):
+        if filas == 0:
             QMessageBox.information(self, "Información", "No hay registros para la cuenta seleccionada.")
-            return
-        for acct, date, corr, desc, typ, amt in rows:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            self.table.setItem(row, 0, QTableWidgetItem(acct))
-            self.table.setItem(row, 1, QTableWidgetItem(date))
-            self.table.setItem(row, 2, QTableWidgetItem(str(corr)))
-            self.table.setItem(row, 3, QTableWidgetItem(desc))
-            if typ == 'Debe':
-                self.table.setItem(row, 4, QTableWidgetItem(f"Q{amt:.2f}"))
-                self.table.setItem(row, 5, QTableWidgetItem(""))
-            else:
-                self.table.setItem(row, 4, QTableWidgetItem(""))
-                self.table.setItem(row, 5, QTableWidgetItem(f"Q{amt:.2f}"))
 
 
 
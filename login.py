@@ -4,7 +4,7 @@ import os
 from PyQt6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton,QMessageBox, QListWidget, QHBoxLayout, QGraphicsDropShadowEffect, QFrame)
 from PyQt6.QtGui import QPalette, QColor, QIcon, QFont, QPixmap
 from PyQt6.QtCore import Qt, QSize
-from menu import MenuApp 
+from menu import mostrar_menu
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "usuarios.db")
@@ -170,8 +170,7 @@ class LoginApp(QWidget):
         if user_data:
             QMessageBox.information(self, "Acceso", "Ingreso exitoso")
             self.close()
-            self.menu_app = MenuApp()
-            self.menu_app.show()
+            self.menu_app = mostrar_menu()
         else:
             QMessageBox.critical(self, "Error", "Credenciales incorrectas")
 
@@ -334,6 +333,8 @@ class AdminApp(QWidget):
         """)
 
 if __name__ == "__main__":
+    import cache_reportes
+    cache_reportes.configurar(cache_reportes.CARPETA_USUARIO)
     init_db()
     app = QApplication(sys.argv)
     
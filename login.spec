@@ -6,7 +6,9 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('login.py', '.'), ('menu.py', '.'), ('partidas_contables.py', '.'), ('BalIco.png', '.'), ('BalsaIco.png', '.'), ('Config.png', '.'), ('EstaIco.png', '.'), ('LibMaIco.png', '.'), ('logo.png', '.'), ('ParCoIco.png', '.')],
-    hiddenimports=[],
+    # menu.py importa las pantallas al abrirlas (importlib), así que el análisis no las ve
+    hiddenimports=['partidas_contables', 'BalanceGeneral', 'EstadodeResultados', 'libromayor', 'balance',
+                   'exportacion', 'diario'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -1,16 +1,25 @@
 import sys
 import os
+import importlib
 from PyQt6.QtWidgets import (QApplication, QWidget, QGridLayout, QPushButton, 
                              QLabel, QVBoxLayout, QHBoxLayout, QFrame, 
-                             QGraphicsDropShadowEffect, QMessageBox)
+                             QGraphicsDropShadowEffect, QMessageBox, QStackedWidget)
 from PyQt6.QtGui import QIcon, QFont, QPixmap, QColor
 from PyQt6.QtCore import Qt
-from partidas_contables import PartidasContables
-from balance import BalanceGeneral
-from libromayor import LibroMayor
-from BalanceGeneral import CalculoActivoUI
-from exportacion import Exportacion
-from EstadodeResultados import EstadosResultadosUI
+
+# Pantallas del menú: (módulo, clase). Cada módulo, con sus dependencias
+# pesadas (pandas, reportlab, ...), se importa la primera vez que se abre.
+PANTALLAS = {
+    "partidas": ("partidas_contables", "PartidasContables"),
+    "balance_general": ("BalanceGeneral", "CalculoActivoUI"),
+    "estado_resultados": ("EstadodeResultados", "EstadosResultadosUI"),
+    "libro_mayor": ("libromayor", "LibroMayor"),
+    "balance_saldos": ("balance", "BalanceGeneral"),
+    "exportacion": ("exportacion", "Exportacion"),
+    "libro_diario": ("diario", "LibroDiario"),
+}
+_navegador = None
+_iconos = {}
 
 def resource_path(relative_path):
     """Obtiene la ruta absoluta del recurso, compatible con PyInstaller."""
@@ -20,6 +29,15 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+def icono(ruta, lado, suave=True):
+    """QPixmap de 'ruta' escalado a lado x lado; se lee y escala una sola vez."""
+    clave = (ruta, lado, suave)
+    if clave not in _iconos:
+        modo = (Qt.TransformationMode.SmoothTransformation if suave
+                else Qt.TransformationMode.FastTransformation)
+        _iconos[clave] = QPixmap(ruta).scaled(lado, lado, Qt.AspectRatioMode.KeepAspectRatio, modo)
+    return _iconos[clave]
+
 class IconButton(QPushButton):
     def __init__(self, text, icon_path, parent=None):
         super().__init__(parent)
@@ -30,9 +48,7 @@ class IconButton(QPushButton):
         layout.setSpacing(12)
         
         self.icon_label = QLabel()
-        self.icon_label.setPixmap(QPixmap(icon_path).scaled(90, 90, 
-                           Qt.AspectRatioMode.KeepAspectRatio, 
-                           Qt.TransformationMode.SmoothTransformation))
+        self.icon_label.setPixmap(icono(icon_path, 90))
         self.icon_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(self.icon_label)
         
@@ -100,8 +116,7 @@ class MenuApp(QWidget):
         header.setSpacing(20)
         
         logo = QLabel()
-        logo.setPixmap(QPixmap(resource_path("logo.png")).scaled(80, 80,
-                        Qt.AspectRatioMode.KeepAspectRatio))
+        logo.setPixmap(icono(resource_path("logo.png"), 80, suave=False))
         header.addWidget(logo)
         
         title_container = QVBoxLayout()
@@ -133,10 +148,11 @@ class MenuApp(QWidget):
             ("Estado de Resultados", "EstaIco.png", self.abrir_estadoderesul),
             ("Libro Mayor General", "LibMaIco.png", self.abrir_libro_mayor),
             ("Balance de Saldos", "BalsaIco.png", self.abrir_balance_general),
-            ("Exportación", "Config.png",self.abrir_exportacion)
+            ("Exportación", "Config.png",self.abrir_exportacion),
+            ("Libro Diario", "LibMaIco.png", self.abrir_libro_diario)
         ]
         
-        positions = [(i // 3, i % 3) for i in range(6)]
+        positions = [(i // 3, i % 3) for i in range(len(buttons_info))]
         for (row, col), (name, icon, funcion) in zip(positions, buttons_info):
             btn = IconButton(name, resource_path(icon))
             btn.clicked.connect(funcion)
@@ -161,35 +177,29 @@ class MenuApp(QWidget):
         
         self.setLayout(main_layout)
     
+    def abrir(self, clave):
+        navegador().abrir(clave)
+
     def abrir_partidas(self):
-        self.partidas_window = PartidasContables()
-        self.partidas_window.show()
-        self.close()  # Cierra el menú actual
+        self.abrir("partidas")
 
     def abrir_balance_general(self):
-        self.balance_window = BalanceGeneral()
-        self.balance_window.show()
-        self.close()  # Cierra el menú actual
+        self.abrir("balance_saldos")
 
     def abrir_libro_mayor(self):
-        self.balance_window = LibroMayor()
-        self.balance_window.show()
-        self.close()  # Cierra el menú actual   
+        self.abrir("libro_mayor")
 
     def abrir_balancegeneral(self):
-        self.balance_window = CalculoActivoUI()
-        self.balance_window.show()
-        self.close()  # Cierra el menú actual   
+        self.abrir("balance_general")
 
     def abrir_estadoderesul(self):
-        self.balance_window = EstadosResultadosUI()
-        self.balance_window.show()
-        self.close()  # Cierra el menú actual 
+        self.abrir("estado_resultados")
 
     def abrir_exportacion(self):
-        self.balance_window = Exportacion()
-        self.balance_window.show()
-        self.close()  # Cierra el menú actual 
+        self.abrir("exportacion")
+
+    def abrir_libro_diario(self):
+        self.abrir("libro_diario")
 
     def mostrar_advertencia(self):
         msg = QMessageBox()
@@ -198,8 +208,80 @@ class MenuApp(QWidget):
         msg.setIcon(QMessageBox.Icon.Information)
         msg.exec()
 
+
+class Navegador(QWidget):
+    """Ventana única de la aplicación: el menú y las pantallas en un QStackedWidget.
+
+    Las pantallas se crean la primera vez que se abren y después solo se
+    cambia de página, así que conservan su estado (fechas, libro cargado).
+    """
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Menú Principal")
+        self.setWindowIcon(QIcon(resource_path("icon.ico")))
+        self.pila = QStackedWidget()
+        self.menu = MenuApp()
+        self.pila.addWidget(self.menu)
+        self.pila.currentChanged.connect(self.al_cambiar)
+        self.pantallas = {}
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.pila)
+
+    def pantalla(self, clave):
+        """Pantalla PANTALLAS[clave]; su módulo se importa al crearla la primera vez."""
+        ventana = self.pantallas.get(clave)
+        if ventana is None:
+            modulo, clase = PANTALLAS[clave]
+            ventana = self.pantallas[clave] = getattr(importlib.import_module(modulo), clase)()
+            self.pila.addWidget(ventana)
+        return ventana
+
+    def abrir(self, clave):
+        nueva = clave not in self.pantallas
+        ventana = self.pantalla(clave)
+        if not nueva and hasattr(ventana, "actualizar"):
+            # Vuelve a leer lo que pudo cambiar mientras la pantalla estaba oculta
+            ventana.actualizar()
+        self.pila.setCurrentWidget(ventana)
+        return ventana
+
+    def volver(self):
+        self.pila.setCurrentWidget(self.menu)
+
+    def al_cambiar(self, indice):
+        self.setWindowTitle(self.pila.widget(indice).windowTitle())
+
+
+def navegador():
+    global _navegador
+    if _navegador is None:
+        _navegador = Navegador()
+    return _navegador
+
+
+def pantalla(clave):
+    return navegador().pantalla(clave)
+
+
+def mostrar_menu():
+    """Muestra la ventana de la aplicación en la página del menú."""
+    nav = navegador()
+    nav.volver()
+    nav.show()
+    nav.raise_()
+    return nav
+
+
+def volver_al_menu(ventana):
+    """volver_menu de las pantallas; si la pantalla se abrió suelta (su __main__), además se cierra."""
+    mostrar_menu()
+    if ventana.isWindow():
+        ventana.close()
+
 if __name__ == "__main__":
+    import cache_reportes
+    cache_reportes.configurar(cache_reportes.CARPETA_USUARIO)
     app = QApplication(sys.argv)
-    window = MenuApp()
-    window.show()
+    mostrar_menu()
     sys.exit(app.exec())
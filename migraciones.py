@@ -0,0 +1,444 @@
+import sqlite3
+
+# Cada migración es (versión, [sentencias]). La versión aplicada se guarda en
+# PRAGMA user_version, así que solo se ejecutan las que faltan y en orden.
+# Nunca modificar una migración ya publicada: agregar una nueva al final.
+MIGRACIONES = [
+    (1, [
+        """
+        CREATE TABLE IF NOT EXISTS partidas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fecha TEXT NOT NULL,
+            correlativo INTEGER UNIQUE NOT NULL,
+            descripcion TEXT NOT NULL
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS cuentas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            partida_id INTEGER NOT NULL,
+            cuenta TEXT NOT NULL,
+            monto REAL NOT NULL,
+            tipo TEXT NOT NULL,
+            tipo2 TEXT NOT NULL,
+            FOREIGN KEY(partida_id) REFERENCES partidas(id) ON DELETE CASCADE
+        )""",
+    ]),
+    (2, [
+        # Join partidas -> cuentas y borrado de partidas
+        "CREATE INDEX IF NOT EXISTS idx_cuentas_partida ON cuentas(partida_id)",
+        # Libro mayor por cuenta y lista de cuentas (DISTINCT cuenta)
+        "CREATE INDEX IF NOT EXISTS idx_cuentas_cuenta ON cuentas(cuenta, partida_id)",
+        # Estado de resultados filtra por tipo2
+        "CREATE INDEX IF NOT EXISTS idx_cuentas_tipo2 ON cuentas(tipo2, partida_id)",
+        # Rangos de fecha y ORDER BY fecha, correlativo en todos los reportes
+        "CREATE INDEX IF NOT EXISTS idx_partidas_fecha ON partidas(fecha, correlativo)",
+        "ANALYZE",
+    ]),
+    (3, [
+        # Movimiento diario por cuenta y acumulado hasta ese día (suma de prefijos):
+        # el saldo al día X es la última fila con fecha <= X de cada cuenta.
+        """
+        CREATE TABLE IF NOT EXISTS saldos_diarios (
+            cuenta TEXT NOT NULL,
+            tipo2 TEXT NOT NULL,
+            fecha TEXT NOT NULL,
+            debe REAL NOT NULL DEFAULT 0,
+            haber REAL NOT NULL DEFAULT 0,
+            debe_acum REAL NOT NULL DEFAULT 0,
+            haber_acum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (cuenta, tipo2, fecha)
+        ) WITHOUT ROWID""",
+        """
+        INSERT INTO saldos_diarios(cuenta, tipo2, fecha, debe, haber, debe_acum, haber_acum)
+        SELECT cuenta, tipo2, fecha, debe, haber,
+               SUM(debe) OVER w, SUM(haber) OVER w
+        FROM (
+            SELECT c.cuenta, c.tipo2, p.fecha,
+                   SUM(CASE WHEN lower(c.tipo) = 'debe' THEN c.monto ELSE 0 END) AS debe,
+                   SUM(CASE WHEN lower(c.tipo) = 'debe' THEN 0 ELSE c.monto END) AS haber
+            FROM cuentas c
+            JOIN partidas p ON c.partida_id = p.id
+            GROUP BY c.cuenta, c.tipo2, p.fecha
+        )
+        WINDOW w AS (PARTITION BY cuenta, tipo2 ORDER BY fecha ROWS UNBOUNDED PRECEDING)""",
+    ]),
+    (4, [
+        # Sección y categoría del balance general de cada cuenta, calculadas una
+        # vez; 'huella' identifica las reglas con que se clasificó
+        """
+        CREATE TABLE IF NOT EXISTS clasificacion_cuentas (
+            cuenta TEXT NOT NULL,
+            tipo2 TEXT NOT NULL,
+            huella TEXT NOT NULL,
+            seccion TEXT NOT NULL,
+            categoria TEXT NOT NULL,
+            seccion_antigua TEXT NOT NULL,
+            categoria_antigua TEXT NOT NULL,
+            PRIMARY KEY (cuenta, tipo2)
+        ) WITHOUT ROWID""",
+    ]),
+    (5, [
+        # Catálogo de cuentas: una fila por cuenta (nombre y tipo), con código
+        # por tipo (1 Activo, 2 Pasivo, 3 Patrimonio, 4 Ventas, 5 Ingreso,
+        # 6 Costo de Venta, 7 Gasto). 'corriente' NULL = según antigüedad.
+        """
+        CREATE TABLE IF NOT EXISTS catalogo (
+            id INTEGER PRIMARY KEY,
+            codigo TEXT UNIQUE,
+            nombre TEXT NOT NULL COLLATE NOCASE,
+            tipo TEXT NOT NULL,
+            padre_id INTEGER REFERENCES catalogo(id),
+            corriente INTEGER,
+            UNIQUE (nombre, tipo)
+        )""",
+        # Nombres repetidos con otros espacios o mayúsculas quedan en una sola cuenta
+        """
+        INSERT INTO catalogo(codigo, nombre, tipo)
+        SELECT CASE tipo WHEN 'Activo' THEN '1' WHEN 'Pasivo' THEN '2' WHEN 'Patrimonio' THEN '3'
+                         WHEN 'Ventas' THEN '4' WHEN 'Ingreso' THEN '5' WHEN 'Costo de Venta' THEN '6'
+                         WHEN 'Gasto' THEN '7' ELSE '9' END
+               || '.' || printf('%04d', ROW_NUMBER() OVER (PARTITION BY tipo ORDER BY nombre)),
+               nombre, tipo
+        FROM (SELECT MIN(trim(cuenta)) AS nombre, tipo2 AS tipo
+              FROM cuentas GROUP BY trim(cuenta) COLLATE NOCASE, tipo2)""",
+        "ALTER TABLE cuentas ADD COLUMN cuenta_id INTEGER REFERENCES catalogo(id)",
+        """
+        UPDATE cuentas SET
+            cuenta_id = (SELECT k.id FROM catalogo k WHERE k.nombre = trim(cuentas.cuenta)
+                         AND k.tipo = cuentas.tipo2),
+            cuenta = (SELECT k.nombre FROM catalogo k WHERE k.nombre = trim(cuentas.cuenta)
+                      AND k.tipo = cuentas.tipo2)""",
+        "CREATE INDEX IF NOT EXISTS idx_cuentas_cuenta_id ON cuentas(cuenta_id, partida_id)",
+        # saldos_diarios pasa a llevar el id del catálogo en lugar del nombre y tipo
+        "DROP TABLE saldos_diarios",
+        """
+        CREATE TABLE saldos_diarios (
+            cuenta_id INTEGER NOT NULL REFERENCES catalogo(id),
+            fecha TEXT NOT NULL,
+            debe REAL NOT NULL DEFAULT 0,
+            haber REAL NOT NULL DEFAULT 0,
+            debe_acum REAL NOT NULL DEFAULT 0,
+            haber_acum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (cuenta_id, fecha)
+        ) WITHOUT ROWID""",
+        """
+        INSERT INTO saldos_diarios(cuenta_id, fecha, debe, haber, debe_acum, haber_acum)
+        SELECT cuenta_id, fecha, debe, haber,
+               SUM(debe) OVER w, SUM(haber) OVER w
+        FROM (
+            SELECT c.cuenta_id, p.fecha,
+                   SUM(CASE WHEN lower(c.tipo) = 'debe' THEN c.monto ELSE 0 END) AS debe,
+                   SUM(CASE WHEN lower(c.tipo) = 'debe' THEN 0 ELSE c.monto END) AS haber
+            FROM cuentas c
+            JOIN partidas p ON c.partida_id = p.id
+            GROUP BY c.cuenta_id, p.fecha
+        )
+        WINDOW w AS (PARTITION BY cuenta_id ORDER BY fecha ROWS UNBOUNDED PRECEDING)""",
+        "ANALYZE",
+    ]),
+    (6, [
+        # Contador que sube en cada transacción que cambia datos; sirve de llave
+        # para los resultados en caché, también entre procesos
+        """
+        CREATE TABLE IF NOT EXISTS version_datos (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            valor INTEGER NOT NULL
+        )""",
+        "INSERT OR IGNORE INTO version_datos(id, valor) VALUES (1, 0)",
+        "CREATE INDEX IF NOT EXISTS idx_catalogo_padre ON catalogo(padre_id)",
+    ]),
+    (7, [
+        # Montos en centavos enteros (ver dinero.py): las sumas en SQL y en
+        # Python quedan exactas. SQLite no cambia el tipo de una columna, así
+        # que cuentas se copia a una tabla nueva con monto INTEGER.
+        """
+        CREATE TABLE cuentas_centavos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            partida_id INTEGER NOT NULL,
+            cuenta TEXT NOT NULL,
+            monto INTEGER NOT NULL CHECK (typeof(monto) = 'integer'),
+            tipo TEXT NOT NULL,
+            tipo2 TEXT NOT NULL,
+            cuenta_id INTEGER REFERENCES catalogo(id),
+            FOREIGN KEY(partida_id) REFERENCES partidas(id) ON DELETE CASCADE
+        )""",
+        """
+        INSERT INTO cuentas_centavos(id, partida_id, cuenta, monto, tipo, tipo2, cuenta_id)
+        SELECT id, partida_id, cuenta, CAST(ROUND(monto * 100) AS INTEGER), tipo, tipo2, cuenta_id
+        FROM cuentas""",
+        "DROP TABLE cuentas",
+        "ALTER TABLE cuentas_centavos RENAME TO cuentas",
+        "CREATE INDEX idx_cuentas_partida ON cuentas(partida_id)",
+        "CREATE INDEX idx_cuentas_cuenta ON cuentas(cuenta, partida_id)",
+        "CREATE INDEX idx_cuentas_tipo2 ON cuentas(tipo2, partida_id)",
+        "CREATE INDEX idx_cuentas_cuenta_id ON cuentas(cuenta_id, partida_id)",
+        "DROP TABLE saldos_diarios",
+        """
+        CREATE TABLE saldos_diarios (
+            cuenta_id INTEGER NOT NULL REFERENCES catalogo(id),
+            fecha TEXT NOT NULL,
+            debe INTEGER NOT NULL DEFAULT 0,
+            haber INTEGER NOT NULL DEFAULT 0,
+            debe_acum INTEGER NOT NULL DEFAULT 0,
+            haber_acum INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (cuenta_id, fecha)
+        ) WITHOUT ROWID""",
+        """
+        INSERT INTO saldos_diarios(cuenta_id, fecha, debe, haber, debe_acum, haber_acum)
+        SELECT cuenta_id, fecha, debe, haber,
+               SUM(debe) OVER w, SUM(haber) OVER w
+        FROM (
+            SELECT c.cuenta_id, p.fecha,
+                   SUM(CASE WHEN lower(c.tipo) = 'debe' THEN c.monto ELSE 0 END) AS debe,
+                   SUM(CASE WHEN lower(c.tipo) = 'debe' THEN 0 ELSE c.monto END) AS haber
+            FROM cuentas c
+            JOIN partidas p ON c.partida_id = p.id
+            GROUP BY c.cuenta_id, p.fecha
+        )
+        WINDOW w AS (PARTITION BY cuenta_id ORDER BY fecha ROWS UNBOUNDED PRECEDING)""",
+        "UPDATE version_datos SET valor = valor + 1 WHERE id = 1",
+        "ANALYZE",
+    ]),
+    (8, [
+        # Último número entregado de cada secuencia (correlativo de partidas);
+        # se reserva con UPDATE dentro de la transacción que inserta
+        """
+        CREATE TABLE IF NOT EXISTS secuencias (
+            nombre TEXT PRIMARY KEY,
+            valor INTEGER NOT NULL
+        ) WITHOUT ROWID""",
+        """
+        INSERT OR IGNORE INTO secuencias(nombre, valor)
+        SELECT 'correlativo', COALESCE(MAX(correlativo), 0) FROM partidas""",
+    ]),
+    (9, [
+        # Cierres contables: cada cierre bloquea las partidas con fecha <= hasta
+        # y guarda el acumulado de cada cuenta a esa fecha (saldos_cierre)
+        """
+        CREATE TABLE IF NOT EXISTS cierres (
+            periodo TEXT PRIMARY KEY,
+            hasta TEXT NOT NULL UNIQUE,
+            cerrado_en TEXT NOT NULL
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS saldos_cierre (
+            periodo TEXT NOT NULL REFERENCES cierres(periodo) ON DELETE CASCADE,
+            cuenta_id INTEGER NOT NULL REFERENCES catalogo(id),
+            debe_acum INTEGER NOT NULL,
+            haber_acum INTEGER NOT NULL,
+            PRIMARY KEY (periodo, cuenta_id)
+        ) WITHOUT ROWID""",
+    ]),
+    (10, [
+        # Líneas de las partidas eliminadas: junto con el id de la última partida
+        # leída permite aplicar solo los cambios del diario a un resultado ya
+        # calculado (ver saldos_incrementales.py)
+        """
+        CREATE TABLE IF NOT EXISTS lineas_eliminadas (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            partida_id INTEGER NOT NULL,
+            fecha TEXT NOT NULL,
+            cuenta_id INTEGER NOT NULL REFERENCES catalogo(id),
+            monto INTEGER NOT NULL,
+            tipo TEXT NOT NULL
+        )""",
+    ]),
+    (11, [
+        # Registro de cambios del diario, solo se agrega: cada alta y baja de
+        # partidas y cuentas con un número de secuencia (una modificación es la
+        # baja de los valores viejos y el alta de los nuevos). Lo escriben los
+        # triggers, así que ningún camino de escritura puede saltárselo; quien
+        # mantiene resultados derivados lee basedatos.cambios_desde(seq).
+        # Si alguna vez se reconstruye partidas o cuentas hay que volver a
+        # crear sus triggers. Reemplaza a lineas_eliminadas.
+        """
+        CREATE TABLE IF NOT EXISTS cambios (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            operacion TEXT NOT NULL CHECK (operacion IN ('alta', 'baja')),
+            tabla TEXT NOT NULL CHECK (tabla IN ('partidas', 'cuentas')),
+            registro_id INTEGER NOT NULL,
+            partida_id INTEGER NOT NULL,
+            fecha TEXT NOT NULL,
+            correlativo INTEGER,
+            descripcion TEXT,
+            cuenta_id INTEGER,
+            cuenta TEXT,
+            monto INTEGER,
+            tipo TEXT,
+            tipo2 TEXT,
+            momento TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+        )""",
+        """
+        CREATE TRIGGER IF NOT EXISTS cambios_partidas_alta AFTER INSERT ON partidas BEGIN
+            INSERT INTO cambios(operacion, tabla, registro_id, partida_id, fecha, correlativo, descripcion)
+            VALUES ('alta', 'partidas', NEW.id, NEW.id, NEW.fecha, NEW.correlativo, NEW.descripcion);
+        END""",
+        # Las líneas se borran antes que la partida (también si alguien borra
+        # solo la partida y actúa el ON DELETE CASCADE) para registrar su fecha
+        """
+        CREATE TRIGGER IF NOT EXISTS cambios_partidas_lineas BEFORE DELETE ON partidas BEGIN
+            DELETE FROM cuentas WHERE partida_id = OLD.id;
+        END""",
+        """
+        CREATE TRIGGER IF NOT EXISTS cambios_partidas_baja AFTER DELETE ON partidas BEGIN
+            INSERT INTO cambios(operacion, tabla, registro_id, partida_id, fecha, correlativo, descripcion)
+            VALUES ('baja', 'partidas', OLD.id, OLD.id, OLD.fecha, OLD.correlativo, OLD.descripcion);
+        END""",
+        # Si cambia la fecha de la partida también cambian de fecha sus líneas
+        """
+        CREATE TRIGGER IF NOT EXISTS cambios_partidas_modificacion AFTER UPDATE ON partidas BEGIN
+            INSERT INTO cambios(operacion, tabla, registro_id, partida_id, fecha, correlativo, descripcion)
+            VALUES ('baja', 'partidas', OLD.id, OLD.id, OLD.fecha, OLD.correlativo, OLD.descripcion),
+                   ('alta', 'partidas', NEW.id, NEW.id, NEW.fecha, NEW.correlativo, NEW.descripcion);
+            INSERT INTO cambios(operacion, tabla, registro_id, partida_id, fecha,
+                                cuenta_id, cuenta, monto, tipo, tipo2)
+            SELECT v.operacion, 'cuentas', c.id, c.partida_id, v.fecha,
+                   c.cuenta_id, c.cuenta, c.monto, c.tipo, c.tipo2
+            FROM (SELECT 'baja' AS operacion, OLD.fecha AS fecha, 1 AS orden
+                  UNION ALL SELECT 'alta', NEW.fecha, 2) v
+            JOIN cuentas c ON c.partida_id = NEW.id
+            WHERE OLD.fecha IS NOT NEW.fecha
+            ORDER BY v.orden, c.id;
+        END""",
+        """
+        CREATE TRIGGER IF NOT EXISTS cambios_cuentas_alta AFTER INSERT ON cuentas BEGIN
+            INSERT INTO cambios(operacion, tabla, registro_id, partida_id, fecha,
+                                cuenta_id, cuenta, monto, tipo, tipo2)
+            SELECT 'alta', 'cuentas', NEW.id, NEW.partida_id, p.fecha,
+                   NEW.cuenta_id, NEW.cuenta, NEW.monto, NEW.tipo, NEW.tipo2
+            FROM partidas p WHERE p.id = NEW.partida_id;
+        END""",
+        """
+        CREATE TRIGGER IF NOT EXISTS cambios_cuentas_baja AFTER DELETE ON cuentas BEGIN
+            INSERT INTO cambios(operacion, tabla, registro_id, partida_id, fecha,
+                                cuenta_id, cuenta, monto, tipo, tipo2)
+            SELECT 'baja', 'cuentas', OLD.id, OLD.partida_id, p.fecha,
+                   OLD.cuenta_id, OLD.cuenta, OLD.monto, OLD.tipo, OLD.tipo2
+            FROM partidas p WHERE p.id = OLD.partida_id;
+        END""",
+        """
+        CREATE TRIGGER IF NOT EXISTS cambios_cuentas_modificacion AFTER UPDATE ON cuentas BEGIN
+            INSERT INTO cambios(operacion, tabla, registro_id, partida_id, fecha,
+                                cuenta_id, cuenta, monto, tipo, tipo2)
+            SELECT 'baja', 'cuentas', OLD.id, OLD.partida_id, p.fecha,
+                   OLD.cuenta_id, OLD.cuenta, OLD.monto, OLD.tipo, OLD.tipo2
+            FROM partidas p WHERE p.id = OLD.partida_id;
+            INSERT INTO cambios(operacion, tabla, registro_id, partida_id, fecha,
+                                cuenta_id, cuenta, monto, tipo, tipo2)
+            SELECT 'alta', 'cuentas', NEW.id, NEW.partida_id, p.fecha,
+                   NEW.cuenta_id, NEW.cuenta, NEW.monto, NEW.tipo, NEW.tipo2
+            FROM partidas p WHERE p.id = NEW.partida_id;
+        END""",
+        "DROP TABLE IF EXISTS lineas_eliminadas",
+    ]),
+    (12, [
+        # Búsqueda de texto del libro diario (FTS5, sin tildes ni mayúsculas).
+        # Los índices leen el texto de sus tablas (content=...), no lo copian.
+        # Las cuentas se indexan en el catálogo: cuentas.cuenta es siempre el
+        # nombre de su cuenta del catálogo y así cada nombre se indexa una vez
+        # en lugar de una vez por línea.
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS partidas_fts USING fts5(
+            descripcion, content='partidas', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2')""",
+        "INSERT INTO partidas_fts(partidas_fts) VALUES ('rebuild')",
+        """
+        CREATE TRIGGER IF NOT EXISTS fts_partidas_alta AFTER INSERT ON partidas BEGIN
+            INSERT INTO partidas_fts(rowid, descripcion) VALUES (NEW.id, NEW.descripcion);
+        END""",
+        """
+        CREATE TRIGGER IF NOT EXISTS fts_partidas_baja AFTER DELETE ON partidas BEGIN
+            INSERT INTO partidas_fts(partidas_fts, rowid, descripcion) VALUES ('delete', OLD.id, OLD.descripcion);
+        END""",
+        """
+        CREATE TRIGGER IF NOT EXISTS fts_partidas_modificacion AFTER UPDATE OF descripcion ON partidas BEGIN
+            INSERT INTO partidas_fts(partidas_fts, rowid, descripcion) VALUES ('delete', OLD.id, OLD.descripcion);
+            INSERT INTO partidas_fts(rowid, descripcion) VALUES (NEW.id, NEW.descripcion);
+        END""",
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS catalogo_fts USING fts5(
+            nombre, content='catalogo', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2')""",
+        "INSERT INTO catalogo_fts(catalogo_fts) VALUES ('rebuild')",
+        """
+        CREATE TRIGGER IF NOT EXISTS fts_catalogo_alta AFTER INSERT ON catalogo BEGIN
+            INSERT INTO catalogo_fts(rowid, nombre) VALUES (NEW.id, NEW.nombre);
+        END""",
+        """
+        CREATE TRIGGER IF NOT EXISTS fts_catalogo_baja AFTER DELETE ON catalogo BEGIN
+            INSERT INTO catalogo_fts(catalogo_fts, rowid, nombre) VALUES ('delete', OLD.id, OLD.nombre);
+        END""",
+        """
+        CREATE TRIGGER IF NOT EXISTS fts_catalogo_modificacion AFTER UPDATE OF nombre ON catalogo BEGIN
+            INSERT INTO catalogo_fts(catalogo_fts, rowid, nombre) VALUES ('delete', OLD.id, OLD.nombre);
+            INSERT INTO catalogo_fts(rowid, nombre) VALUES (NEW.id, NEW.nombre);
+        END""",
+        # Filtro por monto del libro diario
+        "CREATE INDEX IF NOT EXISTS idx_cuentas_monto ON cuentas(monto, partida_id)",
+    ]),
+    (13, [
+        # cuentas.tipo es siempre 'Debe' o 'Haber' (antes se comparaba con
+        # lower() en unos lugares y exacto en otros). Lo que no era 'debe' ya
+        # se sumaba como Haber. SQLite no agrega un CHECK sin copiar la tabla:
+        # lo hacen los disparadores.
+        """
+        UPDATE cuentas SET tipo = CASE WHEN lower(tipo) = 'debe' THEN 'Debe' ELSE 'Haber' END
+        WHERE tipo NOT IN ('Debe', 'Haber')""",
+        # También el registro de cambios, que lee basedatos.cambios_desde;
+        # incluye las bajas con el tipo viejo que acaba de escribir el UPDATE
+        """
+        UPDATE cambios SET tipo = CASE WHEN lower(tipo) = 'debe' THEN 'Debe' ELSE 'Haber' END
+        WHERE tabla = 'cuentas' AND tipo NOT IN ('Debe', 'Haber')""",
+        """
+        CREATE TRIGGER IF NOT EXISTS cuentas_tipo_alta BEFORE INSERT ON cuentas
+        WHEN NEW.tipo NOT IN ('Debe', 'Haber') BEGIN
+            SELECT RAISE(ABORT, 'tipo debe ser Debe o Haber');
+        END""",
+        """
+        CREATE TRIGGER IF NOT EXISTS cuentas_tipo_modificacion BEFORE UPDATE OF tipo ON cuentas
+        WHEN NEW.tipo NOT IN ('Debe', 'Haber') BEGIN
+            SELECT RAISE(ABORT, 'tipo debe ser Debe o Haber');
+        END""",
+        # Orden del libro mayor por Descripción, Debe y Haber (ver
+        # basedatos.ORDEN_MAYOR): cada llave se recorre con un índice
+        "CREATE INDEX IF NOT EXISTS idx_partidas_descripcion ON partidas(descripcion)",
+        """
+        CREATE INDEX IF NOT EXISTS idx_cuentas_debe
+        ON cuentas((CASE WHEN tipo = 'Debe' THEN monto ELSE 0 END), partida_id)""",
+        """
+        CREATE INDEX IF NOT EXISTS idx_cuentas_haber
+        ON cuentas((CASE WHEN tipo = 'Debe' THEN 0 ELSE monto END), partida_id)""",
+    ]),
+]
+
+VERSION_ACTUAL = MIGRACIONES[-1][0]
+
+
+def version_esquema(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migraciones(conn, hasta=None):
+    """Lleva la base de datos a la última versión del esquema (o a 'hasta')."""
+    hasta = VERSION_ACTUAL if hasta is None else hasta
+    actual = version_esquema(conn)
+    for version, sentencias in MIGRACIONES:
+        if version <= actual or version > hasta:
+            continue
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Otra instancia pudo migrar mientras esperábamos el bloqueo
+            if version_esquema(conn) >= version:
+                conn.rollback()
+                continue
+            for sql in sentencias:
+                if callable(sql):
+                    sql(conn)
+                else:
+                    conn.execute(sql)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+    return version_esquema(conn)
@@ -1,13 +1,15 @@
 import sys
 import os
-import sqlite3
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
-    QLabel, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem,
+    QLabel, QLineEdit, QPushButton, QTableWidget,
     QDateEdit, QMessageBox, QHeaderView, QComboBox
 )
 from PyQt6.QtGui import QIcon, QFont, QCursor
 from PyQt6.QtCore import Qt, QDate
+import basedatos
+import tablas
+from dinero import a_centavos, a_decimal
 
 # Ruta de recursos para PyInstaller
 def resource_path(relative_path):
@@ -40,37 +42,13 @@ class ModernInput(QLineEdit):
 class PartidasContables(QWidget):
     def __init__(self, parent=None):
         super().__init__()
-        self.init_db()
+        # id de la partida cargada con Buscar: al guardar se actualiza en lugar de crear otra
+        self.partida_id = None
         self.setup_ui()
         self.setWindowTitle("Gestión de Partidas Contables")
         self.setWindowIcon(QIcon(resource_path("icon.ico")))
         self.setMinimumSize(1200, 800)
 
-    def init_db(self):
-        db = resource_path("contabilidad.db")
-        self.conn = sqlite3.connect(db)
-        self.cursor = self.conn.cursor()
-        # Crear tabla partidas
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS partidas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                fecha TEXT NOT NULL,
-                correlativo INTEGER UNIQUE NOT NULL,
-                descripcion TEXT NOT NULL
-            );""")
-        # Crear tabla cuentas con campo tipo2
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS cuentas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                partida_id INTEGER NOT NULL,
-                cuenta TEXT NOT NULL,
-                monto REAL NOT NULL,
-                tipo TEXT NOT NULL,
-                tipo2 TEXT NOT NULL,
-                FOREIGN KEY(partida_id) REFERENCES partidas(id) ON DELETE CASCADE
-            );""")
-        self.conn.commit()
-
     def agregar_cuenta(self):
         c = self.cuenta.text().strip()
         m_text = self.monto.text().strip()
@@ -80,36 +58,20 @@ class PartidasContables(QWidget):
             QMessageBox.warning(self, "Error", "Cuenta y monto requeridos.")
             return
         try:
-            m = float(m_text)
+            m = a_decimal(a_centavos(m_text))
         except ValueError:
             QMessageBox.warning(self, "Error", "Monto inválido.")
             return
         if m <= 0:
             QMessageBox.warning(self, "Error", "Monto debe >0.")
             return
-        r = self.tabla.rowCount()
-        self.tabla.insertRow(r)
-        # Inserción: Cuenta, Monto, Tipo, Tipo2, Acciones
-        self.tabla.setItem(r, 0, QTableWidgetItem(c))
-        self.tabla.setItem(r, 1, QTableWidgetItem(f"Q{m:.2f}"))
-        self.tabla.setItem(r, 2, QTableWidgetItem(th))
-        self.tabla.setItem(r, 3, QTableWidgetItem(t2))
-        btn = QPushButton("X")
-        btn.setStyleSheet("""
-            QPushButton { background-color: #D32F2F; color: white; border: none; border-radius: 4px; padding: 2px 4px; font-size: 10px; }
-            QPushButton:hover { background-color: #B71C1C; }
-        """)
-        btn.clicked.connect(self.eliminar_fila)
-        self.tabla.setCellWidget(r, 4, btn)
+        # Inserción: Cuenta, Monto, Tipo, Tipo2; la columna Acciones la dibuja el delegado
+        tablas.agregar_fila(self.tabla, (c, f"Q{m:.2f}", th, t2))
         self.cuenta.clear()
         self.monto.clear()
 
-    def eliminar_fila(self):
-        btn = self.sender()
-        for i in range(self.tabla.rowCount()):
-            if self.tabla.cellWidget(i, 4) == btn:
-                self.tabla.removeRow(i)
-                return
+    def eliminar_fila(self, fila):
+        self.tabla.removeRow(fila)
 
     def buscar_partida(self):
         txt = self.buscar_correlativo.text().strip()
@@ -121,33 +83,20 @@ class PartidasContables(QWidget):
         except ValueError:
             QMessageBox.warning(self, "Error", "Correlativo entero.")
             return
-        self.cursor.execute("SELECT id, fecha, descripcion FROM partidas WHERE correlativo=?", (num,))
-        partida = self.cursor.fetchone()
+        partida = basedatos.buscar_partida(num)
         if not partida:
             QMessageBox.warning(self, "No encontrado", "Partida no existe.")
             return
-        partida_id, fecha, desc = partida
-        self.cursor.execute("SELECT cuenta, monto, tipo, tipo2 FROM cuentas WHERE partida_id=?", (partida_id,))
-        cuentas = self.cursor.fetchall()
+        fecha, desc = partida.fecha, partida.descripcion
+        cuentas = basedatos.lineas_partida(partida.id)
         self.limpiar_formulario()
+        self.partida_id = partida.id
         self.correlativo.setText(str(num))
         self.correlativo.setReadOnly(True)
         self.date_edit.setDate(QDate.fromString(fecha, Qt.DateFormat.ISODate))
         self.descripcion.setText(desc)
-        for c, m, t, t2 in cuentas:
-            r = self.tabla.rowCount()
-            self.tabla.insertRow(r)
-            self.tabla.setItem(r, 0, QTableWidgetItem(c))
-            self.tabla.setItem(r, 1, QTableWidgetItem(f"Q{m:.2f}"))
-            self.tabla.setItem(r, 2, QTableWidgetItem(t))
-            self.tabla.setItem(r, 3, QTableWidgetItem(t2))
-            btn = QPushButton("X")
-            btn.setStyleSheet("""
-                QPushButton { background-color: #D32F2F; color: white; border: none; border-radius: 4px; padding: 2px 4px; font-size: 10px; }
-                QPushButton:hover { background-color: #B71C1C; }
-            """)
-            btn.clicked.connect(self.eliminar_fila)
-            self.tabla.setCellWidget(r, 4, btn)
+        tablas.llenar_tabla(self.tabla, [(c, f"Q{m:.2f}", t, t2) for c, m, t, t2 in cuentas],
+                            ajustar=False)
 
     def guardar_partida(self):
         if not self.date_edit.date().isValid():
@@ -158,9 +107,6 @@ class PartidasContables(QWidget):
         if not desc:
             QMessageBox.warning(self, "Error", "Descripción vacía.")
             return
-        self.cursor.execute("SELECT MAX(correlativo) FROM partidas")
-        max_corr = self.cursor.fetchone()[0]
-        corr = 1 if max_corr is None else max_corr + 1
         entradas = []
         for i in range(self.tabla.rowCount()):
             ci = self.tabla.item(i, 0);
@@ -170,25 +116,25 @@ class PartidasContables(QWidget):
             if not ci or not mi or not ti or not t2i:
                 QMessageBox.warning(self, "Error", f"Fila {i+1} incompleta.")
                 return
-            cv = ci.text().strip(); mv = float(mi.text().lstrip('Q').strip()); tp = ti.text().strip(); t2v = t2i.text().strip()
+            cv = ci.text().strip(); mv = a_decimal(a_centavos(mi.text())); tp = ti.text().strip(); t2v = t2i.text().strip()
             entradas.append((cv, mv, tp, t2v))
-        if len(entradas) < 2:
-            QMessageBox.warning(self, "Error", "Mínimo 2 cuentas.")
-            return
-        debe = sum(e[1] for e in entradas if e[2] == 'Debe'); haber = sum(e[1] for e in entradas if e[2] == 'Haber')
-        if abs(debe - haber) > 0.01:
-            QMessageBox.warning(self, "Error", "Debe/Haber no balancean.")
+        error = basedatos.validar_partida(fecha, desc, entradas)
+        if error:
+            QMessageBox.warning(self, "Error", error)
             return
         try:
-            self.conn.execute("BEGIN")
-            self.cursor.execute("INSERT INTO partidas(fecha, correlativo, descripcion) VALUES(?,?,?)", (fecha, corr, desc))
-            partida_id = self.cursor.lastrowid
-            for cv, mv, tp, t2v in entradas:
-                self.cursor.execute("INSERT INTO cuentas(partida_id, cuenta, monto, tipo, tipo2) VALUES(?,?,?,?,?)",
-                                    (partida_id, cv, mv, tp, t2v))
-            self.conn.commit(); QMessageBox.information(self, "Éxito", f"Partida {corr} guardada."); self.limpiar_formulario()
+            if self.partida_id is not None:
+                # Solo se escriben las líneas que cambiaron; el correlativo se conserva
+                cambios = basedatos.actualizar_partida(self.partida_id, fecha, desc, entradas)
+                lineas = cambios.insertadas + cambios.actualizadas + cambios.eliminadas
+                QMessageBox.information(self, "Éxito", f"Partida {self.correlativo.text()} actualizada "
+                                        f"({lineas} líneas cambiadas).")
+            else:
+                corr = basedatos.guardar_partida(fecha, desc, entradas)
+                QMessageBox.information(self, "Éxito", f"Partida {corr} guardada.")
+            self.limpiar_formulario()
         except Exception as e:
-            self.conn.rollback(); QMessageBox.critical(self, "Error", str(e))
+            QMessageBox.critical(self, "Error", str(e))
 
 
     def eliminar_partida(self):
@@ -201,12 +147,10 @@ class PartidasContables(QWidget):
         except ValueError:
             QMessageBox.warning(self, "Error", "Correlativo inválido.")
             return
-        self.cursor.execute("SELECT id FROM partidas WHERE correlativo=?", (corr,))
-        partida = self.cursor.fetchone()
+        partida = basedatos.buscar_partida(corr)
         if not partida:
             QMessageBox.warning(self, "Error", "Partida no encontrada en DB.")
             return
-        partida_id = partida[0]
         ret = QMessageBox.question(
             self,
             "Confirmar eliminación",
@@ -216,13 +160,10 @@ class PartidasContables(QWidget):
         if ret != QMessageBox.StandardButton.Yes:
             return
         try:
-            self.cursor.execute("DELETE FROM cuentas WHERE partida_id=?", (partida_id,))
-            self.cursor.execute("DELETE FROM partidas WHERE id=?", (partida_id,))
-            self.conn.commit()
+            basedatos.eliminar_partida(partida.id)
             QMessageBox.information(self, "Eliminado", "Partida y cuentas asociadas eliminadas.")
             self.limpiar_formulario()
         except Exception as e:
-            self.conn.rollback()
             QMessageBox.critical(self, "Error", str(e))
 
     def limpiar_formulario(self):
@@ -234,6 +175,7 @@ class PartidasContables(QWidget):
         self.tabla.setRowCount(0)
         self.correlativo.clear()
         self.correlativo.setReadOnly(True)
+        self.partida_id = None
 
     def nueva_partida(self):
         self.limpiar_formulario()
@@ -271,10 +213,10 @@ class PartidasContables(QWidget):
         self.cuenta = ModernInput("Cuenta")
         self.monto = ModernInput("Monto")
         self.tipo_cuenta = QComboBox()
-        self.tipo_cuenta.addItems(["Debe", "Haber"])
+        self.tipo_cuenta.addItems(basedatos.TIPOS_MOVIMIENTO)
         self.tipo_cuentas = QComboBox()
         # Carga de tipos fijos en combo
-        for t in ["Activo", "Pasivo", "Patrimonio", "Ingreso", "Gasto", "Costo de Venta", "Ventas"]:
+        for t in basedatos.TIPOS_CUENTA:
             self.tipo_cuentas.addItem(t)
         btn_add = ModernButton("Agregar Cuenta")
         btn_add.clicked.connect(self.agregar_cuenta)
@@ -299,6 +241,10 @@ class PartidasContables(QWidget):
         self.tabla.setColumnCount(5)
         self.tabla.setHorizontalHeaderLabels(["Cuenta", "Monto", "Tipo", "Clasificacion BG/ER", "Acciones"])
         self.tabla.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.tabla.setMouseTracking(True)
+        self.delegado_eliminar = tablas.DelegadoEliminar(self.tabla)
+        self.delegado_eliminar.eliminar.connect(self.eliminar_fila)
+        self.tabla.setItemDelegateForColumn(4, self.delegado_eliminar)
         layout.addWidget(self.tabla)
         # Botones guardar/eliminar
         foot = QHBoxLayout()
@@ -313,10 +259,8 @@ class PartidasContables(QWidget):
         self.setLayout(layout)
 
     def volver_menu(self):
-        from menu import MenuApp
-        self.menu = MenuApp()
-        self.menu.show()
-        self.close()
+        from menu import volver_al_menu
+        volver_al_menu(self)
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
@@ -0,0 +1,580 @@
+"""Motor de reportes contables sin dependencias de Qt.
+
+Las pantallas y la línea de comandos (contabilidad.py) llaman a estas
+funciones; devuelven estructuras de Python simples. Las librerías de
+exportación (xlsxwriter, reportlab) se importan solo al exportar.
+
+Los cálculos se hacen en centavos enteros (basedatos entrega los saldos así)
+y los montos de los resultados son Decimal con dos decimales.
+
+Los reportes pasan por cache_reportes: mientras no se escriba nada en la base
+de datos, repetir un reporte con los mismos parámetros no vuelve a calcularlo.
+Los balances incluyen en la clave la huella de las reglas de clasificación.
+"""
+import csv
+import io
+import json
+import threading
+from calendar import monthrange
+from collections import namedtuple
+from datetime import date, timedelta
+from decimal import Decimal
+
+import basedatos
+import jerarquia
+from cache_reportes import en_cache
+from clasificacion import Clasificador, huella
+from dinero import a_decimal, porcentaje
+
+# Definición de categorías
+CATEGORY_CURRENT = {
+    'Disponibilidades': ['caja', 'cajas', 'banco', 'bancos'],
+    'Inversiones CP': ['inversion', 'inversiones'],
+    'Inventarios': ['inventario', 'inventarios'],
+    'Clientes': ['clientes', 'cliente'],
+    'Documentos por cobrar': ['documentos por cobrar'],
+    'Impuestos por liquidar': ['isr por cobrar', 'igss por cobrar', 'iva por cobrar', 'iusi por cobrar'],
+    'Otras cuentas': []
+}
+CATEGORY_NON_CURRENT = {
+    'Vehiculos': ['vehiculos', 'edificios', 'maquinaria'],
+    'Otras cuentas': []
+}
+CATEGORY_LIAB_CURRENT = {
+    'Préstamos bancarios': ['prestamos bancarios', 'prestamo bancario'],
+    'Proveedores': ['proveedores', 'proveedor'],
+    'Impuestos por pagar': ['isr por pagar', 'igss por pagar', 'iva por pagar', 'iusi por pagar'],
+    'Acreedores': ['acreedores', 'acreedor'],
+    'Otras cuentas por pagar': []
+}
+CATEGORY_LIAB_NON_CURRENT = {
+    'Documentos por pagar LP': ['documentos por pagar'],
+    'Préstamos bancarios LP': ['prestamos bancarios', 'prestamo bancario'],
+    'Otras cuentas por pagar': []
+}
+CATEGORY_EQUITY = {
+    'Capital en acciones': ['capital en acciones', 'capital accionistas'],
+    'Reserva Legal': ['reserva legal'],
+    'Utilidades acumuladas': ['utilidades acumuladas', 'utilidades de años anteriores'],
+    'Patrimonio': ['patrimonio'],
+    'Otro patrimonio': []
+}
+
+# Reglas del balance general que no salen de los diccionarios anteriores
+ACTIVO_FIJO = {'Otras cuentas': ['vehiculos', 'vehículo', 'edificios', 'edificio', 'maquinaria']}
+REGLAS_PATRIMONIO = {
+    'Capital en acciones': ['capital en acciones'],
+    'Reserva Legal': ['reserva legal'],
+    'Utilidades acumuladas': ['utilidades acumuladas'],
+    'Otro patrimonio': [],
+}
+
+SECCIONES_BALANCE = [
+    ('AC', 'Activo Corriente', CATEGORY_CURRENT),
+    ('ANC', 'Activo No Corriente', CATEGORY_NON_CURRENT),
+    ('PC', 'Pasivo Corriente', CATEGORY_LIAB_CURRENT),
+    ('PNC', 'Pasivo No Corriente', CATEGORY_LIAB_NON_CURRENT),
+    ('EQ', 'Patrimonio', CATEGORY_EQUITY),
+]
+UTILIDAD_NETA = 'Utilidad (Pérdida) neta del año'
+TASA_ISR = Decimal('0.25')
+
+CONCEPTOS_RESULTADOS = [
+    'Ventas', 'Costo de Venta', 'Gastos de Operación', 'Otros Ingresos y Gastos - Neto',
+    'Utilidad Marginal', 'Pérdida en Operación', 'Pérdida antes del ISR',
+    'Impuesto Sobre la Renta', 'Utilidad (Pérdida) Neta',
+]
+
+Clasificacion = namedtuple("Clasificacion", "seccion categoria seccion_antigua categoria_antigua")
+SaldoCuenta = namedtuple("SaldoCuenta", "cuenta inicial debe haber actual")
+Reporte = namedtuple("Reporte", "nombre titulo parametros columnas filas")
+
+
+def _fecha(valor):
+    return valor if isinstance(valor, date) else date.fromisoformat(valor)
+
+
+# --- Balance de Saldos --------------------------------------------------------
+
+def balance_saldos(anio, mes):
+    """Saldo inicial (acumulado al cierre del mes anterior), debe y haber del mes por cuenta."""
+    def construir():
+        inicio = date(anio, mes, 1)
+        fin = date(anio, mes, monthrange(anio, mes)[1])
+        saldo_inicial = {cuenta: saldo for cuenta, saldo in
+                         basedatos.saldo_neto_por_cuenta(inicio.isoformat(), inclusive=False).items() if saldo}
+        movimientos = basedatos.movimientos_por_cuenta(inicio.isoformat(), fin.isoformat())
+        filas = []
+        for cuenta in sorted(set(saldo_inicial) | set(movimientos)):
+            inicial = saldo_inicial.get(cuenta, 0)
+            debe, haber = movimientos.get(cuenta, (0, 0))
+            filas.append(SaldoCuenta(cuenta, *map(a_decimal, (inicial, debe, haber, inicial + (debe - haber)))))
+        return filas
+    return en_cache("saldos", (anio, mes), construir)
+
+
+def arbol_balance_saldos(anio, mes):
+    """Balance de saldos como árbol tipo > grupos del catálogo > cuenta.
+
+    Cada nodo tiene valores (inicial, debe, haber, actual) ya acumulados: el
+    saldo inicial es el del cierre del mes anterior y debe y haber son los del mes.
+    """
+    def construir():
+        inicio = date(anio, mes, 1)
+        fin = date(anio, mes, monthrange(anio, mes)[1])
+        iniciales = basedatos.saldos_al((inicio - timedelta(days=1)).isoformat())
+        movimientos = basedatos.movimientos_entre(inicio.isoformat(), fin.isoformat())
+        valores = {clave: (d0 - h0, 0, 0) for clave, (d0, h0) in iniciales.items() if d0 != h0}
+        for clave, (debe, haber) in movimientos.items():
+            valores[clave] = (valores.get(clave, (0,))[0], debe, haber)
+        return arbol_saldos(valores)
+    return en_cache("arbol_saldos", (anio, mes), construir)
+
+
+def arbol_saldos(valores):
+    """Árbol del balance de saldos a partir de {(cuenta, tipo2): (inicial, debe, haber)} en centavos."""
+    cuentas = {c.id: c for c in basedatos.catalogo_cuentas()}
+    ids = {(c.nombre, c.tipo): c.id for c in cuentas.values()}
+    orden = {t: i for i, t in enumerate(basedatos.TIPOS_CUENTA)}
+    filas = []
+    for clave in sorted(valores, key=lambda k: (orden.get(k[1], len(orden)), k[0])):
+        inicial, debe, haber = valores[clave]
+        ruta = jerarquia.ruta_catalogo(ids[clave], cuentas)
+        filas.append((ruta, tuple(map(a_decimal, (inicial, debe, haber, inicial + debe - haber)))))
+    return jerarquia.construir(filas, "Total", ancho=4)
+
+
+# --- Balance General ----------------------------------------------------------
+
+_CLASIFICADORES = {}
+
+
+def _clasificador(categorias, defecto=None):
+    clave = (id(categorias), defecto)
+    compilado = _CLASIFICADORES.get(clave)
+    if compilado is None:
+        compilado = _CLASIFICADORES[clave] = Clasificador(categorias, defecto)
+    return compilado
+
+
+def clasificar(nombre, categorias, prefijo):
+    return prefijo, _clasificador(categorias).clasificar(nombre)
+
+
+HUELLA_CLASIFICACION = huella(CATEGORY_CURRENT, CATEGORY_LIAB_CURRENT, CATEGORY_LIAB_NON_CURRENT,
+                              ACTIVO_FIJO, REGLAS_PATRIMONIO)
+
+
+def clasificar_cuenta(nombre, tipo2):
+    """Sección y categoría de la cuenta para movimientos del último año y anteriores.
+
+    Devuelve None si la cuenta no va en el balance general.
+    """
+    tl = tipo2.lower()
+    if tl == 'activo':
+        if _clasificador(ACTIVO_FIJO, '').clasificar(nombre):
+            return Clasificacion('ANC', 'Otras cuentas', 'ANC', 'Otras cuentas')
+        return Clasificacion('AC', clasificar(nombre, CATEGORY_CURRENT, 'AC')[1], 'ANC', 'Otras cuentas')
+    if tl == 'pasivo':
+        return Clasificacion(*clasificar(nombre, CATEGORY_LIAB_CURRENT, 'PC'),
+                             *clasificar(nombre, CATEGORY_LIAB_NON_CURRENT, 'PNC'))
+    if tl == 'patrimonio':
+        cat = _clasificador(REGLAS_PATRIMONIO, 'Otro patrimonio').clasificar(nombre)
+        if cat == 'Otro patrimonio' and nombre.lower() == 'patrimonio':
+            cat = 'Patrimonio'
+        return Clasificacion('EQ', cat, 'EQ', cat)
+    return None
+
+
+# Clasificaciones por base de datos: las guardadas en clasificacion_cuentas
+# (se leen la primera vez) y las de cuentas nuevas, que se clasifican una sola
+# vez y quedan pendientes hasta que guardar_clasificaciones() las escribe. Los
+# reportes corren en hilos (trabajos.py): el lock cubre los diccionarios, no la
+# escritura, y una clasificación pasa a guardada solo si la escritura funcionó.
+_clasificaciones = {}
+_pendientes = {}
+_clasificaciones_lock = threading.Lock()
+
+
+def clasificaciones(cuentas):
+    """{(cuenta, tipo2): Clasificacion o None} para las cuentas dadas. No escribe en la base."""
+    ruta = basedatos.ruta_db()
+    resultado = {}
+    with _clasificaciones_lock:
+        guardadas = _clasificaciones.get(ruta)
+        if guardadas is None:
+            guardadas = {k: Clasificacion(*v) for k, v in
+                         basedatos.clasificaciones_guardadas(HUELLA_CLASIFICACION).items()}
+            _clasificaciones[ruta] = guardadas
+        pendientes = _pendientes.setdefault(ruta, {})
+        for clave in cuentas:
+            if clave in guardadas:
+                resultado[clave] = guardadas[clave]
+            elif clave in pendientes:
+                resultado[clave] = pendientes[clave]
+            else:
+                clasificacion = clasificar_cuenta(*clave)
+                if clasificacion is None:
+                    # No se guarda nada para las cuentas fuera del balance
+                    guardadas[clave] = None
+                else:
+                    pendientes[clave] = clasificacion
+                resultado[clave] = clasificacion
+    return resultado
+
+
+def guardar_clasificaciones():
+    """Escribe las clasificaciones pendientes de la base actual.
+
+    Es una escritura (BEGIN IMMEDIATE): dentro de basedatos.lectura() no hace
+    nada y las deja para el reporte de afuera. Si falla, siguen pendientes.
+    """
+    if basedatos.conexion().in_transaction:
+        return
+    ruta = basedatos.ruta_db()
+    with _clasificaciones_lock:
+        pendientes = dict(_pendientes.get(ruta, {}))
+    if not pendientes:
+        return
+    basedatos.guardar_clasificaciones(
+        HUELLA_CLASIFICACION, [clave + tuple(clase) for clave, clase in pendientes.items()])
+    with _clasificaciones_lock:
+        _clasificaciones.setdefault(ruta, {}).update(pendientes)
+        for clave in pendientes:
+            _pendientes[ruta].pop(clave, None)
+
+
+def _utilidad_neta_anio(anio):
+    """Utilidad neta del año en centavos."""
+    totales = basedatos.totales_con_signo(f'{anio}-01-01', f'{anio}-12-31', TIPOS_RESULTADOS)
+    v, c, g, o = (totales.get((tipo,), 0) for tipo in TIPOS_RESULTADOS)
+    # Aquí los otros ingresos cuentan como Haber - Debe, al revés que en el estado de resultados
+    raw_uti = v + c + g - o
+    return raw_uti - porcentaje(raw_uti, TASA_ISR) if raw_uti > 0 else raw_uti
+
+
+def _aportes_balance(focal):
+    """Genera (sección, categoría, cuenta, centavos) de cada cuenta del balance general.
+
+    El saldo de cada cuenta a la fecha focal se separa en movimientos del último
+    año (corriente) y anteriores (no corriente) con dos lecturas acumuladas.
+    """
+    corte = (focal - timedelta(days=366)).isoformat()
+    saldos = basedatos.saldos_al(focal.isoformat())
+    antiguos = basedatos.saldos_al(corte)
+    clases = clasificaciones(saldos)
+    for clave, (debe, haber) in saldos.items():
+        clase = clases[clave]
+        if clase is None:
+            continue
+        d_ant, h_ant = antiguos.get(clave, (0, 0))
+        reciente = (debe - d_ant) - (haber - h_ant)
+        antiguo = d_ant - h_ant
+        if reciente:
+            yield clase.seccion, clase.categoria, clave[0], reciente
+        if antiguo:
+            yield clase.seccion_antigua, clase.categoria_antigua, clave[0], antiguo
+
+
+def balance_general(fecha):
+    """Totales por sección y categoría del balance general a la fecha focal.
+
+    Devuelve {'secciones': {'AC': {categoría: total}, ...}, 'utilidad_neta': x}.
+    """
+    focal = _fecha(fecha)
+
+    def construir():
+        totals = {key: {c: 0 for c in cats} for key, _, cats in SECCIONES_BALANCE}
+        for sec, cat, _, monto in _aportes_balance(focal):
+            totals[sec][cat] += monto
+        return {'secciones': {key: {c: a_decimal(v) for c, v in cats.items()} for key, cats in totals.items()},
+                'utilidad_neta': a_decimal(_utilidad_neta_anio(focal.year))}
+    datos = en_cache("balance", (focal.isoformat(), HUELLA_CLASIFICACION), construir)
+    guardar_clasificaciones()
+    return datos
+
+
+GRUPOS_BALANCE = {'AC': 'Activo', 'ANC': 'Activo', 'PC': 'Pasivo', 'PNC': 'Pasivo', 'EQ': 'Patrimonio'}
+
+
+def arbol_balance_general(fecha):
+    """Balance general como árbol grupo > sección > categoría > cuenta, con totales."""
+    focal = _fecha(fecha)
+
+    def construir():
+        nombres = {key: titulo for key, titulo, _ in SECCIONES_BALANCE}
+        orden = {key: (i, {c: j for j, c in enumerate(cats)}) for i, (key, _, cats) in
+                 enumerate(SECCIONES_BALANCE)}
+        aportes = sorted(_aportes_balance(focal),
+                         key=lambda a: (orden[a[0]][0], orden[a[0]][1].get(a[1], 0), a[2]))
+        filas = []
+        for sec, cat, cuenta, monto in aportes:
+            grupo = GRUPOS_BALANCE[sec]
+            filas.append(([(grupo, grupo), (sec, nombres[sec]), ((sec, cat), cat),
+                           ((sec, cat, cuenta), cuenta)], (a_decimal(monto),)))
+        utilidad = a_decimal(_utilidad_neta_anio(focal.year))
+        filas.append(([('Patrimonio', 'Patrimonio'), ('EQ', nombres['EQ']),
+                       (('EQ', UTILIDAD_NETA), UTILIDAD_NETA)], (utilidad,)))
+        return jerarquia.construir(filas, "Balance General")
+    arbol = en_cache("arbol_balance", (focal.isoformat(), HUELLA_CLASIFICACION), construir)
+    guardar_clasificaciones()
+    return arbol
+
+
+# --- Estado de Resultados -----------------------------------------------------
+
+TIPOS_RESULTADOS = ['Ventas', 'Costo de Venta', 'Gasto', 'Ingreso']
+
+
+def _conceptos_resultados(v, c, g, o):
+    """Conceptos del estado de resultados, en centavos, a partir de los totales por tipo."""
+    util_marg = v + c
+    perd_oper = util_marg + g
+    perd_antes_isr = perd_oper + o
+    impuesto = porcentaje(perd_antes_isr, TASA_ISR) if perd_antes_isr > 0 else 0
+    neto = perd_antes_isr - impuesto
+
+    return {
+        'Ventas': v,
+        'Costo de Venta': c,
+        'Gastos de Operación': g,
+        'Otros Ingresos y Gastos - Neto': o,
+        'Utilidad Marginal': util_marg,
+        'Pérdida en Operación': perd_oper,
+        'Pérdida antes del ISR': perd_antes_isr,
+        'Impuesto Sobre la Renta': impuesto,
+        'Utilidad (Pérdida) Neta': neto,
+    }
+
+
+def resultados_por_periodo(lista, periodicidad):
+    """Conceptos en centavos de cada periodo de 'lista' (consecutivos, de periodos()).
+
+    Los totales de todos los periodos salen de una sola consulta agrupada por
+    tipo y periodo (basedatos.totales_con_signo).
+    """
+    totales = basedatos.totales_con_signo(lista[0].desde.isoformat(), lista[-1].hasta.isoformat(),
+                                          TIPOS_RESULTADOS, periodicidad=periodicidad)
+    return [_conceptos_resultados(*(totales.get((tipo, p.etiqueta), 0) for tipo in TIPOS_RESULTADOS))
+            for p in lista]
+
+
+def estado_resultados(fecha):
+    """Estado de resultados del año calendario de 'fecha', en el orden de CONCEPTOS_RESULTADOS."""
+    anio = _fecha(fecha).year
+
+    def construir():
+        conceptos = resultados_por_periodo(periodos(date(anio, 1, 1), 1, 'anual'), 'anual')[0]
+        return {k: a_decimal(v) for k, v in conceptos.items()}
+    return en_cache("resultados", (anio,), construir)
+
+
+# --- Reportes comparativos ----------------------------------------------------
+
+PERIODICIDADES = ['anual', 'trimestral', 'mensual']
+Periodo = namedtuple("Periodo", "etiqueta desde hasta")
+# filas: [(concepto, [monto por periodo], variación, % de variación o None)]
+Comparativo = namedtuple("Comparativo", "periodos filas")
+
+
+def periodos(fecha, cantidad, periodicidad):
+    """Los 'cantidad' periodos que terminan en el que contiene 'fecha', del más antiguo al más reciente.
+
+    Las etiquetas son las de basedatos.PERIODOS_SQL: '2026', '2026-T3', '2026-09'.
+    """
+    fecha = _fecha(fecha)
+    if periodicidad not in PERIODICIDADES:
+        raise ValueError(f"Periodicidad desconocida: {periodicidad}")
+    meses = {'anual': 12, 'trimestral': 3, 'mensual': 1}[periodicidad]
+    actual = (fecha.year * 12 + fecha.month - 1) // meses
+    lista = []
+    for indice in range(actual - cantidad + 1, actual + 1):
+        anio, mes = divmod(indice * meses, 12)
+        mes_fin = mes + meses
+        desde = date(anio, mes + 1, 1)
+        hasta = date(anio, mes_fin, monthrange(anio, mes_fin)[1])
+        if periodicidad == 'anual':
+            etiqueta = str(anio)
+        elif periodicidad == 'trimestral':
+            etiqueta = f'{anio}-T{mes // 3 + 1}'
+        else:
+            etiqueta = desde.isoformat()[:7]
+        lista.append(Periodo(etiqueta, desde, hasta))
+    return lista
+
+
+def _variacion(valores):
+    """(último - anterior, % sobre el valor absoluto del anterior o None si este es cero)."""
+    anterior, ultimo = valores[-2], valores[-1]
+    variacion = ultimo - anterior
+    if not anterior:
+        return variacion, None
+    return variacion, (variacion * 100 / abs(anterior)).quantize(Decimal('0.1'))
+
+
+def _comparativo(lista, filas):
+    """Comparativo con las filas [(concepto, [Decimal por periodo])] y su variación."""
+    return Comparativo(lista, [(concepto, valores) + _variacion(valores) for concepto, valores in filas])
+
+
+def _validar_cantidad(cantidad):
+    if cantidad < 2:
+        raise ValueError("El comparativo necesita al menos dos periodos")
+
+
+def estado_resultados_comparativo(fecha, cantidad=3, periodicidad='anual'):
+    """Estado de resultados de 'cantidad' periodos lado a lado, con la variación del último."""
+    _validar_cantidad(cantidad)
+    lista = periodos(fecha, cantidad, periodicidad)
+
+    def construir():
+        por_periodo = resultados_por_periodo(lista, periodicidad)
+        return _comparativo(lista, [(k, [a_decimal(c[k]) for c in por_periodo]) for k in CONCEPTOS_RESULTADOS])
+    return en_cache("resultados_comparativo", (lista[-1].etiqueta, cantidad, periodicidad), construir)
+
+
+def balance_general_comparativo(fecha, cantidad=3, periodicidad='anual'):
+    """Balance general al cierre de cada periodo (el último, a 'fecha'), con la variación del último.
+
+    Cada columna es un balance_general(): los saldos salen de la tabla de
+    acumulados, así que cada periodo cuesta una lectura por cuenta.
+    """
+    _validar_cantidad(cantidad)
+    fecha = _fecha(fecha)
+    lista = periodos(fecha, cantidad, periodicidad)
+
+    def construir():
+        datos = [balance_general(min(p.hasta, fecha)) for p in lista]
+        filas = []
+        for key, titulo, cats in SECCIONES_BALANCE:
+            for cat in cats:
+                filas.append((f'{titulo}: {cat}', [d['secciones'][key][cat] for d in datos]))
+            filas.append((f'Total {titulo}', [sum(d['secciones'][key].values()) for d in datos]))
+        filas.append((UTILIDAD_NETA, [d['utilidad_neta'] for d in datos]))
+        for nombre, claves in (('Total Activo', ('AC', 'ANC')), ('Total Pasivo', ('PC', 'PNC'))):
+            filas.append((nombre, [sum(sum(d['secciones'][k].values()) for k in claves) for d in datos]))
+        filas.append(('Total Patrimonio y Utilidad',
+                      [sum(d['secciones']['EQ'].values()) + d['utilidad_neta'] for d in datos]))
+        return _comparativo(lista, filas)
+    comparativo = en_cache("balance_comparativo",
+                           (fecha.isoformat(), cantidad, periodicidad, HUELLA_CLASIFICACION), construir)
+    guardar_clasificaciones()
+    return comparativo
+
+
+# --- Reportes tabulares para exportar -----------------------------------------
+
+def generar(nombre, fecha, cantidad=3, periodicidad='anual'):
+    """Arma el reporte 'nombre' (ver REPORTES) como tabla.
+
+    'cantidad' y 'periodicidad' solo se usan en los comparativos.
+    """
+    fecha = _fecha(fecha)
+    if nombre == 'balance':
+        datos = balance_general(fecha)
+        filas = []
+        for key, titulo, cats in SECCIONES_BALANCE:
+            for cat in cats:
+                filas.append((titulo, cat, datos['secciones'][key][cat]))
+            filas.append((titulo, f'Total {titulo}', sum(datos['secciones'][key].values())))
+        filas.append(('Patrimonio', UTILIDAD_NETA, datos['utilidad_neta']))
+        return Reporte(nombre, 'Balance General', {'fecha': fecha.isoformat()},
+                       ['Sección', 'Categoría', 'Total Q'], filas)
+    if nombre == 'saldos':
+        filas = [tuple(f) for f in balance_saldos(fecha.year, fecha.month)]
+        return Reporte(nombre, 'Balance de Saldos', {'anio': fecha.year, 'mes': fecha.month},
+                       ['Cuenta', 'Saldo Inicial', 'Total Debe', 'Total Haber', 'Saldo Actual'], filas)
+    if nombre == 'resultados':
+        datos = estado_resultados(fecha)
+        return Reporte(nombre, 'Estado de Resultados', {'anio': fecha.year},
+                       ['Concepto', 'Total Q'], [(k, datos[k]) for k in CONCEPTOS_RESULTADOS])
+    if nombre in ('resultados_comparativo', 'balance_comparativo'):
+        if nombre == 'resultados_comparativo':
+            titulo, datos = 'Estado de Resultados Comparativo', estado_resultados_comparativo
+        else:
+            titulo, datos = 'Balance General Comparativo', balance_general_comparativo
+        datos = datos(fecha, cantidad, periodicidad)
+        filas = [(concepto, *valores, variacion, '' if pct is None else f'{pct}%')
+                 for concepto, valores, variacion, pct in datos.filas]
+        return Reporte(nombre, titulo,
+                       {'fecha': fecha.isoformat(), 'periodos': cantidad, 'periodicidad': periodicidad},
+                       ['Concepto', *(p.etiqueta for p in datos.periodos), 'Variación', '% Variación'], filas)
+    raise ValueError(f"Reporte desconocido: {nombre}")
+
+
+REPORTES = ['balance', 'saldos', 'resultados', 'resultados_comparativo', 'balance_comparativo']
+FORMATOS = ['json', 'csv', 'xlsx', 'pdf']
+
+
+def _redondear(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return round(valor, 2) if isinstance(valor, float) else valor
+
+
+def a_json(reporte):
+    return json.dumps({
+        'reporte': reporte.nombre,
+        'titulo': reporte.titulo,
+        'parametros': reporte.parametros,
+        'filas': [dict(zip(reporte.columnas, map(_redondear, f))) for f in reporte.filas],
+    }, ensure_ascii=False, indent=2)
+
+
+def a_csv(reporte):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(reporte.columnas)
+    writer.writerows([list(map(_redondear, f)) for f in reporte.filas])
+    return buffer.getvalue()
+
+
+def exportar(reporte, formato, destino):
+    """Escribe el reporte en 'destino' (ruta de archivo) en el formato indicado."""
+    if formato == 'json':
+        with open(destino, 'w', encoding='utf-8') as f:
+            f.write(a_json(reporte))
+    elif formato == 'csv':
+        with open(destino, 'w', encoding='utf-8', newline='') as f:
+            f.write(a_csv(reporte))
+    elif formato == 'xlsx':
+        import xlsxwriter
+        workbook = xlsxwriter.Workbook(destino)
+        worksheet = workbook.add_worksheet(reporte.titulo[:31])
+        title_fmt = workbook.add_format({'bold': True, 'font_size': 14})
+        header_fmt = workbook.add_format({'bold': True, 'bg_color': '#004AAD', 'font_color': 'white'})
+        money_fmt = workbook.add_format({'num_format': '"Q"#,##0.00'})
+        worksheet.write(0, 0, reporte.titulo, title_fmt)
+        worksheet.write(1, 0, ', '.join(f'{k}: {v}' for k, v in reporte.parametros.items()))
+        for col, nombre in enumerate(reporte.columnas):
+            worksheet.write(3, col, nombre, header_fmt)
+        for r, fila in enumerate(reporte.filas, start=4):
+            for col, valor in enumerate(fila):
+                if isinstance(valor, (float, Decimal)):
+                    worksheet.write_number(r, col, float(valor), money_fmt)
+                else:
+                    worksheet.write(r, col, valor)
+        workbook.close()
+    elif formato == 'pdf':
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+        styles = getSampleStyleSheet()
+        data = [reporte.columnas] + [
+            [f"Q{v:,.2f}" if isinstance(v, (float, Decimal)) else str(v) for v in fila] for fila in reporte.filas]
+        table = Table(data, repeatRows=1)
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#004AAD')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ]))
+        parametros = ', '.join(f'{k}: {v}' for k, v in reporte.parametros.items())
+        SimpleDocTemplate(destino, pagesize=letter).build([
+            Paragraph(reporte.titulo, styles['Title']),
+            Paragraph(parametros, styles['Italic']),
+            Spacer(1, 12),
+            table,
+        ])
+    else:
+        raise ValueError(f"Formato desconocido: {formato}")
@@ -0,0 +1,123 @@
+"""Balance de saldos que se actualiza solo con los cambios del diario.
+
+Por cada mes calculado se guarda en memoria el saldo inicial, debe y haber de
+cada cuenta (centavos) junto con el último seq del registro de cambios que ya
+incluye. Al volver a pedir ese mes solo se leen las líneas agregadas o
+eliminadas después de ese seq; si version_datos no cambió no se lee nada.
+"""
+import threading
+from calendar import monthrange
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import basedatos
+import reportes
+
+MESES_EN_MEMORIA = 24
+
+
+class _Mes:
+    __slots__ = ("inicio", "fin", "version", "ultimo_cambio", "valores")
+
+    def __init__(self, inicio, fin):
+        self.inicio = inicio
+        self.fin = fin
+        self.version = None
+        self.ultimo_cambio = 0
+        self.valores = {}       # (cuenta, tipo2) -> [inicial, debe, haber]
+
+
+class BalanceSaldosIncremental:
+    def __init__(self, capacidad=MESES_EN_MEMORIA):
+        self.capacidad = capacidad
+        self.completos = 0
+        self.incrementales = 0
+        self._meses = OrderedDict()     # (base de datos, año, mes) -> _Mes
+        self._lock = threading.Lock()
+
+    def saldos(self, anio, mes):
+        """{(cuenta, tipo2): (inicial, debe, haber)} en centavos del mes; sin cuentas en cero."""
+        clave = (basedatos.ruta_db(), anio, mes)
+        with self._lock:
+            estado = self._meses.get(clave)
+            if estado is None:
+                inicio = date(anio, mes, 1)
+                estado = _Mes(inicio.isoformat(), date(anio, mes, monthrange(anio, mes)[1]).isoformat())
+                self._calcular(estado)
+                self._meses[clave] = estado
+                while len(self._meses) > self.capacidad:
+                    self._meses.popitem(last=False)
+            else:
+                self._meses.move_to_end(clave)
+                self._actualizar(estado)
+            return {c: tuple(v) for c, v in estado.valores.items() if any(v)}
+
+    def arbol(self, anio, mes):
+        """Lo mismo que reportes.arbol_balance_saldos, calculado de forma incremental."""
+        return reportes.arbol_saldos(self.saldos(anio, mes))
+
+    def olvidar(self):
+        with self._lock:
+            self._meses.clear()
+
+    def _calcular(self, estado):
+        """Cálculo completo con los acumulados de saldos_diarios."""
+        previo = (date.fromisoformat(estado.inicio) - timedelta(days=1)).isoformat()
+        with basedatos.lectura():
+            estado.version = basedatos.version_datos()
+            estado.ultimo_cambio = basedatos.ultimo_cambio()
+            iniciales = basedatos.saldos_al(previo)
+            movimientos = basedatos.movimientos_entre(estado.inicio, estado.fin)
+        estado.valores = {clave: [d0 - h0, 0, 0] for clave, (d0, h0) in iniciales.items()}
+        for clave, (debe, haber) in movimientos.items():
+            estado.valores.setdefault(clave, [0, 0, 0])[1:] = [debe, haber]
+        self.completos += 1
+
+    def _actualizar(self, estado):
+        """Aplica las líneas agregadas y eliminadas desde el último cálculo del mes."""
+        with basedatos.lectura():
+            version = basedatos.version_datos()
+            if version == estado.version:
+                return
+            ultimo = basedatos.ultimo_cambio()
+            if ultimo < estado.ultimo_cambio:
+                # La base se reemplazó (p. ej. se restauró una copia): no hay delta confiable
+                cambios = None
+            else:
+                cambios = basedatos.cambios_diario(estado.ultimo_cambio, estado.fin)
+        if cambios is None:
+            self._calcular(estado)
+            return
+        for fecha, clave, debe, haber in cambios:
+            fila = estado.valores.setdefault(clave, [0, 0, 0])
+            if fecha < estado.inicio:
+                fila[0] += debe - haber
+            else:
+                fila[1] += debe
+                fila[2] += haber
+        estado.version = version
+        estado.ultimo_cambio = ultimo
+        self.incrementales += 1
+
+
+_balance = BalanceSaldosIncremental()
+
+
+def balance():
+    return _balance
+
+
+def arbol_balance_saldos(anio, mes):
+    return _balance.arbol(anio, mes)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    if len(sys.argv) > 1:
+        basedatos.configurar(sys.argv[1])
+    hoy = date.today()
+    for intento in ("completo", "sin cambios"):
+        inicio = time.perf_counter()
+        arbol = arbol_balance_saldos(hoy.year, hoy.month)
+        print(f"{intento}: {(time.perf_counter() - inicio) * 1000:.2f} ms  total {arbol.valores}")
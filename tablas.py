@@ -0,0 +1,183 @@
+"""Llenado rápido de tablas y árboles de Qt.
+
+Mientras se llena una vista se suspenden el ordenamiento, sus señales y el
+repintado; las filas de un QTableWidget se crean de una vez con setRowCount.
+El ancho de las columnas se calcula con una muestra de filas y no con todas,
+y el botón de eliminar fila lo dibuja un delegado en lugar de un QPushButton
+por fila. Los árboles se arman con ítems sueltos que se agregan de una vez
+y, si solo cambian valores, se actualizan únicamente las filas que cambiaron.
+"""
+from collections import deque
+from contextlib import contextmanager
+
+from PyQt6.QtCore import QEvent, QRect, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QPainter
+from PyQt6.QtWidgets import QStyle, QStyledItemDelegate, QTableWidgetItem, QTreeWidgetItem
+
+# Filas que se miden para ajustar el ancho de las columnas
+FILAS_PARA_ANCHO = 200
+DERECHA = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+
+
+@contextmanager
+def llenando(vista):
+    """Suspende ordenamiento, señales y repintado de 'vista' mientras dura el bloque."""
+    ordenada = vista.isSortingEnabled()
+    bloqueadas = vista.blockSignals(True)
+    vista.setSortingEnabled(False)
+    vista.setUpdatesEnabled(False)
+    try:
+        yield vista
+    finally:
+        # Al reactivar el ordenamiento la vista ordena una sola vez
+        vista.setSortingEnabled(ordenada)
+        vista.blockSignals(bloqueadas)
+        vista.setUpdatesEnabled(True)
+
+
+def _poner_fila(tabla, r, fila, alinear_derecha):
+    for c, valor in enumerate(fila):
+        if valor is None:
+            continue
+        item = QTableWidgetItem(valor)
+        if c in alinear_derecha:
+            item.setTextAlignment(DERECHA)
+        tabla.setItem(r, c, item)
+
+
+def llenar_tabla(tabla, filas, alinear_derecha=(), ajustar=True):
+    """Reemplaza las filas de un QTableWidget por 'filas' (secuencias de textos).
+
+    'alinear_derecha' son los índices de las columnas de montos; None deja la
+    celda vacía (p. ej. la columna de un delegado).
+    """
+    with llenando(tabla):
+        tabla.setRowCount(0)
+        tabla.setRowCount(len(filas))
+        for r, fila in enumerate(filas):
+            _poner_fila(tabla, r, fila, alinear_derecha)
+    if ajustar:
+        ajustar_columnas(tabla)
+
+
+def agregar_fila(tabla, fila, alinear_derecha=()):
+    """Agrega una fila al final de la tabla."""
+    with llenando(tabla):
+        r = tabla.rowCount()
+        tabla.setRowCount(r + 1)
+        _poner_fila(tabla, r, fila, alinear_derecha)
+
+
+def ajustar_columnas(tabla, muestra=FILAS_PARA_ANCHO):
+    """resizeColumnsToContents midiendo solo 'muestra' filas."""
+    tabla.horizontalHeader().setResizeContentsPrecision(muestra)
+    tabla.resizeColumnsToContents()
+
+
+def negrita(item):
+    fuente = item.font(0)
+    fuente.setBold(True)
+    for col in range(item.columnCount()):
+        item.setFont(col, fuente)
+
+
+def llenar_arbol(vista, nodos, textos):
+    """Reemplaza el contenido de un QTreeWidget por los jerarquia.Nodo 'nodos' y sus descendientes.
+
+    textos(nodo) da los textos de las columnas; los nodos con hijos van en
+    negrita. Devuelve los ítems de primer nivel.
+    """
+    with llenando(vista):
+        vista.clear()
+        superiores = []
+        pendientes = deque((None, nodo) for nodo in nodos)
+        while pendientes:
+            padre, nodo = pendientes.popleft()
+            item = QTreeWidgetItem(textos(nodo))
+            if padre is None:
+                superiores.append(item)
+            else:
+                padre.addChild(item)
+            if nodo.hijos:
+                negrita(item)
+            pendientes.extend((item, hijo) for hijo in nodo.hijos)
+        vista.addTopLevelItems(superiores)
+    return superiores
+
+
+def indice_arbol(superiores, nodos):
+    """{ruta de claves: (ítem, nodo)} de un árbol llenado con llenar_arbol."""
+    indice = {}
+    pendientes = deque(((nodo.clave,), item, nodo) for item, nodo in zip(superiores, nodos))
+    while pendientes:
+        ruta, item, nodo = pendientes.popleft()
+        indice[ruta] = (item, nodo)
+        pendientes.extend((ruta + (hijo.clave,), item.child(i), hijo) for i, hijo in enumerate(nodo.hijos))
+    return indice
+
+
+def actualizar_arbol(vista, indice, nodos, textos):
+    """Cambia los textos solo de los ítems cuyos valores cambiaron.
+
+    'indice' es el de indice_arbol para el contenido actual. Devuelve
+    (nuevo índice, filas cambiadas), o None si el árbol cambió de forma
+    (cuentas nuevas o que desaparecen) y hay que volver a llenarlo.
+    """
+    nuevo = {}
+    pendientes = deque(((nodo.clave,), nodo) for nodo in nodos)
+    while pendientes:
+        ruta, nodo = pendientes.popleft()
+        nuevo[ruta] = nodo
+        pendientes.extend((ruta + (hijo.clave,), hijo) for hijo in nodo.hijos)
+    if nuevo.keys() != indice.keys():
+        return None
+    cambiadas = 0
+    with llenando(vista):
+        for ruta, nodo in nuevo.items():
+            item, anterior = indice[ruta]
+            if anterior.valores != nodo.valores or anterior.nombre != nodo.nombre:
+                for col, texto in enumerate(textos(nodo)):
+                    item.setText(col, texto)
+                cambiadas += 1
+            indice[ruta] = (item, nodo)
+    return indice, cambiadas
+
+
+class DelegadoEliminar(QStyledItemDelegate):
+    """Dibuja un botón 'X' en cada celda de su columna y emite eliminar(fila) al hacer clic."""
+    eliminar = pyqtSignal(int)
+
+    ANCHO, ALTO = 28, 20
+    COLOR = QColor("#D32F2F")
+    COLOR_ENCIMA = QColor("#B71C1C")
+
+    def _boton(self, celda):
+        return QRect(celda.center().x() - self.ANCHO // 2, celda.center().y() - self.ALTO // 2,
+                     self.ANCHO, self.ALTO)
+
+    def paint(self, painter, option, index):
+        encima = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        boton = self._boton(option.rect)
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self.COLOR_ENCIMA if encima else self.COLOR)
+        painter.drawRoundedRect(boton, 4, 4)
+        fuente = painter.font()
+        fuente.setBold(True)
+        fuente.setPointSize(8)
+        painter.setFont(fuente)
+        painter.setPen(QColor("white"))
+        painter.drawText(boton, Qt.AlignmentFlag.AlignCenter, "X")
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.Type.MouseButtonRelease
+                and event.button() == Qt.MouseButton.LeftButton
+                and self._boton(option.rect).contains(event.position().toPoint())):
+            self.eliminar.emit(index.row())
+            return True
+        return False
+
+    def createEditor(self, parent, option, index):
+        return None
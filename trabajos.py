@@ -0,0 +1,156 @@
+"""Trabajos en segundo plano para que la interfaz no se congele.
+
+Cada trabajo corre en un hilo del QThreadPool global. basedatos.conexion()
+es por hilo, así que cada hilo del pool lee con su propia conexión (en WAL
+las lecturas no bloquean a quien escribe). El trabajo avisa su avance,
+se puede cancelar y entrega el resultado por señales, que Qt encola al hilo
+de la interfaz.
+"""
+import sqlite3
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt6.QtWidgets import QMessageBox, QProgressDialog
+
+import basedatos
+
+# Trabajos en curso; la referencia evita que Python los libere antes de terminar
+_activos = set()
+
+
+class Cancelado(Exception):
+    """El usuario canceló el trabajo."""
+
+
+class SenalesTrabajo(QObject):
+    progreso = pyqtSignal(int, int)     # hecho, total (total 0 = sin total conocido)
+    resultado = pyqtSignal(object)
+    error = pyqtSignal(str)
+    cancelado = pyqtSignal()
+    terminado = pyqtSignal()
+
+
+class Trabajo(QRunnable):
+    """Ejecuta funcion(trabajo, *args, **kwargs) en un hilo del pool.
+
+    La función puede llamar a trabajo.avanzar(hecho, total) para informar su
+    avance; si el trabajo fue cancelado, avanzar lanza Cancelado. Las consultas
+    en curso se interrumpen con sqlite3.Connection.interrupt.
+    """
+
+    def __init__(self, funcion, *args, **kwargs):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+        self.senales = SenalesTrabajo()
+        self._cancelar = threading.Event()
+        self._conn = None
+
+    def cancelado(self):
+        return self._cancelar.is_set()
+
+    def cancelar(self):
+        self._cancelar.set()
+        conn = self._conn
+        if conn is not None:
+            conn.interrupt()
+
+    def avanzar(self, hecho, total=0):
+        if self._cancelar.is_set():
+            raise Cancelado()
+        self.senales.progreso.emit(hecho, total)
+
+    def run(self):
+        try:
+            self._conn = basedatos.conexion()
+            if self._cancelar.is_set():
+                raise Cancelado()
+            resultado = self.funcion(self, *self.args, **self.kwargs)
+            if self._cancelar.is_set():
+                raise Cancelado()
+        except Cancelado:
+            self.senales.cancelado.emit()
+        except sqlite3.OperationalError as e:
+            if self._cancelar.is_set():
+                self.senales.cancelado.emit()
+            else:
+                self.senales.error.emit(str(e))
+        except Exception as e:
+            self.senales.error.emit(str(e))
+        else:
+            self.senales.resultado.emit(resultado)
+        finally:
+            self._conn = None
+            self.senales.terminado.emit()
+
+
+def _dialogo_progreso(padre, texto, trabajo):
+    dialogo = QProgressDialog(texto, "Cancelar", 0, 0, padre)
+    dialogo.setWindowTitle("Procesando")
+    dialogo.setWindowModality(Qt.WindowModality.WindowModal)
+    dialogo.setMinimumDuration(400)
+    dialogo.canceled.connect(trabajo.cancelar)
+
+    def avance(hecho, total):
+        dialogo.setMaximum(total)
+        dialogo.setValue(min(hecho, total) if total else 0)
+
+    def fin():
+        dialogo.canceled.disconnect(trabajo.cancelar)
+        dialogo.reset()
+        dialogo.deleteLater()
+
+    trabajo.senales.progreso.connect(avance)
+    trabajo.senales.terminado.connect(fin)
+
+
+def ejecutar(padre, funcion, *args, al_terminar=None, al_error=None, al_cancelar=None,
+             texto=None, **kwargs):
+    """Lanza funcion en segundo plano y devuelve el Trabajo.
+
+    al_terminar recibe el resultado; si no se indica al_error, los errores se
+    muestran en un QMessageBox sobre 'padre'. Con 'texto' se muestra un
+    diálogo de progreso con botón Cancelar si el trabajo tarda.
+    """
+    trabajo = Trabajo(funcion, *args, **kwargs)
+    senales = trabajo.senales
+    if al_terminar:
+        senales.resultado.connect(al_terminar)
+    if al_error:
+        senales.error.connect(al_error)
+    else:
+        senales.error.connect(lambda mensaje: QMessageBox.critical(padre, "Error", mensaje))
+    if al_cancelar:
+        senales.cancelado.connect(al_cancelar)
+    if texto:
+        _dialogo_progreso(padre, texto, trabajo)
+    _activos.add(trabajo)
+    senales.terminado.connect(lambda: _activos.discard(trabajo))
+    QThreadPool.globalInstance().start(trabajo)
+    return trabajo
+
+
+def esperar(milisegundos=-1):
+    """Espera a que terminen los trabajos en curso (al salir o en scripts)."""
+    return QThreadPool.globalInstance().waitForDone(milisegundos)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication(sys.argv)
+
+    def contar(trabajo, n):
+        for i in range(n):
+            time.sleep(0.01)
+            trabajo.avanzar(i + 1, n)
+        return n
+
+    ejecutar(None, contar, 300, texto="Contando...",
+             al_terminar=lambda n: (print("listo:", n), app.quit()),
+             al_cancelar=app.quit)
+    sys.exit(app.exec())